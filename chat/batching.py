@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .models import Message
+from .unread import post_messages
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingMessage:
+    chat_room_id: int
+    sender: dict
+    content: str
+    client_id: str
+
+
+class MessageBatcher:
+    """
+    Per-process write coalescer for chat messages.
+
+    Consumers broadcast a message straight away under a provisional
+    ``client_id`` and hand it to ``submit``. Pending messages are written
+    with a single ``bulk_create`` once ``CHAT_WRITE_BATCH_SIZE`` have queued
+    up or ``CHAT_WRITE_BATCH_INTERVAL`` seconds have passed, so a burst holds
+    one database thread instead of one per message. Batches are written one
+    at a time in arrival order, after which each room group receives a
+    ``messages_persisted`` event mapping client ids to the stored ids.
+
+    Messages still queued when the process dies are lost, so the interval
+    bounds how much a crash can drop.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._write_lock = None
+        self._writes = set()
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'CHAT_WRITE_BATCH_SIZE', 100)
+
+    @property
+    def batch_interval(self):
+        return getattr(settings, 'CHAT_WRITE_BATCH_INTERVAL', 0.05)
+
+    def submit(self, chat_room_id, sender, content, client_id):
+        """
+        Queue a message for the next batch. ``sender`` is the ``id`` and
+        ``full_name`` of the sending user. Must be called from the event loop.
+        """
+        self._bind_loop()
+        self._pending.append(PendingMessage(chat_room_id, sender, content, client_id))
+        if len(self._pending) >= self.batch_size:
+            self._start_write()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.batch_interval, self._start_write)
+
+    async def flush(self):
+        """
+        Write everything queued so far and wait for it to be stored.
+        """
+        if self._loop is not asyncio.get_running_loop():
+            return
+        self._start_write()
+        while self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._pending:
+            logger.warning(f"Dropping {len(self._pending)} chat messages queued on a closed event loop")
+        self._loop = loop
+        self._pending = []
+        self._timer = None
+        self._write_lock = asyncio.Lock()
+        self._writes = set()
+
+    def _start_write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = self._loop.create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch):
+        # The lock is FIFO, so batches reach the database in the order they were cut
+        async with self._write_lock:
+            try:
+                messages = await database_sync_to_async(self._persist, thread_sensitive=False)(batch)
+            except Exception:
+                logger.exception(f"Failed to store a batch of {len(batch)} chat messages")
+                await self._announce(batch, None)
+                return
+            await self._announce(batch, messages)
+
+    @staticmethod
+    def _persist(batch):
+        return post_messages(
+            [Message(chat_room_id=item.chat_room_id, sender_id=item.sender['id'], content=item.content) for item in batch],
+            sender_names={item.sender['id']: item.sender['full_name'] for item in batch}
+        )
+
+    async def _announce(self, batch, messages):
+        channel_layer = get_channel_layer()
+        by_room = defaultdict(list)
+        for index, item in enumerate(batch):
+            by_room[item.chat_room_id].append((item, messages[index] if messages else None))
+
+        for chat_room_id, entries in by_room.items():
+            if messages is None:
+                event = {
+                    'type': 'messages_failed',
+                    'room_id': chat_room_id,
+                    'client_ids': [item.client_id for item, _ in entries]
+                }
+            else:
+                event = {
+                    'type': 'messages_persisted',
+                    'room_id': chat_room_id,
+                    'messages': [
+                        {'client_id': item.client_id, 'id': message.id, 'created_at': message.created_at.isoformat()}
+                        for item, message in entries
+                    ]
+                }
+            try:
+                await channel_layer.group_send(f'chat_{chat_room_id}', event)
+            except Exception as e:
+                logger.error(f"Failed to announce stored messages to room {chat_room_id}: {str(e)}")
+
+
+message_batcher = MessageBatcher()
@@ -0,0 +1,22 @@
+from django.core.checks import Tags, Warning, register
+
+from config.cache import is_cache_shared
+
+
+@register(Tags.caches)
+def check_presence_cache(app_configs, **kwargs):
+    """
+    Presence is written by the socket workers and read by the API workers,
+    so it needs a cache every process sees.
+    """
+    if is_cache_shared():
+        return []
+    return [
+        Warning(
+            'The default cache is not shared between processes, so chat presence '
+            'written by socket workers is not seen by the API.',
+            hint='Point CACHES at Redis (REDIS_HOST/REDIS_PORT), or set SHARED_CACHE '
+                 'if a single process serves both.',
+            id='chat.W001',
+        )
+    ]
@@ -1,45 +1,215 @@
 import json
+import time
+import uuid
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.utils import timezone
-from .models import ChatRoom, Message, ChatRoomMember
+from .batching import message_batcher
+from .models import ChatRoomMember
+from .presence import heartbeat, presence_ttl, user_connected, user_disconnected
+from .replay import get_missed_messages
+from .unread import mark_read, post_message
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.utils import timezone
+from urllib.parse import parse_qs
 import logging
 
 logger = logging.getLogger('django')
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class RoomEventsMixin:
+    """
+    Room operations shared by the per-room and the multiplexed consumers.
+    Every event sent to a room group carries the ``room_id`` it belongs to.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Rooms the user is typing in, with when that was last broadcast
+        self.typing_rooms = {}
+
+    def resolve_sender(self):
+        # Identity sent with every message, resolved once per connection
+        self.sender = {
+            'id': self.user.id,
+            'full_name': self.user.full_name,
+        }
+
+    async def send_chat_message(self, room_id, content, client_id=None):
+        """
+        Store a message and broadcast it to the room, or with
+        ``CHAT_WRITE_COALESCING`` on, broadcast it under a provisional
+        ``client_id`` and leave the write to ``message_batcher``.
+        """
+        if getattr(settings, 'CHAT_WRITE_COALESCING', False):
+            if not isinstance(client_id, str) or not client_id:
+                client_id = uuid.uuid4().hex
+            message_batcher.submit(room_id, self.sender, content, client_id)
+            message = {
+                'id': None,
+                'client_id': client_id,
+                'content': content,
+                'sender': self.sender,
+                'created_at': timezone.now().isoformat(),
+                'is_read': False
+            }
+        else:
+            # Save message to database
+            saved = await self.save_message(room_id, content)
+            if not saved:
+                await self.send(text_data=json.dumps({
+                    'error': 'Failed to save message',
+                    'detail': 'The message could not be stored'
+                }))
+                return
+            message = {
+                'id': saved['id'],
+                'content': saved['content'],
+                'sender': self.sender,
+                'created_at': saved['created_at'].isoformat(),
+                'is_read': False
+            }
+
+        # Broadcast message to room group
+        await self.channel_layer.group_send(
+            f'chat_{room_id}',
+            {
+                'type': 'chat_message',
+                'room_id': room_id,
+                'message': message
+            }
+        )
+
+    async def update_typing(self, room_id, is_typing):
+        interval = getattr(settings, 'CHAT_TYPING_INTERVAL', 3)
+        sent_at = self.typing_rooms.get(room_id)
+        if is_typing == (sent_at is not None) and (not is_typing or time.monotonic() - sent_at < interval):
+            return
+        await self.send_typing(room_id, is_typing)
+
+    async def send_typing(self, room_id, is_typing):
+        if is_typing:
+            self.typing_rooms[room_id] = time.monotonic()
+        else:
+            self.typing_rooms.pop(room_id, None)
+        await self.channel_layer.group_send(
+            f'chat_{room_id}',
+            {
+                'type': 'typing',
+                'room_id': room_id,
+                'user_id': self.user.id,
+                'is_typing': is_typing
+            }
+        )
+
+    async def stop_typing(self):
+        for room_id in list(self.typing_rooms):
+            await self.send_typing(room_id, False)
+
+    async def broadcast_presence(self, online):
+        last_seen = None if online else timezone.now().isoformat()
+        for room_id in await self.get_room_ids():
+            await self.channel_layer.group_send(f'chat_{room_id}', {
+                'type': 'presence',
+                'room_id': room_id,
+                'user_id': self.user.id,
+                'online': online,
+                'last_seen': last_seen
+            })
+
+    async def replay(self, room_id, since, **extra):
+        """
+        Send the messages of a room newer than ``since`` in one frame. The
+        socket must already be in the room group, so nothing sent meanwhile
+        slips between the replay and the live broadcasts.
+        """
+        messages, has_more = await database_sync_to_async(get_missed_messages)(room_id, since)
+        await self.send(text_data=json.dumps(dict(
+            extra, type='replay', messages=messages, has_more=has_more
+        )))
+
+    @database_sync_to_async
+    def save_message(self, room_id, content):
+        try:
+            message = post_message(room_id, self.user, content)
+
+            logger.debug(f"Message saved: id={message.id}, sender={self.user.id}, room={room_id}")
+
+            return {
+                'id': message.id,
+                'content': message.content,
+                'created_at': message.created_at,
+            }
+        except Exception as e:
+            logger.error(f"Error saving message: {str(e)}")
+            return None
+
+    @database_sync_to_async
+    def get_room_ids(self):
+        return list(ChatRoomMember.objects.filter(user=self.user).values_list('chat_room_id', flat=True))
+
+
+class ChatConsumer(RoomEventsMixin, AsyncWebsocketConsumer):
+    """
+    Chat room socket. Membership is verified once in ``connect`` and kept for
+    the life of the connection; ``membership_changed`` events on the room
+    group close the socket of a member who is removed.
+
+    With ``CHAT_WRITE_COALESCING`` on, messages are broadcast before they are
+    stored, under a provisional ``client_id`` (the client's own if it sent
+    one), and written in batches by ``message_batcher``; the stored ids
+    follow in a ``messages_persisted`` event.
+
+    Besides chat messages, clients send ``{"type": "heartbeat"}`` to stay
+    online and ``{"type": "typing", "is_typing": ...}`` for typing
+    indicators. Neither touches the database: presence lives in the cache
+    and typing is relayed over the room group, at most once per
+    ``CHAT_TYPING_INTERVAL`` seconds while the state is unchanged.
+
+    Clients reconnecting with ``?since=<message id>`` first get a ``replay``
+    frame with only the messages they missed.
+    """
+
     async def connect(self):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
         self.room_group_name = f'chat_{self.room_id}'
-        
+        self.user = self.scope['user']
+
         # Log connection attempt
-        logger.debug(f"WebSocket connect attempt: room_id={self.room_id}, user={self.scope['user']}")
-        
+        logger.debug(f"WebSocket connect attempt: room_id={self.room_id}, user={self.user}")
+
+        # Reject anonymous users and non-members before the handshake completes
+        if isinstance(self.user, AnonymousUser) or not self.room_id.isdigit():
+            await self.close()
+            return
+        if not await self.update_last_read():
+            logger.warning(f"User {self.user.id} attempted to join room {self.room_id} but is not a member")
+            await self.close()
+            return
+        self.resolve_sender()
+
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
-        
+
         # Accept the connection
         await self.accept()
-        
-        # Update last_read for this user in this room if authenticated
-        if not isinstance(self.scope['user'], AnonymousUser):
-            await self.update_last_read()
-            # Send a connection confirmation message
-            await self.send(text_data=json.dumps({
-                'type': 'connection_established',
-                'message': 'Connected to chat room',
-                'user_id': self.scope['user'].id
-            }))
-        else:
-            # Inform client about authentication requirement
-            await self.send(text_data=json.dumps({
-                'error': 'Authentication required',
-                'detail': 'Valid JWT token required in query parameter "token"'
-            }))
+
+        # Send a connection confirmation message
+        await self.send(text_data=json.dumps({
+            'type': 'connection_established',
+            'message': 'Connected to chat room',
+            'user_id': self.user.id,
+            'heartbeat_interval': presence_ttl() // 2
+        }))
+
+        since = parse_qs(self.scope.get('query_string', b'').decode()).get('since')
+        if since and since[0].isdigit():
+            await self.replay(int(self.room_id), int(since[0]))
+
+        if await user_connected(self.user.id):
+            await self.broadcast_presence(online=True)
 
     async def disconnect(self, close_code):
         # Leave room group
@@ -49,45 +219,28 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
         logger.debug(f"WebSocket disconnected: room_id={self.room_id}, code={close_code}")
 
+        # Only sockets that passed the membership check were counted
+        if not hasattr(self, 'sender'):
+            return
+        await self.stop_typing()
+        if await user_disconnected(self.user.id):
+            await self.broadcast_presence(online=False)
+
     async def receive(self, text_data):
         try:
             text_data_json = json.loads(text_data)
-            message_content = text_data_json.get('message', '')
-            
-            logger.debug(f"Message receive: {text_data}")
-            
-            if isinstance(self.scope['user'], AnonymousUser):
-                await self.send(text_data=json.dumps({
-                    'error': 'Authentication required',
-                    'detail': 'You must be authenticated to send messages'
-                }))
+            event_type = text_data_json.get('type', 'message')
+            if event_type == 'heartbeat':
+                await heartbeat(self.user.id)
                 return
-            
-            # Save message to database
-            message = await self.save_message(message_content)
-            if not message:
-                await self.send(text_data=json.dumps({
-                    'error': 'Failed to save message',
-                    'detail': 'You may not be a member of this chat room'
-                }))
+            if event_type == 'typing':
+                await self.update_typing(int(self.room_id), bool(text_data_json.get('is_typing')))
                 return
-                
-            # Broadcast message to room group
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'chat_message',
-                    'message': {
-                        'id': message['id'],
-                        'content': message['content'],
-                        'sender': {
-                            'id': message['sender_id'],
-                            'full_name': message['sender_name'],
-                        },
-                        'created_at': message['created_at'].isoformat(),
-                        'is_read': False
-                    }
-                }
+
+            logger.debug(f"Message receive: {text_data}")
+
+            await self.send_chat_message(
+                int(self.room_id), text_data_json.get('message', ''), text_data_json.get('client_id')
             )
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}")
@@ -98,77 +251,252 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def chat_message(self, event):
         message = event['message']
-        
+
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
             'message': message
         }))
 
-    @database_sync_to_async
-    def save_message(self, content):
-        try:
-            user = self.scope['user']
-            chat_room = ChatRoom.objects.get(id=self.room_id)
-            
-            # Check if user is a member of this chat room
-            is_member = ChatRoomMember.objects.filter(
-                chat_room=chat_room,
-                user=user
-            ).exists()
-            
-            if not is_member:
-                logger.warning(f"User {user.id} attempted to send message in room {self.room_id} but is not a member")
-                return None
-                
-            message = Message.objects.create(
-                chat_room=chat_room,
-                sender=user,
-                content=content
-            )
-            
-            logger.debug(f"Message saved: id={message.id}, sender={user.id}, room={self.room_id}")
-            
-            return {
-                'id': message.id,
-                'content': message.content,
-                'sender_id': message.sender.id,
-                'sender_name': message.sender.full_name,
-                'created_at': message.created_at,
-            }
-        except ChatRoom.DoesNotExist:
-            logger.error(f"Chat room {self.room_id} does not exist")
-            return None
-        except Exception as e:
-            logger.error(f"Error saving message: {str(e)}")
-            return None
+    async def messages_persisted(self, event):
+        # Stored ids of messages broadcast under a client id
+        await self.send(text_data=json.dumps({
+            'type': 'messages_persisted',
+            'messages': event['messages']
+        }))
+
+    async def messages_failed(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'messages_failed',
+            'client_ids': event['client_ids']
+        }))
+
+    async def typing(self, event):
+        if event['user_id'] != self.user.id:
+            await self.send(text_data=json.dumps(event))
+
+    async def presence(self, event):
+        if event['user_id'] != self.user.id:
+            await self.send(text_data=json.dumps(event))
+
+    async def membership_changed(self, event):
+        # Sent by chat.signals when a member joins or leaves the room
+        if event['action'] == 'removed' and event['user_id'] == self.user.id:
+            logger.debug(f"User {self.user.id} removed from room {self.room_id}, closing socket")
+            await self.close()
 
     @database_sync_to_async
     def update_last_read(self):
-        user = self.scope['user']
+        """
+        Mark the room read for the connecting user.
+
+        Returns:
+            Whether the user is a member of the room
+        """
         try:
-            chat_room = ChatRoom.objects.get(id=self.room_id)
-            member, created = ChatRoomMember.objects.get_or_create(
-                chat_room=chat_room,
-                user=user,
-                defaults={'last_read': timezone.now()}
-            )
-            
-            if not created:
-                member.last_read = timezone.now()
-                member.save()
-                
-            # Mark messages as read - note: changed 'sender__id__ne' to exclude messages from current user
-            Message.objects.filter(
-                chat_room=chat_room,
-                created_at__lte=timezone.now(),
-                sender__id__isnull=False
-            ).exclude(sender=user).update(is_read=True)
-                
-            logger.debug(f"Last read updated for user {user.id} in room {self.room_id}")
-                
-        except ChatRoom.DoesNotExist:
-            logger.error(f"Chat room {self.room_id} does not exist")
-            pass
+            is_member = mark_read(int(self.room_id), self.user)
+            if is_member:
+                logger.debug(f"Last read updated for user {self.user.id} in room {self.room_id}")
+            return is_member
         except Exception as e:
             logger.error(f"Error updating last read: {str(e)}")
-            pass
\ No newline at end of file
+            return False
+
+
+class StreamConsumer(RoomEventsMixin, AsyncWebsocketConsumer):
+    """
+    One socket for all of a user's chat rooms and notifications, instead of
+    one socket (and one authentication) per open room.
+
+    Clients drive it with ``action`` frames:
+
+    - ``{"action": "subscribe", "rooms": [1, 2], "notifications": true, "since": {"1": 120}}``
+    - ``{"action": "unsubscribe", "rooms": [1], "notifications": false}``
+    - ``{"action": "send", "room": 1, "message": "...", "client_id": "..."}``
+    - ``{"action": "typing", "room": 1, "is_typing": true}``
+    - ``{"action": "read", "room": 1}``
+    - ``{"action": "heartbeat"}``
+
+    Membership of every requested room is checked in one query when
+    subscribing; rooms with a ``since`` message id are then caught up with a
+    ``replay`` frame of the messages missed. Outgoing frames carry a ``type`` and, for room events, the
+    ``room`` they belong to.
+    """
+
+    async def connect(self):
+        self.user = self.scope['user']
+        if isinstance(self.user, AnonymousUser):
+            await self.close()
+            return
+        self.rooms = set()
+        self.notifications = False
+        self.resolve_sender()
+
+        await self.accept()
+        await self.send(text_data=json.dumps({
+            'type': 'connection_established',
+            'user_id': self.user.id,
+            'heartbeat_interval': presence_ttl() // 2
+        }))
+
+        if await user_connected(self.user.id):
+            await self.broadcast_presence(online=True)
+
+    async def disconnect(self, close_code):
+        if not hasattr(self, 'rooms'):
+            return
+        for room_id in self.rooms:
+            await self.channel_layer.group_discard(f'chat_{room_id}', self.channel_name)
+        if self.notifications:
+            await self.channel_layer.group_discard(self.notification_group_name, self.channel_name)
+        logger.debug(f"Stream disconnected: user={self.user.id}, rooms={len(self.rooms)}, code={close_code}")
+
+        await self.stop_typing()
+        if await user_disconnected(self.user.id):
+            await self.broadcast_presence(online=False)
+
+    @property
+    def notification_group_name(self):
+        return f'user_{self.user.id}_notifications'
+
+    async def receive(self, text_data):
+        try:
+            frame = json.loads(text_data)
+            action = frame.get('action')
+            if action == 'heartbeat':
+                await heartbeat(self.user.id)
+            elif action == 'subscribe':
+                await self.subscribe(frame)
+            elif action == 'unsubscribe':
+                await self.unsubscribe(frame)
+            elif action in ('send', 'typing', 'read'):
+                room_id = frame.get('room')
+                if room_id not in self.rooms:
+                    await self.send(text_data=json.dumps({
+                        'error': 'Not subscribed',
+                        'detail': f'Subscribe to room {room_id} first'
+                    }))
+                elif action == 'send':
+                    await self.send_chat_message(room_id, frame.get('message', ''), frame.get('client_id'))
+                elif action == 'typing':
+                    await self.update_typing(room_id, bool(frame.get('is_typing')))
+                else:
+                    await database_sync_to_async(mark_read)(room_id, self.user)
+            else:
+                await self.send(text_data=json.dumps({
+                    'error': 'Unknown action',
+                    'detail': f'Unsupported action {action!r}'
+                }))
+        except Exception as e:
+            logger.error(f"Error processing stream frame: {str(e)}")
+            await self.send(text_data=json.dumps({
+                'error': 'Server error',
+                'detail': str(e)
+            }))
+
+    async def subscribe(self, frame):
+        requested = self.parse_rooms(frame)
+        max_rooms = getattr(settings, 'CHAT_STREAM_MAX_ROOMS', 500)
+        if len(self.rooms | requested) > max_rooms:
+            await self.send(text_data=json.dumps({
+                'error': 'Too many rooms',
+                'detail': f'A stream can follow at most {max_rooms} rooms'
+            }))
+            return
+
+        new_rooms = requested - self.rooms
+        allowed = await self.get_member_room_ids(new_rooms) if new_rooms else set()
+        for room_id in allowed:
+            await self.channel_layer.group_add(f'chat_{room_id}', self.channel_name)
+        self.rooms |= allowed
+
+        if frame.get('notifications') and not self.notifications:
+            await self.channel_layer.group_add(self.notification_group_name, self.channel_name)
+            self.notifications = True
+
+        await self.send(text_data=json.dumps({
+            'type': 'subscribed',
+            'rooms': sorted(requested & self.rooms),
+            'rejected': sorted(requested - self.rooms),
+            'notifications': self.notifications
+        }))
+
+        since = frame.get('since') or {}
+        for room_id in sorted(allowed):
+            message_id = since.get(str(room_id)) if isinstance(since, dict) else None
+            if isinstance(message_id, int):
+                await self.replay(room_id, message_id, room=room_id)
+
+    async def unsubscribe(self, frame):
+        rooms = self.parse_rooms(frame) & self.rooms
+        for room_id in rooms:
+            await self.channel_layer.group_discard(f'chat_{room_id}', self.channel_name)
+            if room_id in self.typing_rooms:
+                await self.send_typing(room_id, False)
+        self.rooms -= rooms
+
+        if frame.get('notifications') is False and self.notifications:
+            await self.channel_layer.group_discard(self.notification_group_name, self.channel_name)
+            self.notifications = False
+
+        await self.send(text_data=json.dumps({
+            'type': 'unsubscribed',
+            'rooms': sorted(rooms),
+            'notifications': self.notifications
+        }))
+
+    @staticmethod
+    def parse_rooms(frame):
+        rooms = frame.get('rooms') or []
+        return {room_id for room_id in rooms if isinstance(room_id, int) and not isinstance(room_id, bool)}
+
+    @database_sync_to_async
+    def get_member_room_ids(self, room_ids):
+        return set(ChatRoomMember.objects.filter(
+            user=self.user, chat_room_id__in=room_ids
+        ).values_list('chat_room_id', flat=True))
+
+    async def send_room_event(self, event, data):
+        # Group events can still arrive shortly after unsubscribing
+        if event['room_id'] in self.rooms:
+            await self.send(text_data=json.dumps(dict(data, room=event['room_id'])))
+
+    async def chat_message(self, event):
+        await self.send_room_event(event, {'type': 'message', 'message': event['message']})
+
+    async def messages_persisted(self, event):
+        await self.send_room_event(event, {'type': 'messages_persisted', 'messages': event['messages']})
+
+    async def messages_failed(self, event):
+        await self.send_room_event(event, {'type': 'messages_failed', 'client_ids': event['client_ids']})
+
+    async def typing(self, event):
+        if event['user_id'] != self.user.id:
+            await self.send_room_event(event, {
+                'type': 'typing', 'user_id': event['user_id'], 'is_typing': event['is_typing']
+            })
+
+    async def presence(self, event):
+        if event['user_id'] != self.user.id:
+            await self.send_room_event(event, {
+                'type': 'presence', 'user_id': event['user_id'],
+                'online': event['online'], 'last_seen': event['last_seen']
+            })
+
+    async def membership_changed(self, event):
+        room_id = event['room_id']
+        if event['action'] == 'removed' and event['user_id'] == self.user.id and room_id in self.rooms:
+            await self.channel_layer.group_discard(f'chat_{room_id}', self.channel_name)
+            self.rooms.discard(room_id)
+            self.typing_rooms.pop(room_id, None)
+            await self.send(text_data=json.dumps({
+                'type': 'unsubscribed',
+                'rooms': [room_id],
+                'reason': 'removed',
+                'notifications': self.notifications
+            }))
+
+    async def notification_message(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'notification',
+            'data': event['data']
+        }))
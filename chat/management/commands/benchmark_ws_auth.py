@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chat.middleware import TokenAuthMiddleware, user_cache
+
+
+async def accept(scope, receive, send):
+    # Stands in for the consumer; only the authentication is timed
+    return scope['user']
+
+
+class Command(BaseCommand):
+    help = 'Measure socket handshakes authenticated per second by TokenAuthMiddleware, with and without the user cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connects', type=int, default=2000, help='Handshakes per run')
+        parser.add_argument('--users', type=int, default=50, help='Distinct users reconnecting')
+        parser.add_argument('--concurrency', type=int, default=100, help='Handshakes in flight at once')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = []
+        for i in range(options['users']):
+            user, _ = User.objects.get_or_create(
+                email=f'loadtest-{i}@example.com',
+                defaults={
+                    'username': f'loadtest-{i}',
+                    'full_name': f'Load Test {i}',
+                    'phone_number': f'+2349{i:09d}',
+                    'is_active': True,
+                }
+            )
+            users.append(user)
+        User.objects.filter(pk__in=[user.pk for user in users]).update(is_active=True)
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+        scopes = [
+            {'type': 'websocket', 'query_string': f'token={tokens[i % len(tokens)]}'.encode()}
+            for i in range(options['connects'])
+        ]
+
+        for label, cached in [('database per connect', False), ('user cache', True)]:
+            user_cache.clear()
+            elapsed, anonymous = async_to_sync(self._run)(scopes, options['concurrency'], cached)
+            self.stdout.write(
+                f"{label:<22}{len(scopes) / elapsed:>10.0f} connects/s"
+                f"  ({elapsed * 1000 / len(scopes):.3f} ms each, {anonymous} rejected)"
+            )
+
+    async def _run(self, scopes, concurrency, cached):
+        middleware = TokenAuthMiddleware(accept)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def connect(scope):
+            async with semaphore:
+                if not cached:
+                    user_cache.clear()
+                return await middleware(dict(scope), None, None)
+
+        started = time.perf_counter()
+        users = await asyncio.gather(*[connect(scope) for scope in scopes])
+        elapsed = time.perf_counter() - started
+        return elapsed, sum(1 for user in users if not user.is_authenticated)
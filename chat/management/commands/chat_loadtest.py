@@ -0,0 +1,127 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from chat.batching import message_batcher
+from chat.models import ChatRoom, ChatRoomMember, Message
+from chat.routing import websocket_urlpatterns
+
+RECEIVE_TIMEOUT = 30
+
+
+class AuthenticatedAs:
+    """
+    Stands in for the token middleware, authenticating every socket as a fixed user.
+    """
+
+    def __init__(self, app, user):
+        self.app = app
+        self.user = user
+
+    async def __call__(self, scope, receive, send):
+        return await self.app(dict(scope, user=self.user), receive, send)
+
+
+class Command(BaseCommand):
+    help = 'Drive simulated sockets against ChatConsumer over an in-memory channel layer and report message latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=10, help='Number of chat rooms')
+        parser.add_argument('--sockets', type=int, default=10, help='Sockets (and members) per room')
+        parser.add_argument('--messages', type=int, default=20, help='Messages sent by each socket')
+        parser.add_argument('--coalesce', action='store_true', help='Enable CHAT_WRITE_COALESCING')
+
+    def handle(self, *args, **options):
+        users = self._users(options['sockets'])
+        rooms = self._rooms(options['rooms'], users)
+        channel_layers = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer', 'CONFIG': {'capacity': 100000}}}
+        with override_settings(CHANNEL_LAYERS=channel_layers, CHAT_WRITE_COALESCING=options['coalesce']):
+            try:
+                latencies, elapsed = async_to_sync(self._run)(rooms, users, options['messages'])
+                stored = Message.objects.filter(chat_room__in=rooms).count()
+            finally:
+                # Members and messages go with their rooms
+                ChatRoom.objects.filter(pk__in=[room.pk for room in rooms]).delete()
+
+        sent = len(latencies)
+        latencies.sort()
+        self.stdout.write(
+            f"{'coalesced' if options['coalesce'] else 'per-message'} writes: "
+            f"{len(rooms)} rooms x {len(users)} sockets x {options['messages']} messages"
+        )
+        self.stdout.write(f"  sent {sent} in {elapsed:.2f}s ({sent / elapsed:.0f} msg/s), stored {stored}")
+        self.stdout.write(
+            f"  broadcast latency ms: p50 {statistics.median(latencies):.2f}  "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f}  max {latencies[-1]:.2f}"
+        )
+
+    def _users(self, count):
+        User = get_user_model()
+        users = []
+        for i in range(count):
+            user, _ = User.objects.get_or_create(
+                email=f'loadtest-{i}@example.com',
+                defaults={
+                    'username': f'loadtest-{i}',
+                    'full_name': f'Load Test {i}',
+                    'phone_number': f'+2349{i:09d}',
+                }
+            )
+            users.append(user)
+        return users
+
+    def _rooms(self, count, users):
+        rooms = [ChatRoom.objects.create(room_type='DIRECT') for _ in range(count)]
+        ChatRoomMember.objects.bulk_create([
+            ChatRoomMember(chat_room=room, user=user) for room in rooms for user in users
+        ])
+        return rooms
+
+    async def _run(self, rooms, users, messages):
+        communicators = []
+        for room in rooms:
+            for user in users:
+                communicator = WebsocketCommunicator(
+                    AuthenticatedAs(URLRouter(websocket_urlpatterns), user), f'ws/chat/{room.id}/'
+                )
+                connected, _ = await communicator.connect(timeout=RECEIVE_TIMEOUT)
+                if not connected:
+                    raise RuntimeError(f'Socket for {user.email} was refused by room {room.id}')
+                await communicator.receive_json_from(timeout=RECEIVE_TIMEOUT)
+                communicators.append(communicator)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._drive(communicator, index, messages) for index, communicator in enumerate(communicators)
+        ])
+        elapsed = time.perf_counter() - started
+
+        await message_batcher.flush()
+        for communicator in communicators:
+            await communicator.disconnect()
+        return [latency for latencies in results for latency in latencies], elapsed
+
+    async def _drive(self, communicator, index, messages):
+        """
+        Send messages one after another, timing each until its own broadcast
+        comes back; broadcasts from other sockets are drained on the way.
+        """
+        latencies = []
+        for n in range(messages):
+            client_id = f'{index}-{n}'
+            sent_at = time.perf_counter()
+            await communicator.send_json_to({'message': f'Load test {client_id}', 'client_id': client_id})
+            while True:
+                event = await communicator.receive_json_from(timeout=RECEIVE_TIMEOUT)
+                message = event.get('message')
+                if isinstance(message, dict) and message.get('content') == f'Load test {client_id}':
+                    break
+            latencies.append((time.perf_counter() - sent_at) * 1000)
+        return latencies
@@ -1,100 +1,146 @@
 from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
+from collections import OrderedDict
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
 from urllib.parse import parse_qs
 import logging
+import threading
+import time
 
 # Set up logging
 logger = logging.getLogger('django')
-class WebSocketAuthMiddleware(BaseMiddleware):
+
+
+class UserCache:
+    """
+    Short-lived in-process cache of the users behind socket tokens, so a
+    reconnect storm does not become a storm of user lookups.
+
+    Entries are keyed by user id and token version (the revoke claim when
+    ``CHECK_REVOKE_TOKEN`` is on), expire after ``WS_AUTH_USER_CACHE_TTL``
+    seconds and are evicted when the user is saved or deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'WS_AUTH_USER_CACHE_TTL', 60)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'WS_AUTH_USER_CACHE_SIZE', 10000)
+
+    def get(self, user_id, version=None):
+        # Token claims hold the id as a string
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            cached_version, user, expires_at = entry
+            if cached_version != version or expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, version, user):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (version, user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates sockets from a JWT access token in the ``token`` query parameter.
+
+    The signature and claims are checked in the event loop, as they need no
+    I/O; only a ``user_cache`` miss goes to the database. Sockets with a
+    missing or invalid token get an ``AnonymousUser``.
+    """
+
+    jwt_auth = JWTAuthentication()
+
     async def __call__(self, scope, receive, send):
-        # Extract token from the query string.
         token = self.get_token_from_scope(scope)
+
+        # Set the user in the scope
         if token:
-            try:
-                jwt_authenticator = JWTAuthentication()
-                # Validate the token (synchronously) 
-                validated_token = jwt_authenticator.get_validated_token(token)
-                # Retrieve the user associated with the validated token in an async-safe manner
-                user = await database_sync_to_async(jwt_authenticator.get_user)(validated_token)
-                scope['user'] = user if user is not None else AnonymousUser()
-            except Exception as e:
-                # Optionally, log the exception for debugging:
-                # print("JWT validation error:", e)
-                scope['user'] = AnonymousUser()
+            scope['user'] = await self.authenticate(token)
         else:
             scope['user'] = AnonymousUser()
+            logger.debug("No token provided, setting AnonymousUser")
 
         return await super().__call__(scope, receive, send)
-    
+
     def get_token_from_scope(self, scope):
         """
         Extracts the 'token' parameter from the query string.
         For example, if the client connects with:
-            ws://127.0.0.1:8000/ws/requests/?token=YOUR_JWT_TOKEN
+            ws://127.0.0.1:8000/ws/stream/?token=YOUR_JWT_TOKEN
         this method returns YOUR_JWT_TOKEN.
         """
         query_string = scope.get('query_string', b'').decode()
-        query_params = parse_qs(query_string)
-        token_list = query_params.get('token')
-        if token_list:
-            return token_list[0]
-        return None
+        token_list = parse_qs(query_string).get('token')
+        if not token_list:
+            return None
+        # Remove any trailing slashes from token
+        return token_list[0].rstrip('/')
 
+    async def authenticate(self, token):
+        """
+        The user a token belongs to, or ``AnonymousUser`` if it is invalid.
+        """
+        try:
+            validated_token = self.jwt_auth.get_validated_token(token)
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except (InvalidToken, TokenError, KeyError) as e:
+            logger.debug(f"Token authentication error: {str(e)}")
+            return AnonymousUser()
+
+        version = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) if api_settings.CHECK_REVOKE_TOKEN else None
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = await self.get_user(validated_token)
+            if user is None:
+                return AnonymousUser()
+            user_cache.set(user_id, version, user)
+        logger.debug(f"Authenticated user: {user.id}")
+        return user
 
-class TokenAuthMiddleware(BaseMiddleware):
-    """
-    Custom middleware for token-based authentication in WebSockets
-    """
-    
-    async def __call__(self, scope, receive, send):
-        # Extract token from query string
-        query_string = scope.get('query_string', b'').decode()
-        query_params = parse_qs(query_string)
-        
-        # Log query parameters for debugging
-        logger.debug(f"WebSocket query params: {query_params}")
-        
-        token = None
-        if 'token' in query_params:
-            token = query_params['token'][0]
-            # Remove any trailing slashes from token
-            if token.endswith('/'):
-                token = token[:-1]
-        
-        # Set the user in the scope
-        if token:
-            # Authenticate using JWT token
-            user = await self.get_user_from_token(token)
-            if user:
-                scope['user'] = user
-                logger.debug(f"Authenticated user: {user.id}")
-            else:
-                scope['user'] = AnonymousUser()
-                logger.debug("Failed to authenticate user with provided token")
-        else:
-            scope['user'] = AnonymousUser()
-            logger.debug("No token provided, setting AnonymousUser")
-        
-        return await super().__call__(scope, receive, send)
-    
     @database_sync_to_async
-    def get_user_from_token(self, token):
+    def get_user(self, validated_token):
         """
         Get the user associated with the given token
         """
         try:
-            # Initialize JWT authentication
-            jwt_auth = JWTAuthentication()
-            
-            # Validate token
-            validated_token = jwt_auth.get_validated_token(token)
-            
-            # Get user from validated token
-            user = jwt_auth.get_user(validated_token)
-            return user
-        except Exception as e:
-            # Log any errors for debugging
+            return self.jwt_auth.get_user(validated_token)
+        except (AuthenticationFailed, InvalidToken) as e:
             logger.error(f"Token authentication error: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+
+# Both names were separate implementations of the same query-string JWT auth
+WebSocketAuthMiddleware = TokenAuthMiddleware
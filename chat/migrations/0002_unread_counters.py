@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_unread_counters(apps, schema_editor):
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    ChatRoomMember = apps.get_model('chat', 'ChatRoomMember')
+    Message = apps.get_model('chat', 'Message')
+
+    ChatRoom.objects.update(
+        last_message=Subquery(
+            Message.objects.filter(chat_room=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+        )
+    )
+
+    # Same definition the serializer used: messages from others since last_read
+    members = ChatRoomMember.objects.only('id', 'chat_room_id', 'user_id', 'last_read')
+    batch = []
+    for member in members.iterator(chunk_size=1000):
+        unread = Message.objects.filter(chat_room_id=member.chat_room_id).exclude(sender_id=member.user_id)
+        if member.last_read:
+            unread = unread.filter(created_at__gt=member.last_read)
+        member.unread_count = unread.count()
+        batch.append(member)
+        if len(batch) >= 1000:
+            ChatRoomMember.objects.bulk_update(batch, ['unread_count'])
+            batch = []
+    ChatRoomMember.objects.bulk_update(batch, ['unread_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.AddField(
+            model_name='chatroommember',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
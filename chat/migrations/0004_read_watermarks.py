@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_watermarks(apps, schema_editor):
+    ChatRoomMember = apps.get_model('chat', 'ChatRoomMember')
+    Message = apps.get_model('chat', 'Message')
+
+    # The newest message a member had seen when they last read the room
+    ChatRoomMember.objects.filter(last_read__isnull=False).update(
+        last_read_message=Subquery(
+            Message.objects.filter(
+                chat_room=OuterRef('chat_room'),
+                created_at__lte=OuterRef('last_read')
+            ).order_by('-created_at', '-id').values('id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_message_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroommember',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.RunPython(backfill_watermarks, migrations.RunPython.noop),
+    ]
@@ -17,6 +17,13 @@ class ChatRoom(models.Model):
         blank=True,
         related_name='chat_rooms'
     )
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )  # Kept up to date by chat.unread.post_message
     
     def __str__(self):
         return f"ChatRoom {self.id} - {self.room_type}"
@@ -25,20 +32,78 @@ class ChatRoomMember(models.Model):
     chat_room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='members')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_rooms')
     last_read = models.DateTimeField(null=True, blank=True)
+    # Read watermark: every message up to and including this one has been read
+    last_read_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    unread_count = models.PositiveIntegerField(default=0)  # Messages from others since last_read
     joined_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ['chat_room', 'user']
 
+class MessageQuerySet(models.QuerySet):
+    def with_read_state(self):
+        """
+        Annotate whether another member has read each message, for
+        ``Message.is_read``, in the same query as the messages.
+        """
+        return self.annotate(read_by_others=models.Exists(
+            ChatRoomMember.objects.filter(
+                chat_room_id=models.OuterRef('chat_room_id'),
+                last_read_message_id__gte=models.OuterRef('pk')
+            ).exclude(user_id=models.OuterRef('sender_id'))
+        ))
+
 class Message(models.Model):
     chat_room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a room's history
+            models.Index(fields=['chat_room', 'created_at', 'id'], name='chat_message_history_idx'),
+        ]
+
+    objects = MessageQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            # Watermarks only ever reach messages that existed when they were set
+            self.read_by_others = False
+
+    def read_by(self, watermarks):
+        """
+        Whether another member of the room has read this message, given the
+        room's read watermarks by user id.
+        """
+        return any(
+            watermark is not None and watermark >= self.id
+            for user_id, watermark in watermarks.items()
+            if user_id != self.sender_id
+        )
+
+    @property
+    def is_read(self):
+        """
+        Whether another member of the room has read this message. Known for
+        messages loaded ``with_read_state()`` and ones just saved; elsewhere
+        use ``read_by`` with the room's watermarks rather than a query each.
+        """
+        if not hasattr(self, 'read_by_others'):
+            raise AttributeError(
+                'Message.is_read needs Message.objects.with_read_state() or the read watermarks of read_by()'
+            )
+        return self.read_by_others
 
 class PropertyInquiry(models.Model):
     STATUS_CHOICES = (
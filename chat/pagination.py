@@ -0,0 +1,102 @@
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class MessageHistoryPagination(BasePagination):
+    """
+    Keyset pagination over a room's messages on (created_at, id).
+
+    Without a cursor the newest page is returned. ``before=<message id>``
+    loads the page of older messages and ``after=<message id>`` the newer
+    ones. Pages are always in chronological order, and every page is an
+    index range scan however long the thread is.
+    """
+    page_size = 50
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    before_query_param = 'before'
+    after_query_param = 'after'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        before = self._get_anchor(queryset, self.before_query_param)
+        after = self._get_anchor(queryset, self.after_query_param)
+
+        if after is not None:
+            queryset = queryset.filter(
+                Q(created_at__gt=after['created_at']) | Q(created_at=after['created_at'], id__gt=after['id'])
+            ).order_by('created_at', 'id')
+            results = list(queryset[:self.page_size + 1])
+            self.has_newer, self.has_older = len(results) > self.page_size, True
+            self.page = results[:self.page_size]
+            return self.page
+
+        if before is not None:
+            queryset = queryset.filter(
+                Q(created_at__lt=before['created_at']) | Q(created_at=before['created_at'], id__lt=before['id'])
+            )
+        results = list(queryset.order_by('-created_at', '-id')[:self.page_size + 1])
+        self.has_older, self.has_newer = len(results) > self.page_size, before is not None
+        self.page = results[:self.page_size][::-1]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_paginated_response(self, data):
+        return Response({
+            'previous': self.get_previous_link(),
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_previous_link(self):
+        """
+        Link to the older messages, or None at the start of the thread.
+        """
+        if not self.has_older or not self.page:
+            return None
+        return self._link(self.before_query_param, self.page[0].id, self.after_query_param)
+
+    def get_next_link(self):
+        """
+        Link to the newer messages. At the newest page clients poll with ``after`` themselves.
+        """
+        if not self.has_newer or not self.page:
+            return None
+        return self._link(self.after_query_param, self.page[-1].id, self.before_query_param)
+
+    def _link(self, param, message_id, other_param):
+        url = remove_query_param(self.request.build_absolute_uri(), other_param)
+        return replace_query_param(url, param, message_id)
+
+    def _get_anchor(self, queryset, param):
+        message_id = self.request.query_params.get(param)
+        if message_id is None:
+            return None
+        try:
+            return queryset.values('id', 'created_at').get(pk=int(message_id))
+        except (ValueError, queryset.model.DoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
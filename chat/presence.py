@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+ONLINE_KEY = 'chat:presence:{}'
+LAST_SEEN_KEY = 'chat:last-seen:{}'
+
+
+def presence_ttl():
+    """
+    Seconds a user stays online without a heartbeat from any of their sockets.
+    """
+    return getattr(settings, 'CHAT_PRESENCE_TTL', 60)
+
+
+async def user_connected(user_id):
+    """
+    Count a new socket for a user.
+
+    Returns:
+        Whether this made the user come online
+    """
+    key, ttl = ONLINE_KEY.format(user_id), presence_ttl()
+    if await cache.aadd(key, 1, ttl):
+        return True
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        # Expired between the add and the increment
+        await cache.aset(key, 1, ttl)
+        return True
+    await cache.atouch(key, ttl)
+    return False
+
+
+async def user_disconnected(user_id):
+    """
+    Release a socket of a user and record when they were last seen.
+
+    Returns:
+        Whether this was the user's last socket
+    """
+    key = ONLINE_KEY.format(user_id)
+    await cache.aset(LAST_SEEN_KEY.format(user_id), timezone.now(), None)
+    try:
+        count = await cache.adecr(key)
+    except ValueError:
+        return True
+    if count <= 0:
+        await cache.adelete(key)
+        return True
+    return False
+
+
+async def heartbeat(user_id):
+    """
+    Keep a user online for another TTL. Sockets that die without
+    disconnecting stop heartbeating, so their count lapses with the TTL.
+    """
+    key, ttl = ONLINE_KEY.format(user_id), presence_ttl()
+    if not await cache.atouch(key, ttl):
+        await cache.aadd(key, 1, ttl)
+
+
+def get_presence(user_ids):
+    """
+    Online state and last-seen time of many users, in one cache round trip.
+
+    Returns:
+        ``{user_id: {'online': bool, 'last_seen': datetime or None}}``
+    """
+    user_ids = list(user_ids)
+    values = cache.get_many(
+        [ONLINE_KEY.format(user_id) for user_id in user_ids] +
+        [LAST_SEEN_KEY.format(user_id) for user_id in user_ids]
+    )
+    return {
+        user_id: {
+            'online': values.get(ONLINE_KEY.format(user_id), 0) > 0,
+            'last_seen': values.get(LAST_SEEN_KEY.format(user_id)),
+        }
+        for user_id in user_ids
+    }
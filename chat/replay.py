@@ -0,0 +1,110 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from config.cache import is_cache_shared
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+RECENT_KEY = 'chat:recent:{}'
+LOCK_KEY = 'chat:recent:{}:lock'
+DROPPED_KEY = 'chat:recent:{}:dropped'
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 20
+LOCK_WAIT = 0.005
+# Outlives any lock, so a writer holding one when the buffer was dropped still sees it
+DROPPED_TIMEOUT = LOCK_TIMEOUT * 2
+
+
+def message_payload(message, sender_name):
+    """
+    A stored message as it is broadcast to chat sockets.
+    """
+    return {
+        'id': message.id,
+        'content': message.content,
+        'sender': {'id': message.sender_id, 'full_name': sender_name},
+        'created_at': message.created_at.isoformat(),
+        'is_read': False
+    }
+
+
+def remember_messages(chat_room_id, payloads):
+    """
+    Append messages to the room's ring buffer of the newest
+    ``CHAT_REPLAY_BUFFER_SIZE`` messages.
+
+    The buffer always holds every message of the room from its oldest entry
+    on. Appends are serialized with a short cache lock; if it cannot be taken
+    the buffer is dropped and marked as dropped for ``DROPPED_TIMEOUT``, so
+    readers fall back to the database instead of missing a message. While
+    the mark stands no writer rebuilds the buffer, including the one that
+    held the lock with a copy read before the drop.
+
+    Without a shared cache nothing is buffered: a process would only see
+    the messages sent through it.
+    """
+    if not is_cache_shared():
+        return
+    key, lock, dropped = RECENT_KEY.format(chat_room_id), LOCK_KEY.format(chat_room_id), DROPPED_KEY.format(chat_room_id)
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock, 1, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_WAIT)
+    else:
+        logger.warning(f"Replay buffer of room {chat_room_id} is busy, dropping it")
+        cache.set(dropped, 1, DROPPED_TIMEOUT)
+        cache.delete(key)
+        return
+
+    try:
+        if cache.get(dropped) is None:
+            buffer = cache.get(key) or []
+            buffer.extend(payloads)
+            # Concurrent senders can commit in one order and append in the other
+            buffer.sort(key=lambda payload: payload['id'])
+            del buffer[:-getattr(settings, 'CHAT_REPLAY_BUFFER_SIZE', 100)]
+            cache.set(key, buffer, getattr(settings, 'CHAT_REPLAY_BUFFER_TTL', 60 * 60 * 24))
+        # Checked again after writing: a drop while this writer held the lock must stick
+        if cache.get(dropped) is not None:
+            cache.delete(key)
+    finally:
+        cache.delete(lock)
+
+
+def get_missed_messages(chat_room_id, since):
+    """
+    Messages of a room newer than the message ``since``, oldest first and at
+    most ``CHAT_REPLAY_MAX_MESSAGES`` of them. Served from the ring buffer
+    when it reaches back to ``since`` and the cache is shared, otherwise by
+    a range scan over the message history index.
+
+    Returns:
+        The message payloads and whether more messages are left
+    """
+    limit = getattr(settings, 'CHAT_REPLAY_MAX_MESSAGES', 200)
+
+    buffer = None
+    if is_cache_shared():
+        key, dropped = RECENT_KEY.format(chat_room_id), DROPPED_KEY.format(chat_room_id)
+        cached = cache.get_many([key, dropped])
+        buffer = None if dropped in cached else cached.get(key)
+    if buffer and buffer[0]['id'] <= since:
+        missed = [payload for payload in buffer if payload['id'] > since]
+        return missed[:limit], len(missed) > limit
+
+    messages = Message.objects.filter(chat_room_id=chat_room_id).select_related('sender')
+    anchor = messages.filter(pk=since).values('created_at').first()
+    if anchor is None:
+        messages = messages.filter(id__gt=since)
+    else:
+        messages = messages.filter(
+            Q(created_at__gt=anchor['created_at']) | Q(created_at=anchor['created_at'], id__gt=since)
+        )
+    messages = list(messages.order_by('created_at', 'id')[:limit + 1])
+    return [message_payload(message, message.sender.full_name) for message in messages[:limit]], len(messages) > limit
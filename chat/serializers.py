@@ -5,11 +5,18 @@ from users.serializers import UserProfileSerializer
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserProfileSerializer(read_only=True)
+    is_read = serializers.SerializerMethodField()
     
     class Meta:
         model = Message
         fields = ['id', 'sender', 'content', 'created_at', 'is_read']
-        read_only_fields = ['is_read']
+
+    def get_is_read(self, obj):
+        # Pass the room's 'read_watermarks' in the context to avoid a query per message
+        watermarks = self.context.get('read_watermarks')
+        if watermarks is None:
+            return obj.is_read
+        return obj.read_by(watermarks)
 
 class ChatRoomMemberSerializer(serializers.ModelSerializer):
     user = UserProfileSerializer(read_only=True)
@@ -28,23 +35,19 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         fields = ['id', 'room_type', 'created_at', 'members', 'last_message', 'unread_count', 'property']
     
     def get_last_message(self, obj):
-        last_message = obj.messages.last()
-        if last_message:
-            return MessageSerializer(last_message).data
+        # Denormalized pointer; select_related('last_message__sender') keeps it join-only
+        if obj.last_message:
+            watermarks = {member.user_id: member.last_read_message_id for member in obj.members.all()}
+            return MessageSerializer(obj.last_message, context={'read_watermarks': watermarks}).data
         return None
     
     def get_unread_count(self, obj):
+        # Read from the (prefetched) members so the inbox needs no per-room query
         user = self.context['request'].user
-        last_read = ChatRoomMember.objects.filter(
-            chat_room=obj, 
-            user=user
-        ).first()
-        
-        if last_read and last_read.last_read:
-            return obj.messages.filter(
-                created_at__gt=last_read.last_read
-            ).exclude(sender=user).count()
-        return obj.messages.exclude(sender=user).count()
+        for member in obj.members.all():
+            if member.user_id == user.id:
+                return member.unread_count
+        return 0
 
 class PropertyInquirySerializer(serializers.ModelSerializer):
     inquirer = UserProfileSerializer(read_only=True)
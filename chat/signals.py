@@ -0,0 +1,47 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .middleware import user_cache
+from .models import ChatRoomMember
+
+logger = logging.getLogger(__name__)
+
+def _publish_membership_change(chat_room_id, user_id, action):
+    """
+    Tell the room's open sockets that a member joined or left, once the change is committed.
+    """
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(f'chat_{chat_room_id}', {
+                'type': 'membership_changed',
+                'room_id': chat_room_id,
+                'user_id': user_id,
+                'action': action,
+            })
+        except Exception as e:
+            logger.error(f"Failed to publish membership change for room {chat_room_id}: {str(e)}")
+
+    transaction.on_commit(send)
+
+@receiver(post_save, sender=ChatRoomMember)
+def handle_member_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _publish_membership_change(instance.chat_room_id, instance.user_id, 'added')
+
+@receiver(post_delete, sender=ChatRoomMember)
+def handle_member_removed(sender, instance, **kwargs):
+    _publish_membership_change(instance.chat_room_id, instance.user_id, 'removed')
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_cached_user(sender, instance, **kwargs):
+    # Sockets opened after this see the new state, e.g. a deactivated account
+    user_cache.evict(instance.pk)
@@ -0,0 +1,333 @@
+import inspect
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from users.models import User
+from .batching import message_batcher
+from .consumers import ChatConsumer
+from .models import ChatRoom, ChatRoomMember, Message
+from .routing import websocket_urlpatterns
+from .unread import post_message
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class ScopeUserMiddleware:
+    """
+    Stands in for the token middleware, authenticating the socket as a fixed user.
+    """
+
+    def __init__(self, app, user):
+        self.app = app
+        self.user = user
+
+    async def __call__(self, scope, receive, send):
+        return await self.app(dict(scope, user=self.user), receive, send)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class ChatConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(
+                email=f'{name}@example.com',
+                username=name,
+                full_name=name.title(),
+                phone_number=f'+23412345678{i:02d}',
+                is_active=True,
+            )
+            for i, name in enumerate(['alice', 'bob', 'carol'])
+        ]
+        self.chat_room = ChatRoom.objects.create(room_type='DIRECT')
+        for user in [self.alice, self.bob]:
+            ChatRoomMember.objects.create(chat_room=self.chat_room, user=user)
+        cache.clear()
+
+    def _communicator(self, user):
+        application = ScopeUserMiddleware(URLRouter(websocket_urlpatterns), user)
+        return WebsocketCommunicator(application, f'ws/chat/{self.chat_room.id}/')
+
+    async def test_non_member_is_rejected(self):
+        communicator = self._communicator(self.carol)
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertFalse(await database_sync_to_async(
+            ChatRoomMember.objects.filter(chat_room=self.chat_room, user=self.carol).exists
+        )())
+
+    async def test_member_message_is_broadcast(self):
+        communicator = self._communicator(self.alice)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        await communicator.send_json_to({'message': 'Hello'})
+        response = await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        self.assertEqual(response['message']['content'], 'Hello')
+        self.assertEqual(response['message']['sender'], {'id': self.alice.id, 'full_name': 'Alice'})
+        bob_member = await database_sync_to_async(ChatRoomMember.objects.get)(chat_room=self.chat_room, user=self.bob)
+        self.assertEqual(bob_member.unread_count, 1)
+
+    def test_save_message_only_writes(self):
+        consumer = ChatConsumer()
+        consumer.user = self.alice
+        save_message = inspect.getattr_static(ChatConsumer, 'save_message').func
+
+        with CaptureQueriesContext(connection) as queries:
+            message = save_message(consumer, self.chat_room.id, 'Hello')
+
+        self.assertEqual(Message.objects.get().id, message['id'])
+        statements = [query['sql'].split()[0].upper() for query in queries.captured_queries]
+        self.assertNotIn('SELECT', statements)
+        self.assertEqual(statements.count('INSERT'), 1)
+
+    async def test_removed_member_is_disconnected(self):
+        communicator = self._communicator(self.bob)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        await database_sync_to_async(
+            ChatRoomMember.objects.filter(chat_room=self.chat_room, user=self.bob).delete
+        )()
+
+        output = await communicator.receive_output()
+        self.assertEqual(output['type'], 'websocket.close')
+        await communicator.disconnect()
+
+    @override_settings(CHAT_WRITE_COALESCING=True, CHAT_WRITE_BATCH_SIZE=3, CHAT_WRITE_BATCH_INTERVAL=5)
+    async def test_coalesced_messages_are_broadcast_then_stored_in_order(self):
+        alice, bob = self._communicator(self.alice), self._communicator(self.bob)
+        for communicator in [alice, bob]:
+            await communicator.connect()
+            await communicator.receive_json_from()
+
+        for i in range(3):
+            await alice.send_json_to({'message': f'Message {i}', 'client_id': f'c{i}'})
+        provisional = [(await bob.receive_json_from())['message'] for _ in range(3)]
+        self.assertEqual([message['client_id'] for message in provisional], ['c0', 'c1', 'c2'])
+        self.assertEqual({message['id'] for message in provisional}, {None})
+
+        # The third message filled the batch, so it is written without waiting for the interval
+        persisted = (await bob.receive_json_from(timeout=5))['messages']
+        for communicator in [alice, bob]:
+            await communicator.disconnect()
+
+        stored = await database_sync_to_async(
+            lambda: list(Message.objects.order_by('id').values_list('id', 'content'))
+        )()
+        self.assertEqual([message['client_id'] for message in persisted], ['c0', 'c1', 'c2'])
+        self.assertEqual([message['id'] for message in persisted], [id for id, _ in stored])
+        self.assertEqual([content for _, content in stored], ['Message 0', 'Message 1', 'Message 2'])
+        bob_member = await database_sync_to_async(ChatRoomMember.objects.get)(chat_room=self.chat_room, user=self.bob)
+        self.assertEqual(bob_member.unread_count, 3)
+
+    @override_settings(CHAT_WRITE_COALESCING=True, CHAT_WRITE_BATCH_INTERVAL=5)
+    async def test_flush_writes_a_partial_batch(self):
+        communicator = self._communicator(self.alice)
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        await communicator.send_json_to({'message': 'Hello'})
+        client_id = (await communicator.receive_json_from())['message']['client_id']
+        await message_batcher.flush()
+
+        persisted = (await communicator.receive_json_from())['messages']
+        await communicator.disconnect()
+        self.assertEqual(persisted[0]['client_id'], client_id)
+        self.assertEqual(await database_sync_to_async(Message.objects.count)(), 1)
+
+    async def test_typing_is_relayed_and_rate_limited(self):
+        alice, bob = self._communicator(self.alice), self._communicator(self.bob)
+        for communicator in [alice, bob]:
+            await communicator.connect()
+            await communicator.receive_json_from()
+        # Bob coming online is announced to Alice
+        self.assertEqual((await alice.receive_json_from())['user_id'], self.bob.id)
+
+        for is_typing in [True, True, True, False]:
+            await alice.send_json_to({'type': 'typing', 'is_typing': is_typing})
+        events = [await bob.receive_json_from() for _ in range(2)]
+        self.assertTrue(await bob.receive_nothing())
+        self.assertTrue(await alice.receive_nothing())
+        for communicator in [alice, bob]:
+            await communicator.disconnect()
+
+        self.assertEqual([(event['type'], event['is_typing']) for event in events], [('typing', True), ('typing', False)])
+        self.assertEqual(await database_sync_to_async(Message.objects.count)(), 0)
+
+    async def test_presence_follows_the_last_socket(self):
+        alice = self._communicator(self.alice)
+        await alice.connect()
+        await alice.receive_json_from()
+
+        bob_sockets = [self._communicator(self.bob) for _ in range(2)]
+        for communicator in bob_sockets:
+            await communicator.connect()
+            await communicator.receive_json_from()
+        online = await alice.receive_json_from()
+        self.assertEqual((online['type'], online['online']), ('presence', True))
+
+        await bob_sockets[0].disconnect()
+        self.assertTrue(await alice.receive_nothing())
+        await bob_sockets[1].disconnect()
+        offline = await alice.receive_json_from()
+        await alice.disconnect()
+
+        self.assertEqual((offline['user_id'], offline['online']), (self.bob.id, False))
+        self.assertIsNotNone(offline['last_seen'])
+
+    async def test_reconnect_replays_missed_messages(self):
+        alice = self._communicator(self.alice)
+        await alice.connect()
+        await alice.receive_json_from()
+        for i in range(3):
+            await alice.send_json_to({'message': f'Message {i}'})
+        ids = [(await alice.receive_json_from())['message']['id'] for _ in range(3)]
+        await alice.disconnect()
+
+        bob = WebsocketCommunicator(
+            ScopeUserMiddleware(URLRouter(websocket_urlpatterns), self.bob), f'ws/chat/{self.chat_room.id}/?since={ids[0]}'
+        )
+        await bob.connect()
+        await bob.receive_json_from()
+        replay = await bob.receive_json_from()
+        await bob.disconnect()
+
+        self.assertEqual(replay['type'], 'replay')
+        self.assertEqual([message['id'] for message in replay['messages']], ids[1:])
+        self.assertFalse(replay['has_more'])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class StreamConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(
+                email=f'{name}@example.com',
+                username=name,
+                full_name=name.title(),
+                phone_number=f'+23412345678{i:02d}',
+                is_active=True,
+            )
+            for i, name in enumerate(['alice', 'bob', 'carol'])
+        ]
+        self.rooms = [ChatRoom.objects.create(room_type='DIRECT') for _ in range(2)]
+        for room in self.rooms:
+            for user in [self.alice, self.bob]:
+                ChatRoomMember.objects.create(chat_room=room, user=user)
+        self.foreign_room = ChatRoom.objects.create(room_type='DIRECT')
+        ChatRoomMember.objects.create(chat_room=self.foreign_room, user=self.carol)
+        cache.clear()
+
+    async def _stream(self, user, rooms, notifications=False, since=None):
+        communicator = WebsocketCommunicator(ScopeUserMiddleware(URLRouter(websocket_urlpatterns), user), 'ws/stream/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+        await communicator.send_json_to({
+            'action': 'subscribe', 'rooms': rooms, 'notifications': notifications, 'since': since
+        })
+        return communicator, await communicator.receive_json_from()
+
+    async def test_anonymous_is_rejected(self):
+        communicator = WebsocketCommunicator(
+            ScopeUserMiddleware(URLRouter(websocket_urlpatterns), AnonymousUser()), 'ws/stream/'
+        )
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_subscribe_checks_membership(self):
+        room_ids = [room.id for room in self.rooms]
+        stream, subscribed = await self._stream(self.alice, room_ids + [self.foreign_room.id])
+        await stream.disconnect()
+
+        self.assertEqual(subscribed['rooms'], sorted(room_ids))
+        self.assertEqual(subscribed['rejected'], [self.foreign_room.id])
+
+    async def test_one_socket_carries_many_rooms(self):
+        stream, _ = await self._stream(self.alice, [room.id for room in self.rooms])
+
+        for room in self.rooms:
+            bob = WebsocketCommunicator(
+                ScopeUserMiddleware(URLRouter(websocket_urlpatterns), self.bob), f'ws/chat/{room.id}/'
+            )
+            await bob.connect()
+            await bob.receive_json_from()
+            await bob.send_json_to({'message': f'Hello from {room.id}'})
+            await bob.receive_json_from()
+            await bob.disconnect()
+
+        frames = []
+        while not await stream.receive_nothing():
+            frames.append(await stream.receive_json_from())
+        await stream.disconnect()
+
+        messages = [frame for frame in frames if frame['type'] == 'message']
+        self.assertEqual(
+            [(frame['room'], frame['message']['content']) for frame in messages],
+            [(room.id, f'Hello from {room.id}') for room in self.rooms]
+        )
+
+    async def test_send_requires_subscription(self):
+        stream, _ = await self._stream(self.alice, [self.rooms[0].id])
+
+        await stream.send_json_to({'action': 'send', 'room': self.rooms[1].id, 'message': 'Hi'})
+        self.assertEqual((await stream.receive_json_from())['error'], 'Not subscribed')
+
+        await stream.send_json_to({'action': 'send', 'room': self.rooms[0].id, 'message': 'Hi'})
+        frame = await stream.receive_json_from()
+        await stream.disconnect()
+
+        self.assertEqual((frame['type'], frame['room'], frame['message']['content']), ('message', self.rooms[0].id, 'Hi'))
+        bob_member = await database_sync_to_async(ChatRoomMember.objects.get)(chat_room=self.rooms[0], user=self.bob)
+        self.assertEqual(bob_member.unread_count, 1)
+
+    async def test_notifications_share_the_socket(self):
+        stream, subscribed = await self._stream(self.alice, [], notifications=True)
+        self.assertTrue(subscribed['notifications'])
+
+        await get_channel_layer().group_send(
+            f'user_{self.alice.id}_notifications', {'type': 'notification_message', 'data': {'title': 'New inquiry'}}
+        )
+        frame = await stream.receive_json_from()
+        await stream.disconnect()
+        self.assertEqual(frame, {'type': 'notification', 'data': {'title': 'New inquiry'}})
+
+    async def test_removed_member_is_unsubscribed(self):
+        stream, _ = await self._stream(self.alice, [room.id for room in self.rooms])
+
+        await database_sync_to_async(
+            ChatRoomMember.objects.filter(chat_room=self.rooms[0], user=self.alice).delete
+        )()
+        frame = await stream.receive_json_from()
+        await stream.send_json_to({'action': 'send', 'room': self.rooms[0].id, 'message': 'Hi'})
+        error = await stream.receive_json_from()
+        await stream.disconnect()
+
+        self.assertEqual((frame['type'], frame['rooms'], frame['reason']), ('unsubscribed', [self.rooms[0].id], 'removed'))
+        self.assertEqual(error['error'], 'Not subscribed')
+
+    async def test_subscribe_replays_missed_messages(self):
+        message_ids = []
+        for room in self.rooms:
+            message = await database_sync_to_async(post_message)(room.id, self.bob, f'Missed in {room.id}')
+            message_ids.append(message.id)
+
+        stream, _ = await self._stream(
+            self.alice, [room.id for room in self.rooms], since={str(self.rooms[0].id): message_ids[0] - 1}
+        )
+        replay = await stream.receive_json_from()
+        self.assertTrue(await stream.receive_nothing())
+        await stream.disconnect()
+
+        self.assertEqual((replay['type'], replay['room']), ('replay', self.rooms[0].id))
+        self.assertEqual([message['id'] for message in replay['messages']], [message_ids[0]])
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from users.models import User
+from .models import ChatRoom, ChatRoomMember, Message
+
+
+class MessageHistoryTests(APITestCase):
+    def setUp(self):
+        self.alice, self.bob = [
+            User.objects.create_user(
+                email=f'{name}@example.com',
+                username=name,
+                full_name=name.title(),
+                phone_number=f'+23412345678{i:02d}',
+                is_active=True,
+            )
+            for i, name in enumerate(['alice', 'bob'])
+        ]
+        self.chat_room = ChatRoom.objects.create(room_type='DIRECT')
+        for user in [self.alice, self.bob]:
+            ChatRoomMember.objects.create(chat_room=self.chat_room, user=user)
+
+        start = timezone.now() - timedelta(days=1)
+        Message.objects.bulk_create([
+            Message(chat_room=self.chat_room, sender=self.alice if i % 2 else self.bob, content=f'Message {i}')
+            for i in range(120)
+        ])
+        # Pairs of messages share a timestamp to exercise the id tie-breaker
+        for i, message in enumerate(Message.objects.order_by('id')):
+            Message.objects.filter(pk=message.pk).update(created_at=start + timedelta(minutes=i // 2))
+        self.ids = list(Message.objects.order_by('created_at', 'id').values_list('id', flat=True))
+
+        self.url = reverse('chatroom-messages', args=[self.chat_room.id])
+        self.client.force_authenticate(self.alice)
+
+    def _ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [message['id'] for message in response.data['results']]
+
+    def test_newest_page_by_default(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(self._ids(response), self.ids[-50:])
+        self.assertIsNone(response.data['next'])
+        self.assertIn(f'before={self.ids[-50]}', response.data['previous'])
+
+    def test_load_older_until_start(self):
+        ids, url = [], self.url
+        while url:
+            response = self.client.get(url)
+            ids = self._ids(response) + ids
+            url = response.data['previous']
+
+        self.assertEqual(ids, self.ids)
+
+    def test_after_returns_newer_messages(self):
+        response = self.client.get(self.url, {'after': self.ids[9], 'limit': 20})
+
+        self.assertEqual(self._ids(response), self.ids[10:30])
+        self.assertIn(f'after={self.ids[29]}', response.data['next'])
+        self.assertNotIn('before=', response.data['next'])
+
+    def test_page_cost_is_constant(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'before': self.ids[60]})
+        # Membership-scoped room lookup, cursor anchor, page with senders, read watermarks
+        self.assertEqual(len(queries), 4)
+
+    def test_invalid_or_foreign_cursor(self):
+        other_room = ChatRoom.objects.create(room_type='DIRECT')
+        foreign = Message.objects.create(chat_room=other_room, sender=self.bob, content='Elsewhere')
+
+        self.assertEqual(self.client.get(self.url, {'before': 'abc'}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'after': foreign.id}).status_code, 404)
@@ -0,0 +1,55 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+from .middleware import TokenAuthMiddleware, user_cache
+
+
+class TokenAuthMiddlewareTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email='alice@example.com',
+            username='alice',
+            full_name='Alice',
+            phone_number='+2341234567800',
+            is_active=True,
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def _connect(self, query_string):
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope)
+
+        async_to_sync(TokenAuthMiddleware(app))({'type': 'websocket', 'query_string': query_string.encode()}, None, None)
+        return scopes[0]['user']
+
+    def test_valid_token(self):
+        self.assertEqual(self._connect(f'token={self.token}'), self.user)
+
+    def test_missing_or_invalid_token(self):
+        self.assertIsInstance(self._connect(''), AnonymousUser)
+        self.assertIsInstance(self._connect('token=not-a-jwt'), AnonymousUser)
+
+    def test_reconnect_is_served_from_cache(self):
+        self._connect(f'token={self.token}')
+        with self.assertNumQueries(0):
+            self.assertEqual(self._connect(f'token={self.token}/').id, self.user.id)
+
+    def test_saving_the_user_evicts_it(self):
+        self._connect(f'token={self.token}')
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            self.assertIsInstance(self._connect(f'token={self.token}'), AnonymousUser)
+
+    def test_cache_entries_expire(self):
+        self._connect(f'token={self.token}')
+        with self.settings(WS_AUTH_USER_CACHE_TTL=0):
+            user_cache.set(self.user.id, None, self.user)
+            with self.assertNumQueries(1):
+                self._connect(f'token={self.token}')
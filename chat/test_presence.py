@@ -0,0 +1,101 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from users.models import User
+from .checks import check_presence_cache
+from .models import ChatRoom, ChatRoomMember
+from .presence import ONLINE_KEY, get_presence, heartbeat, user_connected, user_disconnected
+
+
+class PresenceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_refcount_spans_sockets(self):
+        self.assertTrue(async_to_sync(user_connected)(1))
+        self.assertFalse(async_to_sync(user_connected)(1))
+
+        self.assertFalse(async_to_sync(user_disconnected)(1))
+        self.assertTrue(get_presence([1])[1]['online'])
+        self.assertTrue(async_to_sync(user_disconnected)(1))
+
+        state = get_presence([1])[1]
+        self.assertFalse(state['online'])
+        self.assertIsNotNone(state['last_seen'])
+
+    def test_expired_user_comes_back_on_heartbeat(self):
+        async_to_sync(user_connected)(1)
+        cache.delete(ONLINE_KEY.format(1))
+        self.assertFalse(get_presence([1])[1]['online'])
+
+        async_to_sync(heartbeat)(1)
+        self.assertTrue(get_presence([1])[1]['online'])
+
+    def test_unknown_users_are_offline(self):
+        self.assertEqual(get_presence([7, 8]), {
+            7: {'online': False, 'last_seen': None},
+            8: {'online': False, 'last_seen': None},
+        })
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual(check_presence_cache(None), [])
+        with override_settings(SHARED_CACHE=False):
+            self.assertEqual([warning.id for warning in check_presence_cache(None)], ['chat.W001'])
+
+
+class PresenceEndpointTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(
+                email=f'user{i}@example.com',
+                username=f'user{i}',
+                full_name=f'User {i}',
+                phone_number=f'+23412345678{i:02d}',
+                is_active=True,
+            )
+            for i in range(4)
+        ]
+        self.me = self.users[0]
+        self.rooms = []
+        for other in self.users[1:]:
+            room = ChatRoom.objects.create(room_type='DIRECT')
+            ChatRoomMember.objects.bulk_create([
+                ChatRoomMember(chat_room=room, user=self.me),
+                ChatRoomMember(chat_room=room, user=other),
+            ])
+            self.rooms.append(room)
+        async_to_sync(user_connected)(self.users[1].id)
+        self.url = reverse('chatroom-presence')
+        self.client.force_authenticate(self.me)
+
+    def test_presence_of_all_rooms_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['rooms'], {room.id: [user.id] for room, user in zip(self.rooms, self.users[1:])})
+        self.assertEqual(
+            {user_id: state['online'] for user_id, state in response.data['users'].items()},
+            {self.users[1].id: True, self.users[2].id: False, self.users[3].id: False}
+        )
+
+    def test_presence_of_selected_rooms(self):
+        response = self.client.get(self.url, {'rooms': f'{self.rooms[0].id},{self.rooms[1].id}'})
+        self.assertEqual(set(response.data['rooms']), {self.rooms[0].id, self.rooms[1].id})
+
+    def test_other_peoples_rooms_are_hidden(self):
+        room = ChatRoom.objects.create(room_type='DIRECT')
+        ChatRoomMember.objects.create(chat_room=room, user=self.users[1])
+        response = self.client.get(self.url, {'rooms': str(room.id)})
+        self.assertEqual(response.data['rooms'], {})
+
+    def test_invalid_room_ids(self):
+        self.assertEqual(self.client.get(self.url, {'rooms': 'abc'}).status_code, 400)
+        with self.settings(CHAT_PRESENCE_MAX_ROOMS=1):
+            response = self.client.get(self.url, {'rooms': f'{self.rooms[0].id},{self.rooms[1].id}'})
+        self.assertEqual(response.status_code, 400)
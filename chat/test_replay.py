@@ -0,0 +1,123 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from users.models import User
+from .models import ChatRoom, ChatRoomMember, Message
+from . import replay
+from .replay import LOCK_KEY, RECENT_KEY, get_missed_messages, message_payload, remember_messages
+from .unread import post_message, post_messages
+
+
+class ReplayTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob = [
+            User.objects.create_user(
+                email=f'{name}@example.com',
+                username=name,
+                full_name=name.title(),
+                phone_number=f'+23412345678{i:02d}',
+                is_active=True,
+            )
+            for i, name in enumerate(['alice', 'bob'])
+        ]
+        self.chat_room = ChatRoom.objects.create(room_type='DIRECT')
+        for user in [self.alice, self.bob]:
+            ChatRoomMember.objects.create(chat_room=self.chat_room, user=user)
+
+    def _post(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [post_message(self.chat_room.id, self.alice, f'Message {i}').id for i in range(count)]
+
+    def test_delta_is_served_from_the_buffer(self):
+        ids = self._post(10)
+
+        with self.assertNumQueries(0):
+            messages, has_more = get_missed_messages(self.chat_room.id, ids[6])
+
+        self.assertEqual([message['id'] for message in messages], ids[7:])
+        self.assertEqual(messages[0]['sender'], {'id': self.alice.id, 'full_name': 'Alice'})
+        self.assertFalse(has_more)
+
+    def test_up_to_date_client_gets_nothing(self):
+        ids = self._post(3)
+        self.assertEqual(get_missed_messages(self.chat_room.id, ids[-1]), ([], False))
+
+    def test_falls_back_to_the_database_past_the_buffer(self):
+        with self.settings(CHAT_REPLAY_BUFFER_SIZE=3):
+            ids = self._post(10)
+        self.assertEqual(len(cache.get(RECENT_KEY.format(self.chat_room.id))), 3)
+
+        with self.assertNumQueries(2):
+            messages, _ = get_missed_messages(self.chat_room.id, ids[2])
+        self.assertEqual([message['id'] for message in messages], ids[3:])
+
+    def test_database_and_buffer_agree(self):
+        ids = self._post(5)
+        from_buffer = get_missed_messages(self.chat_room.id, ids[1])
+        cache.clear()
+        self.assertEqual(get_missed_messages(self.chat_room.id, ids[1]), from_buffer)
+
+    def test_replay_is_capped(self):
+        ids = self._post(5)
+        with self.settings(CHAT_REPLAY_MAX_MESSAGES=2):
+            messages, has_more = get_missed_messages(self.chat_room.id, ids[0])
+            self.assertEqual([message['id'] for message in messages], ids[1:3])
+            self.assertTrue(has_more)
+
+            cache.clear()
+            self.assertEqual(get_missed_messages(self.chat_room.id, ids[0]), (messages, True))
+
+    def test_batched_messages_join_the_buffer(self):
+        first = self._post(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            post_messages([
+                Message(chat_room=self.chat_room, sender=sender, content=f'Batched {i}')
+                for i, sender in enumerate([self.bob, self.alice])
+            ])
+
+        messages, _ = get_missed_messages(self.chat_room.id, first)
+        self.assertEqual(
+            [(message['content'], message['sender']['full_name']) for message in messages],
+            [('Batched 0', 'Bob'), ('Batched 1', 'Alice')]
+        )
+
+    def test_buffer_dropped_while_another_writer_holds_the_lock_stays_dropped(self):
+        first = self._post(1)[0]
+        second, third = [
+            Message.objects.create(chat_room=self.chat_room, sender=self.alice, content=f'Message {i}')
+            for i in (2, 3)
+        ]
+        key = RECENT_KEY.format(self.chat_room.id)
+        cache_set = cache.set
+
+        def set_after_a_timed_out_writer(cache_key, *args, **kwargs):
+            # The lock holder has read the buffer; a writer that cannot take the lock drops it now
+            if cache_key == key:
+                with mock.patch.object(replay, 'LOCK_ATTEMPTS', 1), mock.patch.object(replay, 'LOCK_WAIT', 0):
+                    remember_messages(self.chat_room.id, [message_payload(second, 'Alice')])
+            return cache_set(cache_key, *args, **kwargs)
+
+        with mock.patch.object(cache, 'set', side_effect=set_after_a_timed_out_writer):
+            remember_messages(self.chat_room.id, [message_payload(third, 'Alice')])
+
+        self.assertIsNone(cache.get(key))
+        self.assertIsNone(cache.get(LOCK_KEY.format(self.chat_room.id)))
+        messages, _ = get_missed_messages(self.chat_room.id, first)
+        self.assertEqual([message['id'] for message in messages], [second.id, third.id])
+
+        # Later writers do not rebuild a buffer with the gap either
+        self._post(1)
+        self.assertIsNone(cache.get(key))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_process_local_cache_is_bypassed(self):
+        ids = self._post(3)
+        self.assertIsNone(cache.get(RECENT_KEY.format(self.chat_room.id)))
+
+        # A buffer another process could not keep whole, missing the middle message
+        gappy = [payload for payload in get_missed_messages(self.chat_room.id, 0)[0] if payload['id'] != ids[1]]
+        cache.set(RECENT_KEY.format(self.chat_room.id), gappy)
+
+        messages, _ = get_missed_messages(self.chat_room.id, ids[0])
+        self.assertEqual([message['id'] for message in messages], ids[1:])
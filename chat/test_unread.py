@@ -0,0 +1,126 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from users.models import User
+from .models import ChatRoom, ChatRoomMember, Message
+from .serializers import MessageSerializer
+from .unread import mark_read, post_message, post_messages, read_watermarks
+
+
+class UnreadCounterTests(APITestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(
+                email=f'{name}@example.com',
+                username=name,
+                full_name=name.title(),
+                phone_number=f'+23412345678{i:02d}',
+                is_active=True,
+            )
+            for i, name in enumerate(['alice', 'bob', 'carol'])
+        ]
+        self.chat_room = ChatRoom.objects.create(room_type='DIRECT')
+        for user in [self.alice, self.bob, self.carol]:
+            ChatRoomMember.objects.create(chat_room=self.chat_room, user=user)
+
+    def _unread(self, user):
+        return ChatRoomMember.objects.get(chat_room=self.chat_room, user=user).unread_count
+
+    def test_post_message_counts_for_other_members(self):
+        post_message(self.chat_room.id, self.alice, 'Hi')
+        last = post_message(self.chat_room.id, self.alice, 'Anyone?')
+
+        self.assertEqual([self._unread(user) for user in [self.alice, self.bob, self.carol]], [0, 2, 2])
+        self.chat_room.refresh_from_db()
+        self.assertEqual(self.chat_room.last_message, last)
+
+    def test_post_messages_matches_post_message(self):
+        messages = post_messages([
+            Message(chat_room=self.chat_room, sender=sender, content=f'Message {i}')
+            for i, sender in enumerate([self.alice, self.bob, self.alice])
+        ])
+
+        self.assertEqual([message.content for message in messages], ['Message 0', 'Message 1', 'Message 2'])
+        self.assertEqual(sorted(message.id for message in messages), [message.id for message in messages])
+        self.assertEqual([self._unread(user) for user in [self.alice, self.bob, self.carol]], [1, 2, 3])
+        self.chat_room.refresh_from_db()
+        self.assertEqual(self.chat_room.last_message, messages[-1])
+
+    def test_mark_read_resets_counter(self):
+        post_message(self.chat_room.id, self.alice, 'Hi')
+
+        self.assertTrue(mark_read(self.chat_room.id, self.bob))
+        self.assertEqual(self._unread(self.bob), 0)
+        self.assertEqual(self._unread(self.carol), 1)
+        self.assertIsNotNone(ChatRoomMember.objects.get(chat_room=self.chat_room, user=self.bob).last_read)
+
+    def test_mark_read_moves_watermark(self):
+        first = post_message(self.chat_room.id, self.alice, 'Hi')
+        mark_read(self.chat_room.id, self.bob)
+        second = post_message(self.chat_room.id, self.alice, 'Still there?')
+
+        self.assertEqual(read_watermarks(self.chat_room.id), {self.alice.id: None, self.bob.id: first.id, self.carol.id: None})
+        self.assertFalse(second.is_read)
+        with self.assertNumQueries(1):
+            messages = list(Message.objects.with_read_state().order_by('id'))
+            self.assertEqual([message.is_read for message in messages], [True, False])
+
+    def test_is_read_ignores_the_senders_own_watermark(self):
+        message = post_message(self.chat_room.id, self.alice, 'Hi')
+        mark_read(self.chat_room.id, self.alice)
+
+        self.assertFalse(Message.objects.with_read_state().get(pk=message.pk).is_read)
+        self.assertFalse(MessageSerializer(message, context={'read_watermarks': read_watermarks(self.chat_room.id)}).data['is_read'])
+
+    def test_is_read_is_never_a_hidden_query(self):
+        post_message(self.chat_room.id, self.alice, 'Hi')
+
+        with self.assertRaises(AttributeError):
+            Message.objects.get().is_read
+
+        self.client.force_authenticate(self.alice)
+        url = reverse('chatroom-send-message', args=[self.chat_room.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'content': 'Hello'}, format='json')
+        self.assertFalse(response.data['is_read'])
+        self.assertFalse(any('"chat_chatroommember"."last_read_message_id" >=' in query['sql'] for query in queries))
+
+    def test_mark_read_is_a_single_write(self):
+        for i in range(20):
+            post_message(self.chat_room.id, self.alice, f'Message {i}')
+
+        with CaptureQueriesContext(connection) as queries:
+            mark_read(self.chat_room.id, self.bob)
+
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE "chat_chatroommember"'))
+
+    def test_only_a_page_reaching_the_newest_message_marks_read(self):
+        messages = post_messages([
+            Message(chat_room=self.chat_room, sender=self.alice, content=f'Message {i}') for i in range(5)
+        ])
+        url = reverse('chatroom-messages', args=[self.chat_room.id])
+        self.client.force_authenticate(self.bob)
+
+        for params in [{'before': messages[-1].id}, {'after': messages[0].id, 'limit': 2}]:
+            with self.subTest(params=params):
+                self.client.get(url, params)
+                self.assertEqual(self._unread(self.bob), 5)
+
+        self.client.get(url, {'after': messages[0].id})
+        self.assertEqual(self._unread(self.bob), 0)
+
+    def test_inbox_reflects_send_and_read(self):
+        self.client.force_authenticate(self.alice)
+        self.client.post(reverse('chatroom-send-message', args=[self.chat_room.id]), {'content': 'Hello'}, format='json')
+
+        self.client.force_authenticate(self.bob)
+        room = self.client.get(reverse('chatroom-list')).data[0]
+        self.assertEqual(room['unread_count'], 1)
+        self.assertEqual(room['last_message']['content'], 'Hello')
+
+        self.client.get(reverse('chatroom-messages', args=[self.chat_room.id]))
+        room = self.client.get(reverse('chatroom-list')).data[0]
+        self.assertEqual(room['unread_count'], 0)
+        self.assertTrue(room['last_message']['is_read'])
@@ -11,6 +11,7 @@ class ChatRoomModelTests(TestCase):
     def setUp(self):
         self.owner = User.objects.create_user(
             email="owner@example.com",
+            username="owner",
             password="testpass123",
             full_name="Property Owner",
             user_type="OWNER",
@@ -21,6 +22,7 @@ class ChatRoomModelTests(TestCase):
         
         self.buyer = User.objects.create_user(
             email="buyer@example.com",
+            username="buyer",
             password="testpass123",
             full_name="Property Buyer",
             user_type="BUYER",
@@ -63,6 +65,7 @@ class ChatAPITests(APITestCase):
         # Create test users
         self.owner = User.objects.create_user(
             email="owner@example.com",
+            username="owner",
             password="testpass123",
             full_name="Property Owner",
             user_type="OWNER",
@@ -73,6 +76,7 @@ class ChatAPITests(APITestCase):
         
         self.buyer = User.objects.create_user(
             email="buyer@example.com",
+            username="buyer",
             password="testpass123",
             full_name="Property Buyer",
             user_type="BUYER",
@@ -85,7 +89,12 @@ class ChatAPITests(APITestCase):
         self.property = Property.objects.create(
             owner=self.owner,
             title="Test Property",
-            # Add other required fields
+            description="A test property",
+            property_type="HOUSE",
+            listing_type="SALE",
+            price=250000,
+            size=150,
+            location="Lekki, Lagos",
         )
         
         # Login as buyer
@@ -0,0 +1,98 @@
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .models import ChatRoom, ChatRoomMember, Message
+from .replay import message_payload, remember_messages
+
+
+def post_message(chat_room_id, sender, content):
+    """
+    Create a message and, in the same transaction, bump the unread counter of
+    every other member and point the room at its newest message. Once
+    committed, the message joins the room's replay buffer.
+    """
+    with transaction.atomic():
+        message = Message.objects.create(chat_room_id=chat_room_id, sender=sender, content=content)
+        ChatRoomMember.objects.filter(chat_room_id=chat_room_id).exclude(user=sender).update(
+            unread_count=F('unread_count') + 1
+        )
+        # Concurrent senders must not move the pointer back to an older message
+        ChatRoom.objects.filter(
+            Q(last_message__isnull=True) | Q(last_message_id__lt=message.id),
+            pk=chat_room_id
+        ).update(last_message=message)
+        transaction.on_commit(lambda: remember_messages(chat_room_id, [message_payload(message, sender.full_name)]))
+    return message
+
+
+def post_messages(messages, sender_names=None):
+    """
+    Bulk counterpart of ``post_message``: insert unsaved messages in order,
+    then apply the unread counter, last message and replay buffer updates
+    once per room. ``sender_names`` maps sender ids to full names for the
+    replay buffer; without it they are looked up.
+
+    Returns:
+        The saved messages, in the order given
+    """
+    by_room = defaultdict(list)
+    with transaction.atomic():
+        messages = Message.objects.bulk_create(messages)
+        for message in messages:
+            # As Message.save does; nobody has read a message just posted
+            message.read_by_others = False
+            by_room[message.chat_room_id].append(message)
+        for chat_room_id, room_messages in by_room.items():
+            # Every member gains the room's new messages, less the ones they sent
+            sent = Counter(message.sender_id for message in room_messages)
+            ChatRoomMember.objects.filter(chat_room_id=chat_room_id).update(
+                unread_count=F('unread_count') + len(room_messages) - Case(
+                    *[When(user_id=user_id, then=Value(count)) for user_id, count in sent.items()],
+                    default=Value(0)
+                )
+            )
+            latest_id = max(message.id for message in room_messages)
+            ChatRoom.objects.filter(
+                Q(last_message__isnull=True) | Q(last_message_id__lt=latest_id),
+                pk=chat_room_id
+            ).update(last_message_id=latest_id)
+
+        if sender_names is None:
+            sender_names = dict(get_user_model().objects.filter(
+                pk__in={message.sender_id for message in messages}
+            ).values_list('id', 'full_name'))
+        transaction.on_commit(lambda: [
+            remember_messages(chat_room_id, [
+                message_payload(message, sender_names.get(message.sender_id)) for message in room_messages
+            ])
+            for chat_room_id, room_messages in by_room.items()
+        ])
+    return messages
+
+
+def mark_read(chat_room_id, user):
+    """
+    Move a member's read watermark to the room's newest message and reset
+    their unread counter, in a single-row UPDATE.
+
+    Returns:
+        Whether the user is a member of the room
+    """
+    return ChatRoomMember.objects.filter(chat_room_id=chat_room_id, user=user).update(
+        last_read=timezone.now(),
+        last_read_message_id=Subquery(ChatRoom.objects.filter(pk=chat_room_id).values('last_message_id')[:1]),
+        unread_count=0
+    ) > 0
+
+
+def read_watermarks(chat_room_id):
+    """
+    Read watermark of every member of a room, by user id.
+    """
+    return dict(
+        ChatRoomMember.objects.filter(chat_room_id=chat_room_id).values_list('user_id', 'last_read_message_id')
+    )
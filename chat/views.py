@@ -3,11 +3,15 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.db import models
+from django.conf import settings
 
 from users.models import User
 from .models import ChatRoom, ChatRoomMember, Message, PropertyInquiry
+from .pagination import MessageHistoryPagination
+from .presence import get_presence
+from .unread import mark_read, post_message, read_watermarks
 from .serializers import (
     ChatRoomSerializer,
     MessageSerializer,
@@ -31,30 +35,46 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         """
         Get chat rooms for the currently authenticated user.
         """
-        return ChatRoom.objects.filter(
+        queryset = ChatRoom.objects.filter(
             members__user=self.request.user
-        ).distinct()
+        )
+        if self.action in ['messages', 'send_message']:
+            # Only the membership check is needed, not the room's serialized data
+            return queryset
+        return queryset.select_related('last_message__sender').prefetch_related(
+            Prefetch('members', queryset=ChatRoomMember.objects.select_related('user'))
+        )
 
     @extend_schema(
         summary="Retrieve messages in a chat room",
-        description="Retrieves all messages for a given chat room and marks unread messages as read.",
+        description=(
+            "Retrieves the newest page of messages for a given chat room and marks unread messages as read. "
+            "Pass before=<message id> to load older messages and after=<message id> to load newer ones."
+        ),
+        parameters=[
+            OpenApiParameter('before', int, description='Return messages older than this message'),
+            OpenApiParameter('after', int, description='Return messages newer than this message'),
+            OpenApiParameter('limit', int, description='Page size (default 50, at most 100)'),
+        ],
+        responses=MessageSerializer(many=True),
     )
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
         """
-        Retrieve messages for a chat room.
+        Retrieve a page of messages for a chat room.
         """
         chat_room = self.get_object()
-        messages = chat_room.messages.all()
-        serializer = MessageSerializer(messages, many=True)
+        messages = Message.objects.filter(chat_room=chat_room).select_related('sender')
+        paginator = MessageHistoryPagination()
+        page = paginator.paginate_queryset(messages, request, view=self)
+        serializer = MessageSerializer(page, many=True, context={'read_watermarks': read_watermarks(chat_room.id)})
+        data = serializer.data
         
-        # Mark messages as read
-        messages.filter(
-            ~Q(sender=request.user),
-            is_read=False
-        ).update(is_read=True)
+        # Only a page that reaches the newest message means it was seen
+        if not paginator.has_newer:
+            mark_read(chat_room.id, request.user)
         
-        return Response(serializer.data)
+        return paginator.get_paginated_response(data)
 
     @extend_schema(
         summary="Send a message to a chat room",
@@ -75,15 +95,64 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        message = Message.objects.create(
-            chat_room=chat_room,
-            sender=request.user,
-            content=content
-        )
+        message = post_message(chat_room.id, request.user, content)
         
-        serializer = MessageSerializer(message)
+        # Nobody else has read it yet, so no watermarks need loading
+        serializer = MessageSerializer(message, context={'read_watermarks': {}})
         return Response(serializer.data)
     
+    @extend_schema(
+        summary="Presence of chat room members",
+        description=(
+            "Online state and last-seen time of the other members of many chat rooms at once. "
+            "Defaults to all of the user's rooms; pass rooms=<id>,<id>,... to narrow it down."
+        ),
+        parameters=[
+            OpenApiParameter('rooms', str, description='Comma-separated chat room ids'),
+        ],
+    )
+    @action(detail=False, methods=['get'])
+    def presence(self, request):
+        """
+        Presence of the members of the user's chat rooms, as room member ids plus a per-user state.
+        """
+        members = ChatRoomMember.objects.filter(
+            chat_room__members__user=request.user
+        ).exclude(user=request.user)
+
+        rooms = request.query_params.get('rooms')
+        if rooms:
+            try:
+                room_ids = {int(room_id) for room_id in rooms.split(',') if room_id.strip()}
+            except ValueError:
+                return Response(
+                    {'error': 'rooms must be a comma-separated list of chat room ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            max_rooms = getattr(settings, 'CHAT_PRESENCE_MAX_ROOMS', 200)
+            if len(room_ids) > max_rooms:
+                return Response(
+                    {'error': f'At most {max_rooms} rooms can be queried at once'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            members = members.filter(chat_room_id__in=room_ids)
+
+        room_members = {}
+        for chat_room_id, user_id in members.values_list('chat_room_id', 'user_id'):
+            room_members.setdefault(chat_room_id, []).append(user_id)
+        states = get_presence({user_id for user_ids in room_members.values() for user_id in user_ids})
+
+        return Response({
+            'rooms': room_members,
+            'users': {
+                user_id: {
+                    'online': state['online'],
+                    'last_seen': state['last_seen'].isoformat() if state['last_seen'] else None
+                }
+                for user_id, state in states.items()
+            }
+        })
+
     @extend_schema(
     summary="Create a direct message chat room",
     description="Creates a new direct message chat room between the current user and another user.",
@@ -179,11 +248,16 @@ class PropertyInquiryViewSet(viewsets.ModelViewSet):
         Other users see their own inquiries.
         """
         user = self.request.user
+        queryset = PropertyInquiry.objects.select_related(
+            'inquirer', 'chat_room__last_message__sender'
+        ).prefetch_related(
+            Prefetch('chat_room__members', queryset=ChatRoomMember.objects.select_related('user'))
+        )
         if user.user_type in ['OWNER', 'AGENT']:
-            return PropertyInquiry.objects.filter(
+            return queryset.filter(
                 property__owner=user
             )
-        return PropertyInquiry.objects.filter(
+        return queryset.filter(
             inquirer=user
         )
     
@@ -248,7 +322,7 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         return Schedule.objects.filter(
             models.Q(participants=self.request.user) | 
             models.Q(created_by=self.request.user)
-        ).distinct()
+        ).distinct().select_related('created_by').prefetch_related('participants')
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
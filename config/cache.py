@@ -0,0 +1,20 @@
+from django.conf import settings
+
+# Backends whose entries stay in the memory of a single process
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_cache_shared():
+    """
+    Whether the default cache is seen by every web and socket process.
+
+    ``SHARED_CACHE`` overrides the guess made from the backend, e.g. for a
+    single-process deployment on ``LocMemCache``.
+    """
+    shared = getattr(settings, 'SHARED_CACHE', None)
+    if shared is None:
+        shared = settings.CACHES['default']['BACKEND'] not in LOCAL_BACKENDS
+    return shared
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import sys
 from datetime import timedelta
 
 load_dotenv()
@@ -222,12 +223,108 @@ CHANNEL_LAYERS = {
 }
 
 # For production, you might want to use environment variables:
+REDIS_HOST = os.getenv('REDIS_HOST', '127.0.0.1')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            "hosts": [(os.getenv('REDIS_HOST', '127.0.0.1'), 
-                      int(os.getenv('REDIS_PORT', 6379)))],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     },
-}
\ No newline at end of file
+}
+
+# Paystack calls share a keep-alive connection pool. PAYSTACK_BASE_URL can
+# point at a local fake gateway (manage.py fake_paystack) for load tests.
+PAYSTACK_BASE_URL = os.getenv('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+PAYSTACK_CONNECT_TIMEOUT = 3
+PAYSTACK_READ_TIMEOUT = 10
+PAYSTACK_RETRIES = 2
+PAYSTACK_RETRY_BACKOFF = 0.2
+PAYSTACK_POOL_SIZE = 20
+PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
+
+# Payments are settled from Paystack webhooks by background workers
+PAYMENT_SETTLEMENT_ASYNC = True
+PAYMENT_SETTLEMENT_WORKERS = 2
+
+# Weights of the default feed ranking. Scores are refreshed by
+# manage.py refresh_rank_scores, which should run every minute or so.
+PROPERTY_RANK_DECAY_SECONDS = 60 * 60 * 12
+PROPERTY_RANK_VIEW_WEIGHT = 1.0
+PROPERTY_RANK_RATING_WEIGHT = 0.25
+
+# Presence, replay buffers, view quotas and cached responses are shared by the
+# web and socket workers through the same Redis as the channel layer, in a
+# database of their own. Tests run in one process and keep them in memory.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+if TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        },
+    }
+    # Whether every process sees the same cache; guessed from the backend when unset
+    SHARED_CACHE = True
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/1',
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        },
+    }
+
+# Property list and detail responses are cached per visibility tier
+PROPERTY_RESPONSE_CACHE = True
+PROPERTY_RESPONSE_CACHE_TTL = 60 * 5
+PROPERTY_LIST_CACHE_TTL = 30
+
+# Property notifications are fanned out by a background worker in chunks
+NOTIFICATION_FANOUT_ASYNC = True
+NOTIFICATION_FANOUT_BATCH_SIZE = 500
+
+# Property views are buffered in memory and written behind every few seconds
+PROPERTY_VIEW_COUNTER_ASYNC = True
+PROPERTY_VIEW_FLUSH_INTERVAL = 5
+# Flush attempts a failing batch of views gets before it is dropped
+PROPERTY_VIEW_FLUSH_RETRIES = 3
+
+# Chat messages can be broadcast first and stored in batches by a per-process writer
+CHAT_WRITE_COALESCING = False
+CHAT_WRITE_BATCH_SIZE = 100
+CHAT_WRITE_BATCH_INTERVAL = 0.05
+
+# Presence is kept in the cache; sockets heartbeat at half the TTL
+CHAT_PRESENCE_TTL = 60
+CHAT_PRESENCE_MAX_ROOMS = 200
+CHAT_TYPING_INTERVAL = 3
+
+# Rooms a single multiplexed ws/stream/ socket may follow
+CHAT_STREAM_MAX_ROOMS = 500
+
+# Reconnecting sockets catch up from a per-room buffer of recent messages in the cache
+CHAT_REPLAY_BUFFER_SIZE = 100
+CHAT_REPLAY_BUFFER_TTL = 60 * 60 * 24
+CHAT_REPLAY_MAX_MESSAGES = 200
+
+# Users behind socket tokens are cached briefly in each process
+WS_AUTH_USER_CACHE_TTL = 60
+WS_AUTH_USER_CACHE_SIZE = 10000
+
+# Geocoding results are cached per normalized address, in memory and in the database
+GEOCODING_TIMEOUT = 5
+GEOCODING_CACHE_SIZE = 1024
+GEOCODING_CACHE_TTL = 60 * 60 * 24 * 30
+
+# Property media is uploaded by a bounded pool of background workers
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+PROPERTY_MEDIA_STORAGE = 'properties.utils.storage.AppwriteStorage'
+PROPERTY_MEDIA_UPLOAD_ASYNC = True
+PROPERTY_MEDIA_UPLOAD_WORKERS = 4
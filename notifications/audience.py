@@ -0,0 +1,55 @@
+from django.db.models import Q
+from chat.models import PropertyInquiry
+from properties.models import PropertyView, SavedSearch
+from users.models import User
+from .models import Notification
+
+
+def _recipients(property, interest):
+    return User.objects.filter(
+        interest,
+        is_active=True,
+        allow_listing_updates=True,
+    ).exclude(id=property.owner_id).values_list('id', flat=True)
+
+
+def _interested(property):
+    return (
+        Q(id__in=PropertyView.objects.filter(property=property).values('user_id'))
+        | Q(id__in=PropertyInquiry.objects.filter(property=property).values('inquirer_id'))
+    )
+
+
+def _saved_search_matches(property):
+    return Q(id__in=SavedSearch.objects.matching(property).values('user_id'))
+
+
+def created_audience(property):
+    """
+    Users whose saved searches match a newly listed property.
+    """
+    return _recipients(property, _saved_search_matches(property))
+
+
+def updated_audience(property):
+    """
+    Users who viewed, inquired on or have a saved search matching the property.
+    Users still holding an unread update notification for it are skipped.
+    """
+    unread_updates = Notification.objects.filter(
+        notification_type='PROPERTY_UPDATED',
+        related_property_id=property.id,
+        is_read=False,
+    ).values('recipient_id')
+    return _recipients(
+        property,
+        _interested(property) | _saved_search_matches(property)
+    ).exclude(id__in=unread_updates)
+
+
+def deleted_audience(property):
+    """
+    Users who viewed or inquired on the property. Must be evaluated before the
+    property is deleted, since both relations cascade.
+    """
+    return list(_recipients(property, _interested(property)))
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import QuerySet
+
+from users.models import User
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationFanout:
+    """
+    Delivers a single notification to many recipients off the request path.
+
+    Jobs are handed to a background worker once the surrounding transaction
+    commits. The worker writes the notifications with chunked ``bulk_create``
+    and pushes each chunk to the recipients' ``user_{id}_notifications``
+    channel-layer groups.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 500)
+
+    @property
+    def run_async(self):
+        return getattr(settings, 'NOTIFICATION_FANOUT_ASYNC', True)
+
+    def publish(self, notification_type, title, message, related_property_id=None, recipient_ids=None):
+        """
+        Queue a notification for delivery.
+
+        Args:
+            notification_type: One of ``Notification.NOTIFICATION_TYPES``
+            title: Notification title
+            message: Notification body
+            related_property_id: Optional id of the property the notification is about
+            recipient_ids: Iterable of user ids, a ``values_list`` queryset of ids that
+                is evaluated by the worker, or None for every active user
+        """
+        if recipient_ids is not None and not isinstance(recipient_ids, QuerySet):
+            recipient_ids = list(recipient_ids)
+        job = {
+            'notification_type': notification_type,
+            'title': title,
+            'message': message,
+            'related_property_id': related_property_id,
+            'recipient_ids': recipient_ids,
+        }
+        transaction.on_commit(lambda: self._submit(job))
+
+    def _submit(self, job):
+        if not self.run_async:
+            self.deliver(job)
+            return
+        self._get_executor().submit(self._run, job)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-fanout')
+            return self._executor
+
+    def _run(self, job):
+        close_old_connections()
+        try:
+            self.deliver(job)
+        except Exception:
+            logger.exception(f"Notification fan-out failed for {job['notification_type']}: {job['title']}")
+        finally:
+            close_old_connections()
+
+    def deliver(self, job):
+        """
+        Write and push a job's notifications, one recipient batch at a time.
+        """
+        for recipient_ids in self._recipient_batches(job['recipient_ids']):
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=recipient_id,
+                    notification_type=job['notification_type'],
+                    title=job['title'],
+                    message=job['message'],
+                    related_property_id=job['related_property_id'],
+                )
+                for recipient_id in recipient_ids
+            ])
+            self._push(notifications)
+
+    def _recipient_batches(self, recipient_ids):
+        batch_size = self.batch_size
+        if recipient_ids is None:
+            recipient_ids = User.objects.filter(is_active=True).values_list('id', flat=True)
+        if isinstance(recipient_ids, QuerySet):
+            recipient_ids = recipient_ids.iterator(chunk_size=batch_size)
+
+        batch = []
+        for recipient_id in recipient_ids:
+            batch.append(recipient_id)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _push(self, notifications):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(self._group_send_batch)(channel_layer, notifications)
+        except Exception as e:
+            logger.error(f"Failed to push {len(notifications)} notifications: {str(e)}")
+
+    @staticmethod
+    async def _group_send_batch(channel_layer, notifications):
+        await asyncio.gather(*(
+            channel_layer.group_send(
+                f"user_{notification.recipient_id}_notifications",
+                {
+                    'type': 'notification_message',
+                    'data': dict(NotificationSerializer(notification).data),
+                }
+            )
+            for notification in notifications
+        ))
+
+
+fanout = NotificationFanout()
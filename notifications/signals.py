@@ -1,35 +1,46 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from properties.models import Property
-from users.models import User
-from .models import Notification
+from .audience import created_audience, updated_audience, deleted_audience
+from .fanout import fanout
 
 @receiver(post_save, sender=Property)
-def handle_property_save(sender, instance, created, **kwargs):
-    users = User.objects.filter(is_active=True)
-    
-    notification_type = 'PROPERTY_CREATED' if created else 'PROPERTY_UPDATED'
-    message = f'New property listed: {instance.title}' if created else f'Property updated: {instance.title}'
-    
-    for user in users:
-        Notification.objects.create(
-            recipient=user,
-            notification_type=notification_type,
+def handle_property_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+
+    if created:
+        fanout.publish(
+            notification_type='PROPERTY_CREATED',
             title=instance.title,
-            message=message,
-            related_property_id=instance.id
+            message=f'New property listed: {instance.title}',
+            related_property_id=instance.id,
+            recipient_ids=created_audience(instance)
         )
+        return
+
+    # Skip saves that only touch view counters and other bookkeeping
+    changed_fields = set(update_fields) if update_fields is not None else instance.get_changed_fields()
+    if changed_fields is not None and not changed_fields - set(Property.BOOKKEEPING_FIELDS):
+        return
+
+    fanout.publish(
+        notification_type='PROPERTY_UPDATED',
+        title=instance.title,
+        message=f'Property updated: {instance.title}',
+        related_property_id=instance.id,
+        recipient_ids=updated_audience(instance)
+    )
+
+@receiver(pre_delete, sender=Property)
+def capture_property_audience(sender, instance, **kwargs):
+    instance._notification_audience = deleted_audience(instance)
 
 @receiver(post_delete, sender=Property)
 def handle_property_delete(sender, instance, **kwargs):
-    users = User.objects.filter(is_active=True)
-    
-    for user in users:
-        Notification.objects.create(
-            recipient=user,
-            notification_type='PROPERTY_DELETED',
-            title=instance.title,
-            message=f'Property removed: {instance.title}'
-        )
\ No newline at end of file
+    fanout.publish(
+        notification_type='PROPERTY_DELETED',
+        title=instance.title,
+        message=f'Property removed: {instance.title}',
+        recipient_ids=getattr(instance, '_notification_audience', [])
+    )
\ No newline at end of file
@@ -0,0 +1,93 @@
+from django.test import TestCase, override_settings
+from chat.models import PropertyInquiry
+from users.models import User
+from properties.models import Property, PropertyView, SavedSearch
+from .models import Notification
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(NOTIFICATION_FANOUT_ASYNC=False, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class PropertyNotificationAudienceTests(TestCase):
+    def setUp(self):
+        self.owner, self.viewer, self.inquirer, self.searcher, self.bystander, self.opted_out = [
+            User.objects.create_user(
+                email=f"{name}@example.com",
+                username=name,
+                full_name=name.title(),
+                phone_number=f"+23412345678{i:02d}",
+                is_active=True,
+            )
+            for i, name in enumerate(['owner', 'viewer', 'inquirer', 'searcher', 'bystander', 'optedout'])
+        ]
+        self.opted_out.allow_listing_updates = False
+        self.opted_out.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property = Property.objects.create(
+                owner=self.owner,
+                title="Lekki Duplex",
+                description="Four bedroom duplex",
+                property_type="HOUSE",
+                listing_type="SALE",
+                price=250000,
+                size=150,
+                location="Lekki Phase 1, Lagos",
+            )
+        PropertyView.objects.create(user=self.viewer, property=self.property)
+        PropertyView.objects.create(user=self.viewer, property=self.property)
+        PropertyView.objects.create(user=self.opted_out, property=self.property)
+        PropertyInquiry.objects.create(
+            property=self.property,
+            inquirer=self.inquirer,
+            subject="Viewing",
+            message="Is it still available?"
+        )
+        SavedSearch.objects.create(user=self.searcher, location="lekki", max_price=300000)
+        SavedSearch.objects.create(user=self.bystander, listing_type="RENT")
+
+    def _recipients(self, notification_type):
+        return list(
+            Notification.objects.filter(notification_type=notification_type).values_list('recipient_id', flat=True)
+        )
+
+    def test_counter_only_saves_are_silent(self):
+        self.property = Property.objects.get(pk=self.property.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.views += 1
+            self.property.save()
+            Property.objects.get(pk=self.property.pk).save(update_fields=['views', 'last_viewed'])
+
+        self.assertEqual(self._recipients('PROPERTY_UPDATED'), [])
+
+    def test_update_targets_interested_users_once(self):
+        self.property = Property.objects.get(pk=self.property.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.price = 240000
+            self.property.save()
+
+        self.assertCountEqual(
+            self._recipients('PROPERTY_UPDATED'),
+            [self.viewer.id, self.inquirer.id, self.searcher.id]
+        )
+
+    def test_unread_update_is_not_repeated(self):
+        self.property = Property.objects.get(pk=self.property.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.price = 240000
+            self.property.save()
+        Notification.objects.filter(recipient=self.viewer).update(is_read=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.price = 230000
+            self.property.save()
+
+        self.assertCountEqual(
+            self._recipients('PROPERTY_UPDATED'),
+            [self.viewer.id, self.inquirer.id, self.searcher.id, self.viewer.id]
+        )
+
+    def test_delete_targets_viewers_and_inquirers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.delete()
+
+        self.assertCountEqual(self._recipients('PROPERTY_DELETED'), [self.viewer.id, self.inquirer.id])
@@ -0,0 +1,90 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase, override_settings
+from users.models import User
+from properties.models import Property, SavedSearch
+from .fanout import fanout
+from .models import Notification
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(
+    NOTIFICATION_FANOUT_ASYNC=False,
+    NOTIFICATION_FANOUT_BATCH_SIZE=2,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+)
+class NotificationFanoutTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                email=f"user{i}@example.com",
+                username=f"user{i}",
+                full_name=f"User {i}",
+                phone_number=f"+23412345678{i:02d}",
+                is_active=True,
+            )
+            for i in range(5)
+        ]
+        User.objects.create_user(
+            email="inactive@example.com",
+            username="inactive",
+            full_name="Inactive User",
+            phone_number="+2341234567899",
+        )
+
+    def test_delivery_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            fanout.publish('SYSTEM', 'Maintenance', 'Scheduled maintenance tonight')
+
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_writes_in_batches_to_active_users(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fanout.publish('SYSTEM', 'Maintenance', 'Scheduled maintenance tonight')
+
+        self.assertEqual(
+            set(Notification.objects.values_list('recipient_id', flat=True)),
+            {user.id for user in self.users}
+        )
+
+    def test_explicit_recipients(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fanout.publish('SYSTEM', 'Hello', 'Just for you', recipient_ids=[self.users[0].id])
+
+        self.assertEqual(list(Notification.objects.values_list('recipient_id', flat=True)), [self.users[0].id])
+
+    def test_pushes_to_recipient_group(self):
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"user_{self.users[0].id}_notifications", channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fanout.publish('SYSTEM', 'Hello', 'Just for you', recipient_ids=[self.users[0].id])
+
+        event = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(event['type'], 'notification_message')
+        self.assertEqual(event['data']['message'], 'Just for you')
+        self.assertEqual(event['data']['id'], Notification.objects.get().id)
+
+    def test_property_save_is_fanned_out(self):
+        for user in self.users[1:3]:
+            SavedSearch.objects.create(user=user, property_type='HOUSE')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                owner=self.users[0],
+                title="Lekki Duplex",
+                description="Four bedroom duplex",
+                property_type="HOUSE",
+                listing_type="SALE",
+                price=250000,
+                size=150,
+                location="Lekki Phase 1, Lagos",
+            )
+
+        self.assertEqual(
+            set(Notification.objects.filter(notification_type='PROPERTY_CREATED').values_list('recipient_id', flat=True)),
+            {self.users[1].id, self.users[2].id}
+        )
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Property, PropertyAmenity, PropertyMedia
+from .models import Amenity, Property, PropertyAmenity, PropertyMedia, SavedSearch
 
 admin.site.register(Property)
+admin.site.register(Amenity)
 admin.site.register(PropertyAmenity)
-admin.site.register(PropertyMedia)
\ No newline at end of file
+admin.site.register(PropertyMedia)
+admin.site.register(SavedSearch)
\ No newline at end of file
@@ -1,5 +1,13 @@
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
 from .models import Property
+from .utils.amenities import filter_by_amenities
+from .utils.geo import bounding_box, distance_km, geohash_filter
+from .utils.search import get_search_backend
+
+DEFAULT_RADIUS_KM = 5
+MAX_RADIUS_KM = 100
 
 class PropertyFilter(filters.FilterSet):
     min_price = filters.NumberFilter(field_name='price', lookup_expr='gte')
@@ -8,11 +16,80 @@ class PropertyFilter(filters.FilterSet):
     listing_type = filters.CharFilter(field_name='listing_type')
     location = filters.CharFilter(field_name='location', lookup_expr='icontains')
     amenities = filters.CharFilter(method='filter_amenities')
+    near = filters.CharFilter(method='filter_near')
+    radius_km = filters.NumberFilter(method='filter_radius_km')
+    bbox = filters.CharFilter(method='filter_bbox')
     
     class Meta:
         model = Property
         fields = ['min_price', 'max_price', 'property_type', 'listing_type', 'location']
     
     def filter_amenities(self, queryset, name, value):
-        amenities = value.split(',')
-        return queryset.filter(amenities__name__in=amenities).distinct()
\ No newline at end of file
+        # Properties with all of the listed amenities
+        return filter_by_amenities(queryset, value.split(','))
+
+    def filter_near(self, queryset, name, value):
+        """
+        Properties within radius_km of "lat,lng", nearest first.
+        """
+        latitude, longitude = self._parse_coordinates(value, name, 2)
+        radius_km = float(self.form.cleaned_data.get('radius_km') or DEFAULT_RADIUS_KM)
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValidationError({'radius_km': f'Must be greater than 0 and at most {MAX_RADIUS_KM}.'})
+
+        return queryset.filter(
+            geohash_filter(*bounding_box(latitude, longitude, radius_km))
+        ).annotate(
+            distance=distance_km(latitude, longitude)
+        ).filter(distance__lte=radius_km).order_by('distance')
+
+    def filter_radius_km(self, queryset, name, value):
+        # Only meaningful together with near, which reads it from the form
+        return queryset
+
+    def filter_bbox(self, queryset, name, value):
+        """
+        Properties inside "min_lat,min_lng,max_lat,max_lng".
+        """
+        min_lat, min_lng, max_lat, max_lng = self._parse_coordinates(value, name, 4)
+        if min_lat > max_lat or min_lng > max_lng:
+            raise ValidationError({name: 'Expected min_lat,min_lng,max_lat,max_lng.'})
+        return queryset.filter(geohash_filter(min_lat, min_lng, max_lat, max_lng))
+
+    def _parse_coordinates(self, value, name, count):
+        try:
+            coordinates = [float(part) for part in value.split(',')]
+        except ValueError:
+            coordinates = []
+        if len(coordinates) != count or not all(
+            -90 <= coordinate <= 90 if i % 2 == 0 else -180 <= coordinate <= 180
+            for i, coordinate in enumerate(coordinates)
+        ):
+            raise ValidationError({name: f'Expected {count} comma-separated latitude/longitude values.'})
+        return coordinates
+
+
+class PropertySearchFilter(BaseFilterBackend):
+    """
+    Full-text search on the ``search`` query parameter, best matches first.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Search title, description and location. Matches word prefixes and tolerates small typos.',
+                'schema': {
+                    'type': 'string',
+                },
+            },
+        ]
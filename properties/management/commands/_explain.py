@@ -0,0 +1,105 @@
+"""
+Replays property list requests as queries and classifies their plans,
+shared by the index commands.
+"""
+import re
+from urllib.parse import parse_qsl, urlsplit
+
+from django.db import connection
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from properties.views import PropertyViewSet
+
+LIST_PATH = '/api/properties/properties/'
+# Query parameters that pick a page rather than change the query
+PAGE_PARAMS = {'cursor', 'page_size', 'format'}
+URL_PATTERN = re.compile(r'(/api/properties/properties/(?:\?\S*)?)(?:\s|"|$)')
+
+# Filter combinations the clients send, for when no query log is given
+DEFAULT_QUERIES = [
+    LIST_PATH,
+    f'{LIST_PATH}?listing_type=RENT',
+    f'{LIST_PATH}?listing_type=SALE&property_type=HOUSE',
+    f'{LIST_PATH}?listing_type=RENT&min_price=2000000&max_price=5000000',
+    f'{LIST_PATH}?listing_type=SALE&property_type=APARTMENT&min_price=20000000&max_price=60000000',
+    f'{LIST_PATH}?listing_type=SALE&ordering=price',
+    f'{LIST_PATH}?listing_type=RENT&ordering=-price',
+    f'{LIST_PATH}?property_type=LAND',
+    f'{LIST_PATH}?min_price=1000000&max_price=1500000',
+    f'{LIST_PATH}?amenities=gym',
+    f'{LIST_PATH}?listing_type=SALE&amenities=swimming+pool,elevator',
+    f'{LIST_PATH}?amenities=swimming+pool,gym,standby+generator',
+    f'{LIST_PATH}?location=lekki',
+]
+
+
+def read_query_log(lines):
+    """
+    Property list URLs found in access log lines, or in a file of bare URLs.
+    """
+    for line in lines:
+        match = URL_PATTERN.search(line)
+        if match:
+            yield match.group(1)
+
+
+def get_shape(url):
+    """
+    The filter parameters of a request, without their values; the value of
+    ``ordering`` is kept, as it decides which index can serve the query.
+    """
+    params = parse_qsl(urlsplit(url).query)
+    return tuple(sorted({
+        f'{name}={value}' if name == 'ordering' else name
+        for name, value in params if name not in PAGE_PARAMS and value
+    }))
+
+
+def list_queryset(url):
+    """
+    The page query ``PropertyViewSet.list`` runs for an anonymous request
+    to ``url``, unevaluated.
+    """
+    request = Request(APIRequestFactory().get(url))
+    view = PropertyViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+    queryset = view.filter_queryset(view.get_queryset())
+    return view.paginator.get_page_queryset(queryset, request)
+
+
+def explain(queryset):
+    """
+    Classify a query's plan.
+
+    Returns:
+        (plan, scanned, walked, sorted): the plan text, the tables read in
+        full, the tables read in full through an index (in index order, so
+        only a LIMIT stops the walk), and whether rows are sorted rather than
+        read in order. ``scanned`` and ``walked`` are None when the
+        database's plans are not understood.
+    """
+    plan = queryset.explain()
+    if connection.vendor == 'sqlite':
+        scanned = set(re.findall(r'SCAN (\w+)\b(?! USING)', plan))
+        walked = set(re.findall(r'SCAN (\w+) USING (?:COVERING )?INDEX', plan))
+        return plan, scanned, walked, 'TEMP B-TREE FOR ORDER BY' in plan
+    if connection.vendor == 'postgresql':
+        scanned = set(re.findall(r'Seq Scan on (\w+)', plan))
+        # Index scans with no Index Cond walk the whole index
+        walked = set(re.findall(r'Index (?:Only )?Scan (?:Backward )?using \w+ on (\w+)(?![^\n]*\n\s+Index Cond)', plan))
+        return plan, scanned, walked, bool(re.search(r'\bSort\b', plan))
+    return plan, None, None, False
+
+
+def replay(url):
+    """
+    Explain the query behind a list request.
+
+    Returns:
+        The result of ``explain``, or None when the request's filters are invalid
+    """
+    try:
+        return explain(list_queryset(url))
+    except ValidationError:
+        return None
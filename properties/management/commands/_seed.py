@@ -0,0 +1,151 @@
+"""
+Synthetic data shared by the benchmark commands.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from properties.models import Property, PropertyAmenity
+from properties.utils.amenities import amenity_mask, get_amenities
+from properties.utils.geo import encode_geohash
+from properties.utils.ranking import rank_score
+
+AREAS = [
+    'Lekki', 'Ikoyi', 'Victoria Island', 'Yaba', 'Surulere', 'Ikeja', 'Ajah', 'Gbagada',
+    'Maitama', 'Wuse', 'Garki', 'Asokoro', 'Gwarinpa', 'Bodija', 'Rumuola', 'Trans Amadi',
+]
+CITIES = ['Lagos', 'Abuja', 'Ibadan', 'Port Harcourt']
+ADJECTIVES = [
+    'spacious', 'serviced', 'luxury', 'affordable', 'newly built', 'furnished', 'cosy',
+    'modern', 'renovated', 'waterfront', 'gated', 'detached', 'semi-detached', 'terraced',
+]
+FEATURES = [
+    'swimming pool', 'boys quarters', 'fitted kitchen', 'ample parking', 'borehole',
+    'standby generator', 'security', 'gym', 'balcony', 'garden', 'ensuite bedrooms',
+    'walk-in closet', 'cctv', 'elevator', 'rooftop terrace',
+]
+PROPERTY_TYPES = [choice for choice, _ in Property.PROPERTY_TYPE_CHOICES]
+LISTING_TYPES = [choice for choice, _ in Property.LISTING_TYPE_CHOICES]
+
+
+def get_seed_owner():
+    User = get_user_model()
+    owner, _ = User.objects.get_or_create(
+        email='benchmark-owner@example.com',
+        defaults={
+            'username': 'benchmark-owner',
+            'full_name': 'Benchmark Owner',
+            'phone_number': '+2340000000000',
+        }
+    )
+    return owner
+
+
+def get_seed_owners(count):
+    """
+    ``count`` benchmark owners, so per-owner queries see realistic row counts.
+    """
+    User = get_user_model()
+    existing = {user.email: user for user in User.objects.filter(email__startswith='benchmark-owner-')}
+    User.objects.bulk_create([
+        User(
+            email=f'benchmark-owner-{i}@example.com',
+            username=f'benchmark-owner-{i}',
+            full_name=f'Benchmark Owner {i}',
+            phone_number=f'+2341{i:09d}',
+            user_type='OWNER',
+        )
+        for i in range(count) if f'benchmark-owner-{i}@example.com' not in existing
+    ])
+    return list(User.objects.filter(email__in=[f'benchmark-owner-{i}@example.com' for i in range(count)]))
+
+
+def get_seed_amenities():
+    """
+    The amenity dictionary entries for ``FEATURES`` that own a mask bit.
+    """
+    return [amenity for amenity in get_amenities(FEATURES, create=True) if amenity.bit is not None]
+
+
+def build_properties(count, owners, seed=0, amenities=()):
+    """
+    Unsaved ``Property`` rows with plausible titles, descriptions,
+    coordinates, view counts and listing states, spread over ``owners`` and
+    reproducible for a given seed. Each gets two of ``amenities`` in its
+    mask; ``seed_amenities`` adds the matching rows once they are saved.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    properties = []
+    for _ in range(count):
+        area, city = rng.choice(AREAS), rng.choice(CITIES)
+        property_type = rng.choice(PROPERTY_TYPES)
+        bedrooms = rng.randint(1, 6)
+        features = rng.sample(FEATURES, 4)
+        latitude = Decimal(f"{rng.uniform(4.5, 12.0):.6f}")
+        longitude = Decimal(f"{rng.uniform(3.0, 9.5):.6f}")
+        views = int(rng.paretovariate(1.2)) - 1
+        properties.append(Property(
+            owner=rng.choice(owners),
+            title=f"{rng.choice(ADJECTIVES).capitalize()} {bedrooms} bedroom {property_type.lower()} in {area}",
+            description=(
+                f"A {rng.choice(ADJECTIVES)} {property_type.lower()} with {', '.join(features[:3])} "
+                f"and {features[3]}. Close to schools, shops and major roads in {area}, {city}."
+            ),
+            property_type=property_type,
+            listing_type=rng.choice(LISTING_TYPES),
+            price=Decimal(rng.randrange(500_000, 500_000_000, 50_000)),
+            size=Decimal(rng.randrange(40, 1200)),
+            location=f"{area}, {city}",
+            latitude=latitude,
+            longitude=longitude,
+            geohash=encode_geohash(float(latitude), float(longitude)),
+            bedrooms=bedrooms,
+            bathrooms=rng.randint(1, bedrooms),
+            toilets=rng.randint(1, bedrooms + 1),
+            views=views,
+            last_viewed=now - timedelta(minutes=rng.randrange(60 * 24 * 90)) if views else None,
+            is_sold=rng.random() < 0.1,
+            is_rented=rng.random() < 0.1,
+            # Listing times are spread over the last year
+            rank_score=rank_score(now - timedelta(minutes=rng.randrange(60 * 24 * 365)), views, None, None, now),
+            amenity_mask=amenity_mask(rng.sample(amenities, min(2, len(amenities)))),
+        ))
+    return properties
+
+
+def seed_properties(count, owner=None, seed=0, batch_size=1000, owners=None):
+    """
+    Bulk-insert ``count`` synthetic properties. Signals do not fire, so
+    callers rebuild any derived indexes themselves.
+
+    Returns:
+        The number of properties inserted
+    """
+    owners = owners or [owner or get_seed_owner()]
+    amenities = get_seed_amenities()
+    # Built a batch at a time, so a million rows never sit in memory at once
+    for start in range(0, count, batch_size):
+        Property.objects.bulk_create(build_properties(min(batch_size, count - start), owners, seed + start, amenities))
+    return count
+
+
+def seed_amenities(properties, batch_size=5000):
+    """
+    Bulk-insert the amenity rows behind the masks of seeded properties,
+    given as (id, amenity_mask) pairs.
+    """
+    amenity_ids = {amenity.bit: amenity.id for amenity in get_seed_amenities()}
+    batch = []
+    for property_id, mask in properties:
+        batch.extend(
+            PropertyAmenity(property_id=property_id, amenity_id=amenity_id)
+            for bit, amenity_id in amenity_ids.items() if mask & (1 << bit)
+        )
+        if len(batch) >= batch_size:
+            PropertyAmenity.objects.bulk_create(batch)
+            batch = []
+    PropertyAmenity.objects.bulk_create(batch)
@@ -0,0 +1,85 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from properties.models import Property
+
+from ._explain import DEFAULT_QUERIES, get_shape, list_queryset
+from ._seed import get_seed_owners, seed_amenities, seed_properties
+
+# The indexes added for filter shapes and the owner dashboard, dropped for the baseline
+FILTER_INDEXES = [
+    'property_listing_rank_idx',
+    'property_type_rank_idx',
+    'property_listing_price_idx',
+    'property_type_price_idx',
+    'property_owner_status_idx',
+    'property_owner_viewed_idx',
+]
+
+# The owner dashboard queries that filter properties, as run by PropertyViewSet.dashboard
+DASHBOARD_QUERIES = {
+    'dashboard: current': lambda owner: Property.objects.filter(owner=owner, is_sold=False, is_rented=False).count(),
+    'dashboard: viewed': lambda owner: list(
+        Property.objects.filter(owner=owner, last_viewed__isnull=False).order_by('-last_viewed')[:5]
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare property filter and dashboard latency with and without the filter indexes on seeded properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=1000000, help='Number of properties to seed')
+        parser.add_argument('--owners', type=int, default=1000, help='Number of owners to spread them over')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+
+    def handle(self, *args, **options):
+        # Everything seeded and dropped here is rolled back at the end
+        with transaction.atomic():
+            owners = get_seed_owners(options['owners'])
+            seed_properties(options['properties'], owners=owners, batch_size=5000)
+            seed_amenities(Property.objects.values_list('id', 'amenity_mask').iterator(chunk_size=5000))
+            self._analyze()
+            self.stdout.write(f"Seeded {options['properties']} properties for {len(owners)} owners")
+
+            queries = {', '.join(get_shape(url)) or '(feed)': url for url in DEFAULT_QUERIES}
+            with_indexes = self._run(queries, owners[0], options['repeat'])
+
+            # Plain DDL; the SQLite schema editor refuses to run inside a transaction
+            with connection.cursor() as cursor:
+                for name in FILTER_INDEXES:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            self._analyze()
+            without_indexes = self._run(queries, owners[0], options['repeat'])
+
+            self.stdout.write(f"{'query':<48}{'without ms':>12}{'with ms':>12}{'speedup':>10}")
+            for label, before in without_indexes.items():
+                after = with_indexes[label]
+                self.stdout.write(f"{label:<48}{before:>12.2f}{after:>12.2f}{before / after:>9.1f}x")
+
+            transaction.set_rollback(True)
+
+    def _run(self, queries, owner, repeat):
+        timings = {}
+        for label, url in queries.items():
+            timings[label] = self._time(lambda: list(list_queryset(url)), repeat)
+        for label, query in DASHBOARD_QUERIES.items():
+            timings[label] = self._time(lambda: query(owner), repeat)
+        return timings
+
+    def _time(self, run, repeat):
+        run()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _analyze(self):
+        # Fresh statistics, so the planner knows how selective each index is
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
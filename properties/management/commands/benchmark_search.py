@@ -0,0 +1,55 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from properties.models import Property
+from properties.utils.search import BasicSearchBackend, get_search_backend
+
+from ._seed import seed_properties
+
+DEFAULT_QUERIES = [
+    'lekki',
+    'serviced apartment',
+    'swimming pool lagos',
+    '3 bedroom house ikoyi',
+    'furnish',
+    'apartmnt',
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare search latency of the full-text backend against substring matching on seeded properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=20000, help='Number of properties to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+        parser.add_argument('--query', action='append', dest='queries', help='Query to time (repeatable)')
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or DEFAULT_QUERIES
+        # Same ordering as the property list endpoint; the full-text backend replaces it with its rank
+        base = Property.objects.order_by('-rank_score', 'id')
+        backends = [('substring', BasicSearchBackend()), ('full-text', get_search_backend())]
+
+        # Everything seeded here is rolled back at the end
+        with transaction.atomic():
+            seed_properties(options['properties'])
+            backends[1][1].rebuild()
+            self.stdout.write(f"Seeded {options['properties']} properties, backend {type(backends[1][1]).__name__}")
+
+            self.stdout.write(f"{'query':<26}" + ''.join(f"{label + ' ms':>16}{'hits':>8}" for label, _ in backends))
+            for query in queries:
+                row = f"{query:<26}"
+                for _, backend in backends:
+                    timings, hits = [], 0
+                    for _ in range(options['repeat']):
+                        started = time.perf_counter()
+                        hits = len(backend.search(base, query)[:20])
+                        timings.append((time.perf_counter() - started) * 1000)
+                    row += f"{statistics.median(timings):>16.2f}{hits:>8}"
+                self.stdout.write(row)
+
+            transaction.set_rollback(True)
+        backends[1][1].rebuild()
@@ -0,0 +1,82 @@
+import statistics
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from ._explain import DEFAULT_QUERIES, get_shape, list_queryset, read_query_log, replay
+
+
+def describe(shape, scanned, walked, sorted_rows):
+    """
+    A verdict on a plan, and whether the shape needs a better index. Walking
+    an index in order is only fine for the unfiltered feed, where the LIMIT
+    stops it after one page.
+    """
+    if scanned is None:
+        return 'plan not understood', False
+    parts = []
+    if scanned:
+        parts.append(f"scans {', '.join(sorted(table.replace('properties_', '') for table in scanned))}")
+    if walked and shape:
+        parts.append(f"walks {', '.join(sorted(table.replace('properties_', '') for table in walked))}")
+    if sorted_rows:
+        parts.append('sorts')
+    if parts:
+        return ' + '.join(parts), True
+    return 'index order' if walked else 'index range', False
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay property list requests from a query log, EXPLAIN the query behind each filter shape '
+        'and report the shapes that still scan a table or sort'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'log', nargs='?',
+            help='Access log or file of request URLs; a built-in set of common filters when omitted'
+        )
+        parser.add_argument('--plans', action='store_true', help='Print the full plan of every shape')
+        parser.add_argument('--time', action='store_true', help='Also run each query and report its median time')
+
+    def handle(self, *args, **options):
+        if options['log']:
+            with open(options['log']) as log:
+                urls = list(read_query_log(log))
+        else:
+            urls = DEFAULT_QUERIES
+
+        # One representative request per shape, weighted by how often the shape occurs
+        shapes = Counter(get_shape(url) for url in urls)
+        examples = {}
+        for url in urls:
+            examples.setdefault(get_shape(url), url)
+
+        problems = 0
+        self.stdout.write(f"{'requests':>8}  {'ms':>8}  {'verdict':<28}shape")
+        for shape, count in shapes.most_common():
+            label = ', '.join(shape) or '(feed)'
+            result = replay(examples[shape])
+            if result is None:
+                self.stdout.write(f"{count:>8}  {'':>8}  {'invalid filters':<28}{label}")
+                continue
+            plan, scanned, walked, sorted_rows = result
+            verdict, needs_index = describe(shape, scanned, walked, sorted_rows)
+            problems += needs_index
+            elapsed = f"{self._time(examples[shape]):.2f}" if options['time'] else ''
+            self.stdout.write(f"{count:>8}  {elapsed:>8}  {verdict:<28}{label}")
+            if options['plans']:
+                self.stdout.write(f"    {examples[shape]}")
+                self.stdout.write('\n'.join(f"    {line}" for line in plan.splitlines()))
+
+        self.stdout.write(f"{problems} of {len(shapes)} shapes scan, walk or sort without a matching index")
+
+    def _time(self, url, repeat=3):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(list_queryset(url))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out hang up before their reply is written
+        pass
+
+
+class FakePaystackServer:
+    """
+    Local stand-in for the two Paystack endpoints the payment views call.
+
+    Every initialized transaction verifies as successful, and
+    ``charge_event`` builds the webhook announcing it. ``latency`` delays
+    each reply, and the first ``failures`` requests get a 503, to exercise
+    timeouts and retries. ``connections`` counts accepted TCP connections,
+    so tests can tell whether the client reuses them.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failures=0):
+        self.latency = latency
+        self.failures = failures
+        self.connections = 0
+        self.requests = 0
+        self.transactions = {}
+        self._lock = threading.Lock()
+        self._server = _QuietServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def charge_event(self, reference, secret_key):
+        """
+        The signed ``charge.success`` webhook Paystack would send once an
+        initialized transaction is paid.
+
+        Returns:
+            The raw body and its ``X-Paystack-Signature``
+        """
+        body = json.dumps({'event': 'charge.success', 'data': self._charge(reference)}).encode()
+        return body, hmac.new(secret_key.encode(), body, hashlib.sha512).hexdigest()
+
+    def _charge(self, reference):
+        body = self.transactions[reference]
+        return {
+            'status': 'success',
+            'reference': reference,
+            'amount': body.get('amount'),
+            'customer': {'email': body.get('email')},
+            'metadata': body.get('metadata', {}),
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real gateway
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes, which Nagle would hold back on a reused connection
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if self.path != '/transaction/initialize':
+                    return self._reply(404, {'status': False, 'message': 'Not found'})
+                if self._should_fail():
+                    return self._reply(503, {'status': False, 'message': 'Unavailable'})
+                reference = uuid.uuid4().hex
+                with fake._lock:
+                    fake.transactions[reference] = body
+                self._reply(200, {'status': True, 'data': {
+                    'authorization_url': f'{fake.url}/checkout/{reference}',
+                    'access_code': reference[:12],
+                    'reference': reference,
+                }})
+
+            def do_GET(self):
+                prefix = '/transaction/verify/'
+                if not self.path.startswith(prefix):
+                    return self._reply(404, {'status': False, 'message': 'Not found'})
+                if self._should_fail():
+                    return self._reply(503, {'status': False, 'message': 'Unavailable'})
+                reference = self.path[len(prefix):]
+                if reference not in fake.transactions:
+                    return self._reply(400, {'status': False, 'message': 'Transaction reference not found'})
+                self._reply(200, {'status': True, 'data': fake._charge(reference)})
+
+            def _should_fail(self):
+                with fake._lock:
+                    fake.requests += 1
+                    if fake.failures:
+                        fake.failures -= 1
+                        return True
+                return False
+
+            def _reply(self, status, payload):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+class Command(BaseCommand):
+    help = 'Serve a fake Paystack gateway; point PAYSTACK_BASE_URL at it for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to delay every reply')
+
+    def handle(self, *args, **options):
+        server = FakePaystackServer(options['host'], options['port'], latency=options['latency'])
+        self.stdout.write(f'Fake Paystack listening on {server.url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from properties.models import PropertyMedia
+from properties.utils.media import StagedFile, media_pipeline
+from properties.utils.storage import get_media_storage
+
+
+class Command(BaseCommand):
+    help = 'Generate resized variants and blurhash placeholders for images uploaded before derivatives existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=media_pipeline.max_workers, help='Concurrent downloads')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of images to process')
+
+    def handle(self, *args, **options):
+        media = PropertyMedia.objects.filter(media_type='IMAGE', status='READY', variants={}).exclude(file_url='')
+        media_ids = list(media.values_list('id', flat=True)[:options['limit']])
+        storage = get_media_storage()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(lambda media_id: self._process(media_id, storage), media_ids))
+
+        self.stdout.write(f"Generated derivatives for {sum(results)} of {len(media_ids)} images")
+
+    def _process(self, media_id, storage):
+        close_old_connections()
+        try:
+            item = PropertyMedia.objects.get(pk=media_id)
+            response = requests.get(item.file_url, timeout=30)
+            response.raise_for_status()
+            derivatives = media_pipeline.derive(StagedFile(name=f"media-{media_id}.jpg", data=response.content), storage)
+            if derivatives:
+                PropertyMedia.objects.filter(pk=media_id).update(**derivatives)
+            return bool(derivatives)
+        except Exception as e:
+            self.stderr.write(f"Media {media_id}: {str(e)}")
+            return False
+        finally:
+            close_old_connections()
@@ -0,0 +1,143 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from properties.models import SubscriptionPlan, Transaction
+from properties.utils.paystack import PaystackService
+
+from .fake_paystack import FakePaystackServer
+
+INITIATE_URL = '/api/properties/properties/initiate-payment/'
+VERIFY_URL = '/api/properties/properties/verify-payment/'
+WEBHOOK_URL = '/api/properties/paystack/webhook/'
+SECRET_KEY = 'sk_test_loadtest'
+SETTLE_TIMEOUT = 30
+
+
+class UnpooledPaystackService(PaystackService):
+    """
+    Opens a new connection for every call, as the client did before it was pooled.
+    """
+
+    def __init__(self):
+        super().__init__(session=requests.Session())
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive initiate-payment, the Paystack webhook and verify-payment against a local fake gateway '
+        'and report latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent clients')
+        parser.add_argument('--payments', type=int, default=25, help='Payments initiated and verified by each client')
+        parser.add_argument('--latency', type=float, default=0.02, help='Seconds the fake gateway delays every reply')
+        parser.add_argument('--no-pool', action='store_true', help='Open a new connection per gateway call')
+
+    def handle(self, *args, **options):
+        users = self._users(options['workers'])
+        plan = SubscriptionPlan.objects.create(
+            name='Load test', plan_type='BASIC', price=1000, duration_days=30, description='Load test plan'
+        )
+        server = FakePaystackServer(latency=options['latency']).start()
+        service = f'{__name__}.UnpooledPaystackService' if options['no_pool'] else None
+        try:
+            with override_settings(PAYSTACK_BASE_URL=server.url, PAYSTACK_SERVICE=service,
+                                   PAYSTACK_SECRET_KEY=SECRET_KEY, NOTIFICATION_FANOUT_ASYNC=False):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(options['workers']) as executor:
+                    results = list(executor.map(
+                        lambda user: self._drive(server, user, plan, options['payments']), users
+                    ))
+                elapsed = time.perf_counter() - started
+                settled = self._wait_for_settlement(users)
+        finally:
+            server.stop()
+            # Transactions, subscriptions and notifications go with their users
+            get_user_model().objects.filter(pk__in=[user.pk for user in users]).delete()
+            plan.delete()
+
+        initiate = sorted(latency for result in results for latency in result[0])
+        webhook = sorted(latency for result in results for latency in result[1])
+        verify = sorted(latency for result in results for latency in result[2])
+        failed = sum(result[3] for result in results)
+        self.stdout.write(
+            f"{'unpooled' if options['no_pool'] else 'pooled'} client: {len(users)} workers x "
+            f"{options['payments']} payments, gateway latency {options['latency'] * 1000:.0f}ms"
+        )
+        self.stdout.write(
+            f"  {len(initiate)} payments in {elapsed:.2f}s ({len(initiate) / elapsed:.0f}/s), "
+            f"{failed} failed, {settled} settled, {server.connections} gateway connections"
+        )
+        for label, latencies in (('initiate', initiate), ('webhook', webhook), ('verify', verify)):
+            self.stdout.write(
+                f"  {label} ms: p50 {statistics.median(latencies):.2f}  "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f}  max {latencies[-1]:.2f}"
+            )
+
+    def _users(self, count):
+        User = get_user_model()
+        users = []
+        for i in range(count):
+            user, _ = User.objects.get_or_create(
+                email=f'paystack-loadtest-{i}@example.com',
+                defaults={
+                    'username': f'paystack-loadtest-{i}',
+                    'full_name': f'Paystack Load Test {i}',
+                    'phone_number': f'+2348{i:09d}',
+                }
+            )
+            users.append(user)
+        return users
+
+    def _drive(self, server, user, plan, payments):
+        """
+        Initiate payments one after another; each is then confirmed by the
+        gateway's webhook while the payer lands on verify-payment.
+        """
+        client = APIClient()
+        client.force_authenticate(user)
+        initiate, webhook, verify, failed = [], [], [], 0
+        try:
+            for _ in range(payments):
+                started = time.perf_counter()
+                response = client.post(INITIATE_URL, {'plan_id': plan.id}, format='json')
+                initiate.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    failed += 1
+                    continue
+                reference = response.json()['reference']
+
+                body, signature = server.charge_event(reference, SECRET_KEY)
+                started = time.perf_counter()
+                response = client.generic(
+                    'POST', WEBHOOK_URL, body, content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature
+                )
+                webhook.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    failed += 1
+                    continue
+
+                started = time.perf_counter()
+                response = client.get(VERIFY_URL, {'reference': reference})
+                verify.append((time.perf_counter() - started) * 1000)
+                if response.status_code not in (200, 202):
+                    failed += 1
+        finally:
+            close_old_connections()
+        return initiate, webhook, verify, failed
+
+    def _wait_for_settlement(self, users):
+        payments = Transaction.objects.filter(user__in=users)
+        deadline = time.monotonic() + SETTLE_TIMEOUT
+        while payments.filter(status='PENDING').exists() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        return payments.filter(status='SUCCESS').count()
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from properties.models import PaymentEvent, Transaction
+from properties.utils.paystack import get_paystack_service
+from properties.utils.settlement import settlement
+
+
+class Command(BaseCommand):
+    help = 'Retry unsettled Paystack webhook events and reconcile pending payments whose webhook never arrived'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=30, help='Seconds an event must have waited before a retry')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Give up on events that failed this often')
+        parser.add_argument(
+            '--reconcile-after', type=int, default=None,
+            help='Also verify pending payments older than this many minutes with Paystack'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        event_ids = list(PaymentEvent.objects.filter(
+            status__in=['PENDING', 'FAILED'], received_at__lte=cutoff, attempts__lt=options['max_attempts']
+        ).order_by('received_at').values_list('id', flat=True))
+        for event_id in event_ids:
+            settlement.process(event_id)
+        settled = PaymentEvent.objects.filter(id__in=event_ids, status='PROCESSED').count()
+        self.stdout.write(f"Settled {settled} of {len(event_ids)} payment events")
+
+        if options['reconcile_after'] is not None:
+            self._reconcile(timezone.now() - timedelta(minutes=options['reconcile_after']))
+
+    def _reconcile(self, cutoff):
+        paystack = get_paystack_service()
+        references = list(Transaction.objects.filter(
+            status='PENDING', created_at__lte=cutoff
+        ).values_list('reference', flat=True))
+        reconciled = 0
+        for reference in references:
+            verification = paystack.verify_transaction(reference)
+            # Abandoned and ongoing payments can still be completed
+            if not verification or verification.get('status') not in ('success', 'failed'):
+                continue
+            with transaction.atomic():
+                reconciled += settlement.settle(verification)
+        self.stdout.write(f"Reconciled {reconciled} of {len(references)} pending payments")
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from properties.models import Property
+from properties.utils.ranking import expire_boosts, refresh_rank_scores
+
+
+class Command(BaseCommand):
+    help = 'Drop expired boosts from the feed ranking and rescore recently viewed or rated properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since', type=int, default=5,
+            help='Rescore properties viewed, or whose owner was rated, in this many minutes'
+        )
+        parser.add_argument('--all', action='store_true', help='Rescore every property, e.g. after changing weights')
+
+    def handle(self, *args, **options):
+        expired = expire_boosts(Property.objects.all())
+
+        if options['all']:
+            properties = Property.objects.all()
+        else:
+            since = timezone.now() - timedelta(minutes=options['since'])
+            # View counts are flushed with bulk updates that leave the score alone
+            properties = Property.objects.filter(
+                Q(last_viewed__gte=since) | Q(owner__ratings_received__updated_at__gte=since)
+            ).distinct()
+        rescored = refresh_rank_scores(properties)
+
+        self.stdout.write(f"Expired {expired} boosts, rescored {rescored} properties")
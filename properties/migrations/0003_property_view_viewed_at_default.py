@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_saved_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='propertyview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+from properties.utils.geo import encode_geohash
+
+
+def backfill_geohash(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    properties = Property.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude')
+    batch = []
+    for property in properties.iterator(chunk_size=1000):
+        property.geohash = encode_geohash(float(property.latitude), float(property.longitude))
+        batch.append(property)
+        if len(batch) >= 1000:
+            Property.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    Property.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_property_view_viewed_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:12
+
+import logging
+
+from django.db import OperationalError, migrations, transaction
+
+from properties.utils.search import PostgresSearchBackend, SQLiteSearchBackend
+
+logger = logging.getLogger(__name__)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        table, vocabulary_table = SQLiteSearchBackend.table, SQLiteSearchBackend.vocabulary_table
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                schema_editor.execute(
+                    f"CREATE VIRTUAL TABLE {table} USING fts5("
+                    f"title, description, location, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+                schema_editor.execute(f"CREATE VIRTUAL TABLE {vocabulary_table} USING fts5vocab({table}, 'row')")
+        except OperationalError as e:
+            # SQLite built without FTS5: search falls back to substring matching
+            logger.warning(f"Could not create the property search index: {str(e)}")
+            return
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, title, description, location) "
+            f"SELECT id, title, description, location FROM properties_property"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute("ALTER TABLE properties_property ADD COLUMN search_vector tsvector")
+        schema_editor.execute(f"UPDATE properties_property SET search_vector = {PostgresSearchBackend.vector_sql}")
+        schema_editor.execute(
+            "CREATE INDEX properties_property_search_vector_idx ON properties_property USING GIN (search_vector)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX properties_property_search_trgm_idx ON properties_property "
+            "USING GIN ((coalesce(title, '') || ' ' || coalesce(location, '')) gin_trgm_ops)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLiteSearchBackend.vocabulary_table}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLiteSearchBackend.table}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS properties_property_search_trgm_idx")
+        schema_editor.execute("ALTER TABLE properties_property DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_property_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
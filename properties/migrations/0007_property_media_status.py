@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_geocoded_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertymedia',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='propertymedia',
+            name='file_url',
+            field=models.URLField(blank=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_property_media_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertymedia',
+            name='blurhash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='propertymedia',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
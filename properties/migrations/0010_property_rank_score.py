@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+from properties.utils.ranking import refresh_rank_scores
+
+
+def backfill_rank_score(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    refresh_rank_scores(Property.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_payment_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='rank_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_rank_score, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-rank_score', 'id'], name='property_rank_idx'),
+        ),
+    ]
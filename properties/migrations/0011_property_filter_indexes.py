@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0010_property_rank_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['listing_type', '-rank_score', 'id'], name='property_listing_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['listing_type', 'property_type', '-rank_score', 'id'], name='property_type_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['listing_type', 'price', 'id'], name='property_listing_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['listing_type', 'property_type', 'price', 'id'], name='property_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['owner', 'is_sold', 'is_rented'], name='property_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('last_viewed__isnull', False)), fields=['owner', '-last_viewed'], name='property_owner_viewed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyamenity',
+            index=models.Index(fields=['name', 'property'], name='amenity_name_property_idx'),
+        ),
+    ]
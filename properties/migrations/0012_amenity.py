@@ -0,0 +1,154 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:10
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+# As in Amenity.MASK_BITS and utils.amenities.normalize_amenity when this was written
+MASK_BITS = 63
+BATCH_SIZE = 1000
+
+
+def normalize(name):
+    return ' '.join(name.lower().split())
+
+
+def convert_amenities(apps, schema_editor):
+    Amenity = apps.get_model('properties', 'Amenity')
+    Property = apps.get_model('properties', 'Property')
+    PropertyAmenity = apps.get_model('properties', 'PropertyAmenity')
+
+    # The most widely used amenities get the mask bits
+    counts = Counter()
+    for name, count in PropertyAmenity.objects.values_list('name').annotate(count=Count('id')).order_by():
+        if normalize(name):
+            counts[normalize(name)] += count
+    Amenity.objects.bulk_create([
+        Amenity(name=name, bit=bit if bit < MASK_BITS else None)
+        for bit, (name, _) in enumerate(counts.most_common())
+    ])
+    amenity_ids = dict(Amenity.objects.values_list('name', 'id'))
+    bits = dict(Amenity.objects.filter(bit__isnull=False).values_list('id', 'bit'))
+
+    # Spellings that normalize to the same name collapse into one row per property
+    rows = PropertyAmenity.objects.order_by('property_id', 'id').values_list('id', 'property_id', 'name')
+    current, seen, mask = None, set(), 0
+    links, masks, duplicates = [], [], []
+    for row_id, property_id, name in rows.iterator(chunk_size=BATCH_SIZE):
+        if property_id != current:
+            if current is not None:
+                masks.append(Property(id=current, amenity_mask=mask))
+            current, seen, mask = property_id, set(), 0
+        amenity_id = amenity_ids.get(normalize(name))
+        if amenity_id is None or amenity_id in seen:
+            duplicates.append(row_id)
+            continue
+        seen.add(amenity_id)
+        links.append(PropertyAmenity(id=row_id, amenity_id=amenity_id))
+        if amenity_id in bits:
+            mask |= 1 << bits[amenity_id]
+        if len(links) >= BATCH_SIZE:
+            PropertyAmenity.objects.bulk_update(links, ['amenity'])
+            links = []
+        if len(masks) >= BATCH_SIZE:
+            Property.objects.bulk_update(masks, ['amenity_mask'])
+            masks = []
+    if current is not None:
+        masks.append(Property(id=current, amenity_mask=mask))
+    PropertyAmenity.objects.bulk_update(links, ['amenity'], batch_size=BATCH_SIZE)
+    Property.objects.bulk_update(masks, ['amenity_mask'], batch_size=BATCH_SIZE)
+    for start in range(0, len(duplicates), BATCH_SIZE):
+        PropertyAmenity.objects.filter(id__in=duplicates[start:start + BATCH_SIZE]).delete()
+
+
+def restore_amenity_names(apps, schema_editor):
+    Amenity = apps.get_model('properties', 'Amenity')
+    PropertyAmenity = apps.get_model('properties', 'PropertyAmenity')
+    PropertyAmenity.objects.update(name=Subquery(Amenity.objects.filter(pk=OuterRef('amenity_id')).values('name')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0011_property_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Amenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('bit', models.PositiveSmallIntegerField(blank=True, null=True, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Amenities',
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='propertyamenity',
+            name='amenity',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='property_amenities', to='properties.amenity'),
+        ),
+        # Nullable while it is dropped, so unapplying can restore names before it is required again
+        migrations.AlterField(
+            model_name='propertyamenity',
+            name='name',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.RunPython(convert_amenities, restore_amenity_names),
+        migrations.RemoveIndex(
+            model_name='propertyamenity',
+            name='amenity_name_property_idx',
+        ),
+        migrations.RemoveField(
+            model_name='propertyamenity',
+            name='name',
+        ),
+        migrations.AlterField(
+            model_name='propertyamenity',
+            name='amenity',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='property_amenities', to='properties.amenity'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertyamenity',
+            constraint=models.UniqueConstraint(fields=('amenity', 'property'), name='amenity_property_unique'),
+        ),
+        migrations.AddField(
+            model_name='amenity',
+            name='properties',
+            field=models.ManyToManyField(blank=True, through='properties.PropertyAmenity', to='properties.property'),
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='property_rank_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='property_listing_rank_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='property_type_rank_idx',
+        ),
+        # The feed indexes carry the mask, so amenity filters are checked on index entries
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-rank_score', 'id', 'amenity_mask'], name='property_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['listing_type', '-rank_score', 'id', 'amenity_mask'], name='property_listing_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['listing_type', 'property_type', '-rank_score', 'id', 'amenity_mask'], name='property_type_rank_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models import F, Q, Value
 from django.utils import timezone
 from users.models import User
 from datetime import timedelta
+from .utils.geo import encode_geohash
+from .utils.ranking import rank_score
 
 class Property(models.Model):
     PROPERTY_TYPE_CHOICES = (
@@ -35,6 +38,7 @@ class Property(models.Model):
     latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     formatted_address = models.CharField(max_length=255, blank=True, null=True)
     place_id = models.CharField(max_length=255, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)  # Spatial index over latitude/longitude
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     views = models.PositiveIntegerField(default=0)
@@ -51,19 +55,115 @@ class Property(models.Model):
     water_supply = models.BooleanField(default=False)
     is_exclusive = models.BooleanField(default=False)  # For Premium Plan exclusive listings
     boost_expiry = models.DateTimeField(null=True, blank=True)  # For Listing Boosts
+    rank_score = models.FloatField(default=0)  # Default feed order, see utils.ranking
+    amenity_mask = models.BigIntegerField(default=0)  # Bits of its common amenities, see Amenity.bit
+
+    # Saves that only touch these fields are bookkeeping, not listing changes
+    BOOKKEEPING_FIELDS = ('views', 'last_viewed', 'updated_at', 'boost_expiry', 'rank_score')
+
+    # Inputs of rank_score that live on the property itself, plus its owner for the rating
+    RANK_FIELDS = ('views', 'boost_expiry', 'created_at', 'owner')
+
+    class Meta:
+        indexes = [
+            # The default feed is a range scan of this index. Each carries the
+            # amenity mask, so amenity filters skip rows without reading them.
+            models.Index(fields=['-rank_score', 'id', 'amenity_mask'], name='property_rank_idx'),
+            # The feed narrowed by the PropertyFilter equality filters clients combine
+            models.Index(fields=['listing_type', '-rank_score', 'id', 'amenity_mask'], name='property_listing_rank_idx'),
+            models.Index(
+                fields=['listing_type', 'property_type', '-rank_score', 'id', 'amenity_mask'],
+                name='property_type_rank_idx'
+            ),
+            # Price ranges and price ordering within a listing type
+            models.Index(fields=['listing_type', 'price', 'id'], name='property_listing_price_idx'),
+            models.Index(fields=['listing_type', 'property_type', 'price', 'id'], name='property_type_price_idx'),
+            # Owner dashboard: status counts, and recently viewed listings
+            models.Index(fields=['owner', 'is_sold', 'is_rented'], name='property_owner_status_idx'),
+            models.Index(
+                fields=['owner', '-last_viewed'], condition=Q(last_viewed__isnull=False),
+                name='property_owner_viewed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(float(self.latitude), float(self.longitude))
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        # Only a change of its inputs costs the owner lookup; ratings are picked up by refresh_rank_scores
+        rank_fields = set(self.RANK_FIELDS)
+        if update_fields is not None:
+            rank_fields &= set(update_fields)
+        changed = self.get_changed_fields()
+        if changed is not None:
+            rank_fields &= changed
+        if rank_fields:
+            self.rank_score = rank_score(
+                self.created_at or timezone.now(), self.views, self.owner.rating, self.boost_expiry
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'rank_score'}
+        super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+    def get_changed_fields(self):
+        """
+        Names of the fields that differ from the last loaded or saved state,
+        or None when the instance was never loaded from the database.
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return None
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in loaded_values and getattr(self, field.attname) != loaded_values[field.attname]
+        }
+
     def is_boosted(self):
         return self.boost_expiry and timezone.now() < self.boost_expiry
 
+class Amenity(models.Model):
+    """
+    The canonical name of an amenity, shared by every property that has it.
+    The first ``MASK_BITS`` amenities own a bit of ``Property.amenity_mask``,
+    so filtering on them reads a column instead of joining.
+    """
+    # amenity_mask is a signed 64-bit integer
+    MASK_BITS = 63
+
+    name = models.CharField(max_length=100, unique=True)
+    bit = models.PositiveSmallIntegerField(null=True, blank=True, unique=True)
+    properties = models.ManyToManyField(Property, through='PropertyAmenity', blank=True)
+
+    class Meta:
+        verbose_name_plural = 'Amenities'
+
+    def __str__(self):
+        return self.name
+
 class PropertyAmenity(models.Model):
     property = models.ForeignKey(Property, related_name='amenities', on_delete=models.CASCADE)
-    name = models.CharField(max_length=100)
-    
+    amenity = models.ForeignKey(Amenity, related_name='property_amenities', on_delete=models.PROTECT)
+
     class Meta:
         verbose_name_plural = 'Property Amenities'
+        constraints = [
+            # Also the index for finding the properties with an amenity
+            models.UniqueConstraint(fields=['amenity', 'property'], name='amenity_property_unique'),
+        ]
 
 class PropertyMedia(models.Model):
     MEDIA_TYPE_CHOICES = (
@@ -71,19 +171,68 @@ class PropertyMedia(models.Model):
         ('VIDEO', 'Video'),
     )
     
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    )
+    
     property = models.ForeignKey(Property, related_name='media', on_delete=models.CASCADE)
     media_type = models.CharField(max_length=10, choices=MEDIA_TYPE_CHOICES)
-    file_url = models.URLField()
+    file_url = models.URLField(blank=True)  # Set once the upload completes
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='READY')
+    # Resized copies by size name, e.g. {'thumbnail': {'width': 320, 'height': 213, 'webp': url, 'jpeg': url}}
+    variants = models.JSONField(default=dict, blank=True)
+    blurhash = models.CharField(max_length=64, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def get_variant(self, size):
+        """
+        The stored variant for a size, or None for videos and images without derivatives.
+        """
+        return self.variants.get(size)
+
 class PropertyView(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     property = models.ForeignKey(Property, on_delete=models.CASCADE)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    viewed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-viewed_at']
 
+class SavedSearchQuerySet(models.QuerySet):
+    def matching(self, property):
+        """
+        Saved searches whose criteria the given property satisfies.
+        """
+        return self.annotate(
+            property_location=Value(property.location, output_field=models.CharField())
+        ).filter(
+            Q(property_type='') | Q(property_type=property.property_type),
+            Q(listing_type='') | Q(listing_type=property.listing_type),
+            Q(min_price__isnull=True) | Q(min_price__lte=property.price),
+            Q(max_price__isnull=True) | Q(max_price__gte=property.price),
+            Q(location='') | Q(property_location__icontains=F('location')),
+        )
+
+class SavedSearch(models.Model):
+    user = models.ForeignKey(User, related_name='saved_searches', on_delete=models.CASCADE)
+    name = models.CharField(max_length=100, blank=True)
+    property_type = models.CharField(max_length=20, choices=Property.PROPERTY_TYPE_CHOICES, blank=True)
+    listing_type = models.CharField(max_length=20, choices=Property.LISTING_TYPE_CHOICES, blank=True)
+    location = models.CharField(max_length=200, blank=True)
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SavedSearchQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = 'Saved Searches'
+
+    def __str__(self):
+        return self.name or f"Saved search {self.id}"
+
 class SubscriptionPlan(models.Model):
     PLAN_TYPES = (
         ('BASIC', 'Basic Plan'),
@@ -140,4 +289,47 @@ class Transaction(models.Model):
     property = models.ForeignKey(Property, null=True, blank=True, on_delete=models.SET_NULL)  # For PPV or Boost
 
     def __str__(self):
-        return f"{self.user} - {self.reference}"
\ No newline at end of file
+        return f"{self.user} - {self.reference}"
+
+class GeocodedAddress(models.Model):
+    """
+    Second-tier geocoding cache shared by all processes. ``result`` is None
+    when the provider found nothing for the address.
+    """
+    normalized_address = models.CharField(max_length=255, unique=True)
+    result = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = 'Geocoded Addresses'
+
+    def __str__(self):
+        return self.normalized_address
+
+class PaymentEvent(models.Model):
+    """
+    A Paystack webhook event, stored before it is settled so that a crash
+    or a failed settlement can be retried. ``key`` makes redelivered events
+    collapse into one row.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('PROCESSED', 'Processed'),
+        ('FAILED', 'Failed'),
+    )
+
+    key = models.CharField(max_length=255, unique=True)
+    event = models.CharField(max_length=50)
+    reference = models.CharField(max_length=255, db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'received_at'])]
+
+    def __str__(self):
+        return f"{self.event} - {self.reference}"
@@ -0,0 +1,178 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset (cursor) pagination over the queryset's own ordering.
+
+    The cursor holds the ordering values of the last row on the page, so the
+    next page is a range condition on an index rather than an OFFSET. The
+    primary key is appended as a tie-breaker, and nullable ordering fields
+    always sort their NULLs last so the cursor condition is the same on every
+    database.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        results = list(self.get_page_queryset(queryset, request))
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_queryset(self, queryset, request):
+        """
+        The query for the requested page, one row longer than the page to
+        tell whether another follows.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self._get_keys(queryset)
+        queryset = queryset.order_by(*[self._order_by(name, descending, nullable) for name, descending, nullable in self.keys])
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+        return queryset[:self.page_size + 1]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [self._encode_value(self._get_value(last, name)) for name, _, _ in self.keys]
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(position))
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if not isinstance(position, list) or len(position) != len(self.keys):
+                raise ValueError
+            return [self._decode_value(name, value) for (name, _, _), value in zip(self.keys, position)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_keys(self, queryset):
+        """
+        The queryset ordering as (name, descending, nullable) tuples, ending with the primary key.
+        """
+        self.model = queryset.model
+        ordering = queryset.query.order_by or self.model._meta.ordering or []
+        keys = []
+        for item in ordering:
+            if isinstance(item, OrderBy) and isinstance(item.expression, F):
+                name, descending = item.expression.name, item.descending
+            elif isinstance(item, str):
+                name, descending = item.lstrip('-'), item.startswith('-')
+            else:
+                continue
+            if name == 'pk':
+                name = self.model._meta.pk.name
+            keys.append((name, descending, self._is_nullable(name)))
+
+        pk_name = self.model._meta.pk.name
+        if pk_name not in [name for name, _, _ in keys]:
+            keys.append((pk_name, False, False))
+        return keys
+
+    def _is_nullable(self, name):
+        try:
+            return self.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            # Annotations: assume they can be NULL
+            return True
+
+    def _order_by(self, name, descending, nullable):
+        if not nullable:
+            return f"-{name}" if descending else name
+        return F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+
+    def _after(self, position):
+        """
+        Condition selecting the rows that sort after the given position.
+        """
+        conditions = []
+        equal = Q()
+        for (name, descending, nullable), value in zip(self.keys, position):
+            if value is None:
+                # NULLs sort last, so only rows that are also NULL here can follow
+                equal &= Q(**{f"{name}__isnull": True})
+                continue
+            after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            if nullable:
+                after |= Q(**{f"{name}__isnull": True})
+            conditions.append(equal & after)
+            equal &= Q(**{name: value})
+
+        condition = Q(pk__in=[])
+        for after in conditions:
+            condition |= after
+        return condition
+
+    def _get_value(self, obj, name):
+        return getattr(obj, name)
+
+    def _encode_value(self, value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def _decode_value(self, name, value):
+        if value is None:
+            return None
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
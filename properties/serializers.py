@@ -1,7 +1,10 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .utils.appwrite import AppwriteHelper
-from .models import Property, PropertyAmenity, PropertyMedia, PropertyView, SubscriptionPlan, UserSubscription, Transaction
+from .models import Property, PropertyAmenity, PropertyMedia, PropertyView, SavedSearch, SubscriptionPlan, UserSubscription, Transaction
+from .utils.amenities import set_amenities
 from .utils.geocoding import GeocodingService
+from .utils.media import media_pipeline
+from .utils.view_counter import view_counter
 from users.models import User
 
 class UserSerializer(serializers.ModelSerializer):
@@ -10,14 +13,36 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'phone_number', 'full_name', 'email', 'rating']
 
 class PropertyAmenitySerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='amenity.name', max_length=100)
+
     class Meta:
         model = PropertyAmenity
         fields = ['id', 'name']
 
 class PropertyMediaSerializer(serializers.ModelSerializer):
+    """
+    Serves the image size named by the ``media_size`` context entry (the view
+    picks it per action) in ``file_url`` and ``webp_url``, falling back to the
+    original upload when no derivative exists.
+    """
+    file_url = serializers.SerializerMethodField()
+    webp_url = serializers.SerializerMethodField()
+    original_url = serializers.URLField(source='file_url', read_only=True)
+
     class Meta:
         model = PropertyMedia
-        fields = ['id', 'media_type', 'file_url', 'created_at']
+        fields = ['id', 'media_type', 'file_url', 'webp_url', 'original_url', 'blurhash', 'status', 'created_at']
+
+    def _get_variant(self, obj):
+        return obj.get_variant(self.context.get('media_size', 'medium'))
+
+    def get_file_url(self, obj):
+        variant = self._get_variant(obj)
+        return variant['jpeg'] if variant else obj.file_url
+
+    def get_webp_url(self, obj):
+        variant = self._get_variant(obj)
+        return variant['webp'] if variant else None
 
 class PropertySerializer(serializers.ModelSerializer):
     amenities = PropertyAmenitySerializer(many=True, required=False)
@@ -30,11 +55,12 @@ class PropertySerializer(serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
     location_details = serializers.SerializerMethodField()
     is_boosted = serializers.SerializerMethodField()
+    views = serializers.SerializerMethodField()
 
     class Meta:
         model = Property
         fields = '__all__'
-        read_only_fields = ['owner', 'formatted_address', 'place_id', 'views', 'boost_expiry']
+        read_only_fields = ['owner', 'formatted_address', 'place_id', 'views', 'boost_expiry', 'rank_score', 'amenity_mask']
 
     def get_location_details(self, obj):
         return {
@@ -49,6 +75,10 @@ class PropertySerializer(serializers.ModelSerializer):
     def get_is_boosted(self, obj):
         return obj.is_boosted()
 
+    def get_views(self, obj):
+        # Include views still sitting in the write-behind buffer
+        return obj.views + view_counter.pending(obj.id)
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         user_subscription = self.context.get('user_subscription')
@@ -97,37 +127,46 @@ class PropertySerializer(serializers.ModelSerializer):
         location_data = self._handle_location_data(validated_data['location'], latitude, longitude)
         validated_data.update(location_data)
         
-        property_instance = Property.objects.create(owner=self.context['request'].user, **validated_data)
+        validated_data.setdefault('owner', self.context['request'].user)
+        property_instance = Property.objects.create(**validated_data)
         
-        for amenity in amenities_data:
-            PropertyAmenity.objects.create(property=property_instance, **amenity)
+        set_amenities(property_instance, [amenity['amenity']['name'] for amenity in amenities_data])
         
-        appwrite_helper = AppwriteHelper()
-        for media_file in media_files:
-            file_url = appwrite_helper.upload_file(file=media_file, user_id=str(property_instance.owner.id))
-            media_type = 'VIDEO' if media_file.name.lower().endswith(('.mp4', '.mov', '.avi')) else 'IMAGE'
-            PropertyMedia.objects.create(property=property_instance, media_type=media_type, file_url=file_url)
+        # Uploaded in the background; the rows stay PENDING until their file is stored
+        media_pipeline.ingest(property_instance, media_files)
         
         return property_instance
 
     def update(self, instance, validated_data):
         if 'location' in validated_data or 'latitude' in validated_data or 'longitude' in validated_data:
-            latitude = validated_data.pop('latitude', instance.latitude)
-            longitude = validated_data.pop('longitude', instance.longitude)
+            # Coordinates of the old location no longer apply once it changes
+            location_changed = validated_data.get('location', instance.location) != instance.location
+            latitude = validated_data.pop('latitude', None if location_changed else instance.latitude)
+            longitude = validated_data.pop('longitude', None if location_changed else instance.longitude)
             location_data = self._handle_location_data(validated_data.get('location', instance.location), latitude, longitude)
             validated_data.update(location_data)
 
         amenities_data = validated_data.pop('amenities', None)
         if amenities_data is not None:
-            instance.amenities.all().delete()
-            for amenity in amenities_data:
-                PropertyAmenity.objects.create(property=instance, **amenity)
+            set_amenities(instance, [amenity['amenity']['name'] for amenity in amenities_data])
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
         return instance
 
+class SavedSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = ['id', 'name', 'property_type', 'listing_type', 'location', 'min_price', 'max_price', 'created_at']
+
+    def validate(self, data):
+        min_price = data.get('min_price', getattr(self.instance, 'min_price', None))
+        max_price = data.get('max_price', getattr(self.instance, 'max_price', None))
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError("min_price must not exceed max_price")
+        return data
+
 class SubscriptionPlanSerializer(serializers.ModelSerializer):
     class Meta:
         model = SubscriptionPlan
@@ -157,7 +196,10 @@ class DashboardSerializer(serializers.Serializer):
         request = self.context.get('request')
         recent_views = PropertyView.objects.filter(
             user=request.user
-        ).select_related('property').order_by('-viewed_at')[:5]
+        ).select_related('property__owner').prefetch_related(
+            Prefetch('property__amenities', queryset=PropertyAmenity.objects.select_related('amenity')),
+            'property__media'
+        ).order_by('-viewed_at')[:5]
         return PropertySerializer(
             [view.property for view in recent_views], 
             many=True,
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Property, PropertyAmenity, PropertyMedia
+from .utils.amenities import refresh_amenity_mask
+from .utils.response_cache import DELETED, property_cache
+from .utils.search import get_search_backend
+
+SEARCH_FIELDS = {'title', 'description', 'location'}
+
+@receiver(post_save, sender=Property)
+def index_property(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+
+    # Only re-index when a searchable field may have changed
+    changed_fields = set(update_fields) if update_fields is not None else instance.get_changed_fields()
+    if not created and changed_fields is not None and not changed_fields & SEARCH_FIELDS:
+        return
+
+    get_search_backend().index(instance)
+
+@receiver(post_delete, sender=Property)
+def remove_property_from_index(sender, instance, **kwargs):
+    get_search_backend().remove(instance.id)
+
+@receiver(post_save, sender=Property)
+def invalidate_property_responses(sender, instance, raw=False, **kwargs):
+    if not raw:
+        property_cache.invalidate(instance.pk, instance.updated_at.isoformat())
+
+@receiver(post_delete, sender=Property)
+def invalidate_deleted_property_responses(sender, instance, **kwargs):
+    property_cache.invalidate(instance.pk, DELETED)
+
+@receiver(post_save, sender=PropertyMedia)
+@receiver(post_delete, sender=PropertyMedia)
+@receiver(post_save, sender=PropertyAmenity)
+@receiver(post_delete, sender=PropertyAmenity)
+def invalidate_parent_property_responses(sender, instance, raw=False, **kwargs):
+    if not raw:
+        property_cache.invalidate(instance.property_id)
+
+@receiver(post_save, sender=PropertyAmenity)
+@receiver(post_delete, sender=PropertyAmenity)
+def update_amenity_mask(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_amenity_mask(instance.property_id)
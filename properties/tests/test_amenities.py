@@ -0,0 +1,94 @@
+from django.test import TestCase, override_settings
+from users.models import User
+from properties.models import Amenity, Property, PropertyAmenity
+from properties.serializers import PropertyAmenitySerializer, PropertySerializer
+from properties.utils.amenities import amenity_mask, filter_by_amenities, get_amenities, set_amenities
+
+
+@override_settings(NOTIFICATION_FANOUT_ASYNC=False)
+class AmenityTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+            is_active=True,
+        )
+
+    def _property(self, title, amenities=()):
+        property = Property.objects.create(
+            owner=self.owner,
+            title=title,
+            description='A test property',
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location='123 Main St, Lagos',
+        )
+        set_amenities(property, amenities)
+        return property
+
+    def _titles(self, amenities):
+        return sorted(filter_by_amenities(Property.objects.all(), amenities).values_list('title', flat=True))
+
+    def test_spellings_share_one_dictionary_entry(self):
+        property = self._property('Listing', amenities=['Swimming  Pool', 'swimming pool', 'Gym'])
+
+        self.assertEqual(sorted(Amenity.objects.values_list('name', flat=True)), ['gym', 'swimming pool'])
+        self.assertEqual(property.amenities.count(), 2)
+        self.assertEqual(Property.objects.get(pk=property.pk).amenity_mask, amenity_mask(Amenity.objects.all()))
+
+    def test_filter_matches_properties_with_all_amenities(self):
+        self._property('All', amenities=['swimming pool', 'gym', 'standby generator'])
+        self._property('Two', amenities=['swimming pool', 'gym'])
+        self._property('None')
+
+        self.assertEqual(self._titles(['Swimming Pool', 'gym', 'standby generator']), ['All'])
+        self.assertEqual(self._titles(['gym']), ['All', 'Two'])
+        self.assertEqual(self._titles(['gym', 'sauna']), [])
+
+    def test_common_amenities_are_filtered_without_a_join(self):
+        self._property('Listing', amenities=['gym', 'balcony'])
+
+        queryset = filter_by_amenities(Property.objects.all(), ['gym', 'balcony'])
+
+        self.assertNotIn(PropertyAmenity._meta.db_table, str(queryset.query))
+        self.assertEqual([property.title for property in queryset], ['Listing'])
+
+    def test_amenities_without_a_bit_are_still_filtered(self):
+        self._property('Sauna', amenities=['gym'])
+        self._property('Gym', amenities=['gym'])
+        sauna = Amenity.objects.create(name='sauna')
+        PropertyAmenity.objects.create(property=Property.objects.get(title='Sauna'), amenity=sauna)
+
+        self.assertEqual(self._titles(['gym', 'sauna']), ['Sauna'])
+
+    def test_new_amenities_get_no_bit_once_all_are_taken(self):
+        Amenity.objects.create(name='last', bit=Amenity.MASK_BITS - 1)
+
+        amenity, = get_amenities(['Rooftop terrace'], create=True)
+
+        self.assertEqual(amenity.name, 'rooftop terrace')
+        self.assertIsNone(amenity.bit)
+
+    def test_removing_an_amenity_row_updates_the_mask(self):
+        property = self._property('Listing', amenities=['gym', 'balcony'])
+        PropertyAmenity.objects.filter(amenity__name='gym').delete()
+
+        self.assertEqual(
+            Property.objects.get(pk=property.pk).amenity_mask, amenity_mask(Amenity.objects.filter(name='balcony'))
+        )
+        self.assertEqual(self._titles(['gym']), [])
+
+    def test_serializer_reads_and_writes_amenity_names(self):
+        property = self._property('Listing', amenities=['Gym'])
+
+        serializer = PropertySerializer(property, data={'amenities': [{'name': 'Balcony'}, {'name': 'GYM'}]}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        amenities = PropertyAmenitySerializer(property.amenities.all(), many=True).data
+        self.assertEqual(sorted(amenity['name'] for amenity in amenities), ['balcony', 'gym'])
+        self.assertEqual(self._titles(['balcony', 'gym']), ['Listing'])
@@ -0,0 +1,72 @@
+import unittest
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.models import Property
+from properties.management.commands._explain import LIST_PATH, get_shape, read_query_log, replay
+from properties.utils.amenities import set_amenities
+
+
+class FilterIndexTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+            is_active=True,
+        )
+
+    def _property(self, title, amenities=()):
+        property = Property.objects.create(
+            owner=self.owner,
+            title=title,
+            description='A test property',
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location='123 Main St, Lagos',
+        )
+        set_amenities(property, amenities)
+        return property
+
+    def test_amenities_filter_returns_each_property_once(self):
+        self._property('Both', amenities=['gym', 'elevator'])
+        self._property('Gym', amenities=['gym'])
+        self._property('Neither', amenities=['garden'])
+
+        response = self.client.get(f'{LIST_PATH}?amenities=gym,elevator')
+
+        self.assertEqual([item['title'] for item in response.data['results']], ['Both'])
+
+    def test_shape_ignores_values_and_paging(self):
+        self.assertEqual(
+            get_shape(f'{LIST_PATH}?min_price=1&listing_type=RENT&cursor=abc&ordering=-price'),
+            ('listing_type', 'min_price', 'ordering=-price'),
+        )
+
+    def test_reads_urls_from_access_log(self):
+        log = [
+            f'10.0.0.1 - - [17/Oct/2026:10:00:00 +0000] "GET {LIST_PATH}?listing_type=RENT HTTP/1.1" 200 512',
+            '10.0.0.1 - - [17/Oct/2026:10:00:01 +0000] "GET /api/users/users/ HTTP/1.1" 200 128',
+        ]
+
+        self.assertEqual(list(read_query_log(log)), [f'{LIST_PATH}?listing_type=RENT'])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'plans are checked on SQLite')
+    def test_common_shapes_read_an_index_in_order(self):
+        for query in ['listing_type=RENT', 'listing_type=SALE&property_type=HOUSE', 'listing_type=SALE&ordering=price']:
+            with self.subTest(query=query):
+                plan, scanned, walked, sorted_rows = replay(f'{LIST_PATH}?{query}')
+                self.assertFalse(scanned or walked or sorted_rows, plan)
+
+    def test_invalid_filters_are_not_explained(self):
+        self.assertIsNone(replay(f'{LIST_PATH}?min_price=cheap'))
+
+    def test_command_counts_shapes_needing_an_index(self):
+        stdout = StringIO()
+        call_command('explain_filters', stdout=stdout)
+        self.assertIn('shapes scan, walk or sort', stdout.getvalue())
@@ -0,0 +1,98 @@
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.models import Property
+from properties.utils.geo import covering_cells, encode_geohash
+
+# Lekki Phase 1, Victoria Island, Ikeja and Abuja
+LOCATIONS = {
+    'lekki': (6.4474, 3.4723),
+    'victoria_island': (6.4281, 3.4219),
+    'ikeja': (6.6018, 3.3515),
+    'abuja': (9.0765, 7.3986),
+}
+
+
+class GeohashTests(TestCase):
+    def test_encode_geohash(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_covering_cells_contain_box_corners(self):
+        min_lat, min_lng, max_lat, max_lng = 6.40, 3.35, 6.62, 3.50
+        cells = covering_cells(min_lat, min_lng, max_lat, max_lng)
+
+        self.assertLessEqual(len(cells), 16)
+        for lat, lng in [(min_lat, min_lng), (min_lat, max_lng), (max_lat, min_lng), (max_lat, max_lng), LOCATIONS['ikeja']]:
+            self.assertTrue(any(encode_geohash(lat, lng).startswith(cell) for cell in cells))
+
+
+class PropertyGeoFilterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+        )
+        self.properties = {
+            name: Property.objects.create(
+                owner=self.user,
+                title=name,
+                description='A test property',
+                property_type='HOUSE',
+                listing_type='SALE',
+                price=250000,
+                size=150,
+                location=name,
+                latitude=lat,
+                longitude=lng,
+            )
+            for name, (lat, lng) in LOCATIONS.items()
+        }
+        Property.objects.create(
+            owner=self.user,
+            title='unknown',
+            description='No coordinates',
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location='unknown',
+        )
+
+    def _titles(self, query):
+        response = self.client.get(f'/api/properties/properties/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return [item['title'] for item in response.data['results']]
+
+    def test_geohash_is_kept_in_sync(self):
+        property = self.properties['lekki']
+        self.assertEqual(property.geohash, encode_geohash(*LOCATIONS['lekki']))
+
+        property.latitude, property.longitude = LOCATIONS['abuja']
+        property.save(update_fields=['latitude', 'longitude'])
+        property.refresh_from_db()
+
+        self.assertEqual(property.geohash, encode_geohash(*LOCATIONS['abuja']))
+
+    def test_near_orders_by_distance_within_radius(self):
+        self.assertEqual(self._titles('near=6.4474,3.4723&radius_km=10'), ['lekki', 'victoria_island'])
+        self.assertEqual(self._titles('near=6.4474,3.4723&radius_km=25'), ['lekki', 'victoria_island', 'ikeja'])
+
+    def test_near_paginates_by_distance(self):
+        titles = []
+        url = '/api/properties/properties/?near=6.4474,3.4723&radius_km=25&page_size=1'
+        while url:
+            response = self.client.get(url)
+            titles.extend(item['title'] for item in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(titles, ['lekki', 'victoria_island', 'ikeja'])
+
+    def test_bbox(self):
+        self.assertCountEqual(self._titles('bbox=6.0,3.0,7.0,4.0'), ['lekki', 'victoria_island', 'ikeja'])
+
+    def test_invalid_coordinates(self):
+        response = self.client.get('/api/properties/properties/?near=91,3.4')
+
+        self.assertEqual(response.status_code, 400)
@@ -1,21 +1,25 @@
 # properties/tests/test_geocoding.py
+import threading
+from datetime import timedelta
 from unittest.mock import patch, Mock
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from rest_framework.test import APITestCase
-from properties.utils import GeocodingService
-from properties.models import Property
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIRequestFactory
+from properties.utils.geocoding import MISSING, GeocodingService, geocoding_cache
+from properties.models import GeocodedAddress, Property, SubscriptionPlan, UserSubscription
 from properties.serializers import PropertySerializer
 
 User = get_user_model()
 
 class GeocodingServiceTests(TestCase):
     def setUp(self):
+        geocoding_cache.clear()
         self.geocoding_service = GeocodingService()
         self.test_address = "123 Main St, New York, NY 10001"
         self.mock_coordinates = (40.7505, -73.9934)
 
-    @patch('properties.utils.requests.get')
+    @patch('properties.utils.geocoding.requests.get')
     def test_successful_geocoding(self, mock_get):
         # Mock successful API response
         mock_response = Mock()
@@ -38,7 +42,7 @@ class GeocodingServiceTests(TestCase):
         self.assertEqual(coordinates, self.mock_coordinates)
         mock_get.assert_called_once()
 
-    @patch('properties.utils.requests.get')
+    @patch('properties.utils.geocoding.requests.get')
     def test_failed_geocoding(self, mock_get):
         # Mock failed API response
         mock_response = Mock()
@@ -53,7 +57,7 @@ class GeocodingServiceTests(TestCase):
         
         self.assertIsNone(coordinates)
 
-    @patch('properties.utils.requests.get')
+    @patch('properties.utils.geocoding.requests.get')
     def test_api_error_handling(self, mock_get):
         # Mock API error
         mock_get.side_effect = Exception("API Error")
@@ -62,11 +66,114 @@ class GeocodingServiceTests(TestCase):
         
         self.assertIsNone(coordinates)
 
+class GeocodingCacheTests(TestCase):
+    def setUp(self):
+        geocoding_cache.clear()
+        self.geocoding_service = GeocodingService()
+        self.response = Mock()
+        self.response.json.return_value = {
+            'status': 'OK',
+            'results': [{
+                'geometry': {'location': {'lat': 6.4474, 'lng': 3.4723}},
+                'formatted_address': 'Lekki Phase 1, Lagos, Nigeria',
+                'place_id': 'lekki-phase-1',
+            }]
+        }
+
+    @patch('properties.utils.geocoding.requests.get')
+    def test_equivalent_addresses_share_an_entry(self, mock_get):
+        mock_get.return_value = self.response
+
+        first = self.geocoding_service.get_location_details('Lekki Phase 1, Lagos')
+        second = self.geocoding_service.get_location_details('  lekki  phase 1 ,LAGOS. ')
+
+        self.assertEqual(first, second)
+        self.assertEqual(first['place_id'], 'lekki-phase-1')
+        mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], self.geocoding_service.timeout)
+
+    @patch('properties.utils.geocoding.requests.get')
+    def test_database_tier_survives_memory_eviction(self, mock_get):
+        mock_get.return_value = self.response
+        self.geocoding_service.get_location_details('Lekki Phase 1, Lagos')
+        geocoding_cache.clear()
+
+        details = self.geocoding_service.get_location_details('Lekki Phase 1, Lagos')
+
+        self.assertEqual(details['latitude'], 6.4474)
+        mock_get.assert_called_once()
+        self.assertTrue(GeocodedAddress.objects.filter(normalized_address='lekki phase 1, lagos').exists())
+
+    @patch('properties.utils.geocoding.requests.get')
+    def test_expired_entries_are_refetched(self, mock_get):
+        mock_get.return_value = self.response
+        with override_settings(GEOCODING_CACHE_TTL=0):
+            self.geocoding_service.get_location_details('Lekki Phase 1, Lagos')
+            self.geocoding_service.get_location_details('Lekki Phase 1, Lagos')
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('properties.utils.geocoding.requests.get')
+    def test_least_recently_used_entry_is_evicted(self, mock_get):
+        mock_get.return_value = self.response
+        with override_settings(GEOCODING_CACHE_SIZE=2):
+            for address in ['Lekki', 'Ikoyi', 'Lekki', 'Yaba']:
+                self.geocoding_service.get_location_details(address)
+
+        self.assertEqual(list(geocoding_cache._entries), ['lekki', 'yaba'])
+
+    @patch('properties.utils.geocoding.requests.get')
+    def test_not_found_is_cached_but_errors_are_not(self, mock_get):
+        mock_get.side_effect = Exception("API Error")
+        self.assertIsNone(self.geocoding_service.get_location_details('Nowhere'))
+
+        not_found = Mock()
+        not_found.json.return_value = {'status': 'ZERO_RESULTS', 'results': []}
+        mock_get.side_effect = None
+        mock_get.return_value = not_found
+        self.assertIsNone(self.geocoding_service.get_location_details('Nowhere'))
+        self.assertIsNone(self.geocoding_service.get_location_details('Nowhere'))
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_concurrent_lookups_are_coalesced(self):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fetch(address):
+            calls.append(address)
+            started.set()
+            release.wait(5)
+            return {'latitude': 6.4474, 'longitude': 3.4723}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(geocoding_cache.get_or_fetch('Lekki', fetch)))
+        # The leader holds the address in flight while followers arrive
+        with patch.object(geocoding_cache, '_get_stored', return_value=MISSING), \
+                patch.object(geocoding_cache, '_store'):
+            leader.start()
+            started.wait(5)
+            followers = [
+                threading.Thread(target=lambda: results.append(geocoding_cache.get_or_fetch('LEKKI', fetch)))
+                for _ in range(3)
+            ]
+            for follower in followers:
+                follower.start()
+            release.set()
+            for thread in [leader] + followers:
+                thread.join(5)
+
+        self.assertEqual(calls, ['Lekki'])
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result == {'latitude': 6.4474, 'longitude': 3.4723} for result in results))
+
 class PropertySerializerTests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
             email='test@example.com',
-            password='testpass123'
+            username='test',
+            full_name='Test User',
+            phone_number='+2341234567890',
         )
         self.property_data = {
             'title': 'Test Property',
@@ -76,56 +183,68 @@ class PropertySerializerTests(APITestCase):
             'price': 250000,
             'size': 150,
             'location': '123 Main St, New York, NY 10001',
-            'owner': self.user.id
         }
         self.mock_coordinates = (40.7505, -73.9934)
+        request = APIRequestFactory().get('/')
+        request.user = self.user
+        self.context = {'request': request}
 
-    @patch('properties.utils.GeocodingService.get_coordinates')
-    def test_create_property_with_coordinates(self, mock_get_coordinates):
+    def _details(self, coordinates):
+        return {
+            'latitude': coordinates[0],
+            'longitude': coordinates[1],
+            'formatted_address': None,
+            'place_id': None,
+        }
+
+    @patch('properties.utils.geocoding.GeocodingService.get_location_details')
+    def test_create_property_with_coordinates(self, mock_get_location_details):
         # Mock successful geocoding
-        mock_get_coordinates.return_value = self.mock_coordinates
+        mock_get_location_details.return_value = self._details(self.mock_coordinates)
 
-        serializer = PropertySerializer(data=self.property_data)
+        serializer = PropertySerializer(data=self.property_data, context=self.context)
         self.assertTrue(serializer.is_valid())
-        
-        property_instance = serializer.save(owner=self.user)
-        
+
+        property_instance = serializer.save()
+
         self.assertEqual(float(property_instance.latitude), self.mock_coordinates[0])
         self.assertEqual(float(property_instance.longitude), self.mock_coordinates[1])
-        mock_get_coordinates.assert_called_once_with(self.property_data['location'])
+        mock_get_location_details.assert_called_once_with(self.property_data['location'])
 
-    @patch('properties.utils.GeocodingService.get_coordinates')
-    def test_create_property_without_coordinates(self, mock_get_coordinates):
+    @patch('properties.utils.geocoding.GeocodingService.get_location_details')
+    def test_create_property_without_coordinates(self, mock_get_location_details):
         # Mock failed geocoding
-        mock_get_coordinates.return_value = None
+        mock_get_location_details.return_value = None
 
-        serializer = PropertySerializer(data=self.property_data)
+        serializer = PropertySerializer(data=self.property_data, context=self.context)
         self.assertTrue(serializer.is_valid())
-        
-        property_instance = serializer.save(owner=self.user)
-        
+
+        property_instance = serializer.save()
+
         self.assertIsNone(property_instance.latitude)
         self.assertIsNone(property_instance.longitude)
-        mock_get_coordinates.assert_called_once_with(self.property_data['location'])
+        mock_get_location_details.assert_called_once_with(self.property_data['location'])
 
-    @patch('properties.utils.GeocodingService.get_coordinates')
-    def test_update_property_location(self, mock_get_coordinates):
+    @patch('properties.utils.geocoding.GeocodingService.get_location_details')
+    def test_update_property_location(self, mock_get_location_details):
         # Create initial property
-        mock_get_coordinates.return_value = self.mock_coordinates
         property_instance = Property.objects.create(
             owner=self.user,
+            latitude=self.mock_coordinates[0],
+            longitude=self.mock_coordinates[1],
             **self.property_data
         )
 
         # Update location
         new_location = "456 Park Ave, New York, NY 10022"
         new_coordinates = (40.7605, -73.9724)
-        mock_get_coordinates.return_value = new_coordinates
-        
+        mock_get_location_details.return_value = self._details(new_coordinates)
+
         serializer = PropertySerializer(
             property_instance,
             data={'location': new_location},
-            partial=True
+            partial=True,
+            context=self.context
         )
         self.assertTrue(serializer.is_valid())
         updated_property = serializer.save()
@@ -133,6 +252,7 @@ class PropertySerializerTests(APITestCase):
         self.assertEqual(updated_property.location, new_location)
         self.assertEqual(float(updated_property.latitude), new_coordinates[0])
         self.assertEqual(float(updated_property.longitude), new_coordinates[1])
+        mock_get_location_details.assert_called_once_with(new_location)
 
     def test_location_details_format(self):
         property_instance = Property.objects.create(
@@ -141,12 +261,18 @@ class PropertySerializerTests(APITestCase):
             longitude=self.mock_coordinates[1],
             **self.property_data
         )
+        plan = SubscriptionPlan.objects.create(
+            name='Basic', plan_type='BASIC', price=1000, duration_days=30, description='Basic plan'
+        )
+        self.context['user_subscription'] = UserSubscription.objects.create(
+            user=self.user, plan=plan, end_date=timezone.now() + timedelta(days=30)
+        )
 
-        serializer = PropertySerializer(property_instance)
+        serializer = PropertySerializer(property_instance, context=self.context)
         location_details = serializer.data['location_details']
 
         self.assertEqual(location_details['address'], self.property_data['location'])
         self.assertEqual(
             location_details['coordinates'],
             {'lat': self.mock_coordinates[0], 'lng': self.mock_coordinates[1]}
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,157 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.models import PropertyMedia, SubscriptionPlan, UserSubscription
+from properties.utils.images import blurhash
+
+PROPERTIES_URL = '/api/properties/properties/'
+
+
+class MediaPipelineTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            PROPERTY_MEDIA_STORAGE='properties.utils.storage.LocalFileStorage',
+            PROPERTY_MEDIA_STAGING_DIR=os.path.join(self.media_root, 'staging'),
+            PROPERTY_MEDIA_UPLOAD_ASYNC=False,
+            NOTIFICATION_FANOUT_ASYNC=False,
+            PROPERTY_VIEW_COUNTER_ASYNC=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _create(self, files):
+        data = {
+            'title': 'Duplex',
+            'description': 'A test property',
+            'property_type': 'HOUSE',
+            'listing_type': 'SALE',
+            'price': 250000,
+            'size': 150,
+            'location': 'Lekki',
+            'latitude': 6.4474,
+            'longitude': 3.4723,
+            'media_files': files,
+        }
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(PROPERTIES_URL, data, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return response, callbacks
+
+    def _run(self, callbacks):
+        for callback in callbacks:
+            callback()
+
+
+class PropertyMediaPipelineTests(MediaPipelineTestCase):
+    def test_media_is_pending_until_uploaded(self):
+        response, callbacks = self._create([
+            SimpleUploadedFile('front.jpg', b'front', content_type='image/jpeg'),
+            SimpleUploadedFile('tour.mp4', b'tour', content_type='video/mp4'),
+        ])
+
+        media = PropertyMedia.objects.filter(property_id=response.data['id']).order_by('id')
+        self.assertEqual([(item.media_type, item.status) for item in media], [('IMAGE', 'PENDING'), ('VIDEO', 'PENDING')])
+
+        self._run(callbacks)
+
+        media = PropertyMedia.objects.order_by('id')
+        self.assertEqual([item.status for item in media], ['READY', 'READY'])
+        with open(os.path.join(self.media_root, media[1].file_url.split('/media/')[1]), 'rb') as f:
+            self.assertEqual(f.read(), b'tour')
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_spooled_uploads_are_staged_without_copying(self):
+        with patch('properties.utils.media.shutil.copyfile') as copyfile:
+            response, callbacks = self._create([SimpleUploadedFile('large.jpg', b'x' * 4096, content_type='image/jpeg')])
+        copyfile.assert_not_called()
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'staging'))), 1)
+
+        self._run(callbacks)
+
+        media = PropertyMedia.objects.get()
+        self.assertEqual(media.status, 'READY')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'staging')), [])
+
+    def test_failed_upload_is_marked(self):
+        response, callbacks = self._create([SimpleUploadedFile('front.jpg', b'front', content_type='image/jpeg')])
+
+        with patch('properties.utils.storage.LocalFileStorage.save', side_effect=OSError('disk full')):
+            self._run(callbacks)
+
+        media = PropertyMedia.objects.get()
+        self.assertEqual(media.status, 'FAILED')
+        self.assertEqual(media.file_url, '')
+
+
+class ImageDerivativeTests(MediaPipelineTestCase):
+    def _image(self, name, size=(2400, 1600), color=(200, 120, 40)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_and_blurhash_are_stored(self):
+        response, callbacks = self._create([self._image('front.jpg')])
+        self._run(callbacks)
+
+        media = PropertyMedia.objects.get()
+        self.assertEqual(media.status, 'READY')
+        self.assertEqual(
+            {size: (variant['width'], variant['height']) for size, variant in media.variants.items()},
+            {'thumbnail': (320, 213), 'medium': (800, 533), 'large': (1600, 1067)}
+        )
+        with Image.open(os.path.join(self.media_root, media.variants['thumbnail']['webp'].split('/media/')[1])) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (320, 213)))
+        self.assertEqual(len(media.blurhash), 28)
+
+    def test_small_images_are_not_enlarged(self):
+        response, callbacks = self._create([self._image('small.jpg', size=(500, 400))])
+        self._run(callbacks)
+
+        media = PropertyMedia.objects.get()
+        self.assertEqual(media.variants['large']['width'], 500)
+        self.assertEqual(media.variants['thumbnail']['width'], 320)
+
+    def test_unreadable_image_keeps_original(self):
+        response, callbacks = self._create([SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpeg')])
+        self._run(callbacks)
+
+        media = PropertyMedia.objects.get()
+        self.assertEqual((media.status, media.variants, media.blurhash), ('READY', {}, ''))
+
+    def test_blurhash_of_solid_colour(self):
+        self.assertEqual(blurhash(Image.new('RGB', (64, 64), (255, 255, 255))), 'L9TSUA~qfQ~q~qoffQoffQfQfQfQ')
+
+    def test_list_serves_thumbnails_and_detail_large_images(self):
+        plan = SubscriptionPlan.objects.create(name='Basic', plan_type='BASIC', price=1000, duration_days=30, description='Basic plan')
+        UserSubscription.objects.create(user=self.user, plan=plan, end_date=timezone.now() + timedelta(days=30))
+        response, callbacks = self._create([self._image('front.jpg')])
+        self._run(callbacks)
+        media = PropertyMedia.objects.get()
+
+        listed = self.client.get(PROPERTIES_URL).data['results'][0]['media'][0]
+        detail = self.client.get(f"{PROPERTIES_URL}{response.data['id']}/").data['media'][0]
+
+        self.assertEqual(listed['file_url'], media.variants['thumbnail']['jpeg'])
+        self.assertEqual(listed['webp_url'], media.variants['thumbnail']['webp'])
+        self.assertEqual(detail['file_url'], media.variants['large']['jpeg'])
+        self.assertEqual(detail['original_url'], media.file_url)
@@ -0,0 +1,101 @@
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.management.commands.fake_paystack import FakePaystackServer
+from properties.models import SubscriptionPlan, Transaction, UserSubscription
+from properties.utils.paystack import AsyncPaystackService, PaystackService, build_session
+
+
+@override_settings(PAYSTACK_RETRY_BACKOFF=0)
+class PaystackServiceTests(TestCase):
+    def setUp(self):
+        self.server = FakePaystackServer().start()
+        self.addCleanup(self.server.stop)
+
+    def _service(self):
+        with override_settings(PAYSTACK_BASE_URL=self.server.url):
+            service = PaystackService(session=build_session())
+        self.addCleanup(service.session.close)
+        return service
+
+    def test_calls_reuse_one_connection(self):
+        service = self._service()
+        reference = service.initialize_transaction('buyer@example.com', 1000, 'http://testserver/')['reference']
+
+        for _ in range(5):
+            self.assertEqual(service.verify_transaction(reference)['status'], 'success')
+
+        self.assertEqual(self.server.connections, 1)
+
+    def test_lookups_are_retried(self):
+        service = self._service()
+        reference = service.initialize_transaction('buyer@example.com', 1000, 'http://testserver/')['reference']
+        self.server.failures = 2
+
+        self.assertEqual(service.verify_transaction(reference)['reference'], reference)
+        self.assertEqual(self.server.requests, 4)
+
+    def test_initialize_is_not_retried(self):
+        service = self._service()
+        self.server.failures = 1
+
+        with self.assertLogs('properties.utils.paystack', 'WARNING'):
+            self.assertIsNone(service.initialize_transaction('buyer@example.com', 1000, 'http://testserver/'))
+        self.assertEqual(self.server.requests, 1)
+
+    @override_settings(PAYSTACK_READ_TIMEOUT=0.05)
+    def test_slow_gateway_times_out(self):
+        service = self._service()
+        self.server.latency = 0.5
+
+        with self.assertLogs('properties.utils.paystack', 'ERROR'):
+            self.assertIsNone(service.initialize_transaction('buyer@example.com', 1000, 'http://testserver/'))
+
+    def test_async_variant(self):
+        service = AsyncPaystackService(self._service())
+
+        data = async_to_sync(service.initialize_transaction)('buyer@example.com', 1000, 'http://testserver/')
+
+        self.assertEqual(self.server.transactions[data['reference']]['amount'], 100000)
+
+
+@override_settings(NOTIFICATION_FANOUT_ASYNC=False, PAYMENT_SETTLEMENT_ASYNC=False, PAYSTACK_SECRET_KEY='sk_test')
+class PaymentViewTests(APITestCase):
+    def setUp(self):
+        self.server = FakePaystackServer().start()
+        self.addCleanup(self.server.stop)
+        self.user = User.objects.create_user(
+            email='buyer@example.com',
+            username='buyer',
+            full_name='Buyer',
+            phone_number='+2341234567890',
+            is_active=True,
+        )
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic',
+            plan_type='BASIC',
+            price=1000,
+            duration_days=30,
+            description='Basic plan',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_subscription_payment_against_fake_gateway(self):
+        with override_settings(PAYSTACK_BASE_URL=self.server.url):
+            response = self.client.post(
+                '/api/properties/properties/initiate-payment/', {'plan_id': self.plan.id}, format='json'
+            )
+        reference = response.json()['reference']
+        body, signature = self.server.charge_event(reference, 'sk_test')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.generic(
+                'POST', '/api/properties/paystack/webhook/', body,
+                content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature
+            )
+        verified = self.client.get('/api/properties/properties/verify-payment/', {'reference': reference})
+
+        self.assertEqual(verified.status_code, 200)
+        self.assertEqual(Transaction.objects.get(reference=reference).status, 'SUCCESS')
+        self.assertTrue(UserSubscription.objects.filter(user=self.user, plan=self.plan, is_active=True).exists())
+        self.assertEqual(self.server.requests, 1)
@@ -0,0 +1,158 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from chat.models import ChatRoom, ChatRoomMember, PropertyInquiry, Schedule
+from chat.unread import post_message
+from notifications.models import Notification
+from users.models import User, Rating
+from properties.models import Property, PropertyMedia, PropertyView, SavedSearch
+from properties.utils.amenities import set_amenities
+
+ROWS = 8
+
+# Maximum number of queries each list endpoint may issue, however many rows it returns
+LIST_QUERY_BUDGETS = {
+    '/api/properties/properties/': 4,
+    '/api/properties/properties/dashboard/': 10,
+    '/api/properties/saved-searches/': 1,
+    '/api/notifications/': 1,
+    '/api/chat/schedules/': 2,
+    '/api/chat/chatrooms/': 2,
+    '/api/chat/inquiries/': 2,
+    '/api/users/users/': 1,
+    '/api/users/ratings/': 1,
+    '/api/admin/users/': 3,
+    '/api/admin/properties/': 3,
+    '/api/admin/notifications/': 1,
+}
+
+
+@override_settings(NOTIFICATION_FANOUT_ASYNC=False, PROPERTY_VIEW_COUNTER_ASYNC=False)
+class ListQueryBudgetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+            user_type='OWNER',
+            is_active=True,
+            is_staff=True,
+        )
+        others = [
+            User.objects.create_user(
+                email=f'user{i}@example.com',
+                username=f'user{i}',
+                full_name=f'User {i}',
+                phone_number=f'+23412345678{i:02d}',
+                user_type='BUYER',
+                is_active=True,
+            )
+            for i in range(ROWS)
+        ]
+
+        for i, other in enumerate(others):
+            owner = self.user if i % 2 else other
+            property = Property.objects.create(
+                owner=owner,
+                title=f'Property {i}',
+                description='A test property',
+                property_type='HOUSE',
+                listing_type='SALE',
+                price=100000 + i,
+                size=150,
+                location='Lekki, Lagos',
+                last_viewed=timezone.now(),
+                boost_expiry=timezone.now() + timedelta(days=1) if i % 3 == 0 else None,
+            )
+            set_amenities(property, ['Pool', 'Gym'])
+            PropertyMedia.objects.create(property=property, media_type='IMAGE', file_url='https://example.com/a.jpg')
+            PropertyView.objects.create(user=self.user, property=property)
+            SavedSearch.objects.create(user=self.user, name=f'Search {i}')
+            Notification.objects.create(recipient=self.user, notification_type='SYSTEM', title='Hi', message='Hello')
+            Rating.objects.create(rater=other, rated_user=self.user, score=4)
+            schedule = Schedule.objects.create(
+                title=f'Viewing {i}',
+                location='Lekki',
+                start_time=timezone.now(),
+                end_time=timezone.now() + timedelta(hours=1),
+                created_by=self.user,
+            )
+            schedule.participants.add(self.user, other)
+            chat_room = ChatRoom.objects.create(room_type='INQUIRY', property=property)
+            ChatRoomMember.objects.create(chat_room=chat_room, user=self.user)
+            ChatRoomMember.objects.create(chat_room=chat_room, user=other)
+            post_message(chat_room.id, other, 'Is this still available?')
+            post_message(chat_room.id, self.user, 'Yes')
+            PropertyInquiry.objects.create(
+                property=property, inquirer=other, subject='Viewing', message='Hello', chat_room=chat_room
+            )
+
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_endpoints_stay_within_query_budget(self):
+        for url, budget in LIST_QUERY_BUDGETS.items():
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    len(queries), budget,
+                    f"{url} issued {len(queries)} queries:\n" + "\n".join(q['sql'] for q in queries)
+                )
+
+
+class PropertyKeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+        )
+        now = timezone.now()
+        for i in range(7):
+            property = Property.objects.create(
+                owner=self.user,
+                title=f'Property {i}',
+                description='A test property',
+                property_type='HOUSE',
+                listing_type='SALE',
+                price=100000 + i,
+                size=150,
+                location='Lekki, Lagos',
+                boost_expiry=now + timedelta(days=i) if i % 2 == 0 else None,
+            )
+        # Identical scores exercise the id tie-breaker
+        Property.objects.filter(title__in=['Property 1', 'Property 3']).update(rank_score=1000)
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_follow_feed_order(self):
+        expected = [
+            property.id for property in sorted(Property.objects.all(), key=lambda p: (-p.rank_score, p.id))
+        ]
+
+        self.assertEqual(self._walk('/api/properties/properties/?page_size=2'), expected)
+
+    def test_pages_follow_requested_ordering(self):
+        expected = list(Property.objects.order_by('-price').values_list('id', flat=True))
+
+        self.assertEqual(self._walk('/api/properties/properties/?page_size=2&ordering=-price'), expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/properties/properties/?cursor=garbage')
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from users.models import User, Rating
+from properties.models import Property
+from properties.utils.ranking import BOOST_OFFSET, expire_boosts, refresh_rank_scores
+
+
+@override_settings(NOTIFICATION_FANOUT_ASYNC=False)
+class RankingTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+        )
+
+    def _property(self, title, **fields):
+        return Property.objects.create(
+            owner=self.owner,
+            title=title,
+            description='A test property',
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location='123 Main St, Lagos',
+            **fields,
+        )
+
+    def _feed(self):
+        return list(Property.objects.order_by('-rank_score', 'id').values_list('title', flat=True))
+
+    def test_newer_listings_rank_higher(self):
+        self._property('Old')
+        Property.objects.update(created_at=timezone.now() - timedelta(days=3))
+        refresh_rank_scores(Property.objects.all())
+        self._property('New')
+
+        self.assertEqual(self._feed(), ['New', 'Old'])
+
+    def test_views_outweigh_a_little_recency(self):
+        self._property('Popular')
+        self._property('Fresh')
+        Property.objects.filter(title='Popular').update(views=1000)
+        refresh_rank_scores(Property.objects.filter(title='Popular'))
+
+        self.assertEqual(self._feed(), ['Popular', 'Fresh'])
+
+    def test_boost_ranks_first_until_it_expires(self):
+        boosted = self._property('Boosted', boost_expiry=timezone.now() + timedelta(days=1))
+        self._property('Fresh')
+        self.assertEqual(self._feed(), ['Boosted', 'Fresh'])
+
+        Property.objects.filter(pk=boosted.pk).update(boost_expiry=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(expire_boosts(Property.objects.all()), 1)
+        self.assertEqual(self._feed(), ['Fresh', 'Boosted'])
+        boosted.refresh_from_db()
+        self.assertLess(boosted.rank_score, BOOST_OFFSET)
+
+    def test_expiring_boosts_leaves_other_rows_alone(self):
+        self._property('Active', boost_expiry=timezone.now() + timedelta(days=1))
+        self._property('Plain')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(expire_boosts(Property.objects.all()), 0)
+
+    def test_saving_a_boost_updates_the_score(self):
+        property = self._property('Listing')
+        property.boost_expiry = timezone.now() + timedelta(days=1)
+        property.save(update_fields=['boost_expiry'])
+
+        property.refresh_from_db()
+        self.assertGreaterEqual(property.rank_score, BOOST_OFFSET)
+
+    def test_bookkeeping_saves_do_not_look_up_the_owner(self):
+        property = Property.objects.get(pk=self._property('Listing').pk)
+        property.amenity_mask = 1
+        property.title = 'Renamed'
+
+        with self.assertNumQueries(1):
+            property.save(update_fields=['amenity_mask'])
+        with self.assertNumQueries(1):
+            property.save()
+
+        before = property.rank_score
+        property.views = 1000
+        property.save()
+        self.assertGreater(Property.objects.get(pk=property.pk).rank_score, before)
+
+    def test_command_rescores_recently_rated_owners(self):
+        property = self._property('Listing')
+        rater = User.objects.create_user(
+            email='rater@example.com',
+            username='rater',
+            full_name='Rater',
+            phone_number='+2341234567891',
+        )
+        Rating.objects.create(rater=rater, rated_user=self.owner, score=5)
+        before = Property.objects.get(pk=property.pk).rank_score
+
+        call_command('refresh_rank_scores', stdout=StringIO())
+
+        self.assertGreater(Property.objects.get(pk=property.pk).rank_score, before)
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.models import Property, PropertyMedia, SubscriptionPlan, UserSubscription
+from properties.views import PropertyViewSet
+
+LIST_URL = '/api/properties/properties/'
+
+
+@override_settings(NOTIFICATION_FANOUT_ASYNC=False, PROPERTY_VIEW_COUNTER_ASYNC=False)
+class PropertyResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+            user_type='OWNER',
+            is_active=True,
+        )
+        self.viewer = User.objects.create_user(
+            email='viewer@example.com',
+            username='viewer',
+            full_name='Viewer',
+            phone_number='+2341234567891',
+            is_active=True,
+        )
+        self.property = Property.objects.create(
+            owner=self.owner,
+            title='Test Property',
+            description='A test property',
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location='123 Main St, Lagos',
+        )
+        self.detail_url = f'{LIST_URL}{self.property.id}/'
+
+    def _subscribe(self):
+        plan = SubscriptionPlan.objects.create(
+            name='Basic',
+            plan_type='BASIC',
+            price=1000,
+            duration_days=30,
+            description='Basic plan',
+            max_views=100,
+        )
+        return UserSubscription.objects.create(
+            user=self.viewer,
+            plan=plan,
+            end_date=timezone.now() + timedelta(days=30),
+        )
+
+    def test_warm_anonymous_list_needs_no_queries(self):
+        first = self.client.get(LIST_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(LIST_URL)
+
+        self.assertEqual(second.json(), first.json())
+
+    def test_list_pages_are_cached_per_tier(self):
+        self.client.get(LIST_URL)
+        self._subscribe()
+        self.client.force_authenticate(self.viewer)
+
+        response = self.client.get(LIST_URL)
+
+        # Subscribers see the fields the public page hides
+        self.assertIn('owner', response.json()['results'][0])
+
+    def test_saving_a_property_invalidates_list_pages(self):
+        self.client.get(LIST_URL)
+        self.property.title = 'Renamed'
+        self.property.save()
+
+        response = self.client.get(LIST_URL)
+
+        self.assertEqual(response.json()['results'][0]['title'], 'Renamed')
+
+    def test_deleting_a_property_invalidates_cached_responses(self):
+        self._subscribe()
+        self.client.force_authenticate(self.viewer)
+        self.client.get(LIST_URL)
+        self.client.get(self.detail_url)
+        self.property.delete()
+
+        self.assertEqual(self.client.get(LIST_URL).json()['results'], [])
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_warm_detail_skips_the_property_lookup(self):
+        self._subscribe()
+        self.client.force_authenticate(self.viewer)
+        first = self.client.get(self.detail_url)
+
+        with mock.patch.object(PropertyViewSet, 'get_object') as get_object:
+            second = self.client.get(self.detail_url)
+
+        get_object.assert_not_called()
+        self.assertEqual(second.json(), first.json())
+
+    def test_detail_is_cached_per_tier(self):
+        Property.objects.filter(pk=self.property.pk).update(is_exclusive=True)
+        subscription = self._subscribe()
+        self.client.force_authenticate(self.viewer)
+        self.assertIn('error', self.client.get(self.detail_url).json())
+        subscription.plan.exclusive_access = True
+        subscription.plan.save()
+
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(response.json()['title'], 'Test Property')
+
+    def test_new_media_invalidates_the_detail(self):
+        self._subscribe()
+        self.client.force_authenticate(self.viewer)
+        self.client.get(self.detail_url)
+        PropertyMedia.objects.create(
+            property=self.property,
+            media_type='IMAGE',
+            file_url='https://cdn.example.com/front.jpg',
+            status='READY',
+        )
+
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(len(response.json()['media']), 1)
+
+    @override_settings(PROPERTY_RESPONSE_CACHE=False)
+    def test_cache_can_be_disabled(self):
+        self.client.get(LIST_URL)
+
+        with self.assertNumQueries(3):
+            self.client.get(LIST_URL)
@@ -0,0 +1,104 @@
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.models import Property
+from properties.utils.search import get_search_backend
+
+SEARCH_URL = '/api/properties/properties/'
+
+
+class PropertySearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            full_name='Owner',
+            phone_number='+2341234567890',
+        )
+        self.in_title = self._create('Serviced apartment in Lekki', 'Quiet street, close to the beach.', 'Lagos')
+        self.in_description = self._create('Three bedroom flat', 'A serviced apartment with a pool, near Lekki.', 'Lagos')
+        self.in_location = self._create('Detached duplex', 'Spacious family home.', 'Lekki Phase 1, Lagos')
+        self.unrelated = self._create('Bungalow', 'Large compound with a garden.', 'Wuse, Abuja')
+
+    def _create(self, title, description, location):
+        return Property.objects.create(
+            owner=self.user,
+            title=title,
+            description=description,
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location=location,
+        )
+
+    def _search(self, query):
+        response = self.client.get(SEARCH_URL, {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self._search('lekki'), [self.in_title.id, self.in_location.id, self.in_description.id])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self._search('serviced apartment'), [self.in_title.id, self.in_description.id])
+
+    def test_prefix_match(self):
+        self.assertEqual(self._search('bunga'), [self.unrelated.id])
+
+    def test_typo_tolerance(self):
+        self.assertEqual(self._search('bungalo garden'), [self.unrelated.id])
+        self.assertEqual(self._search('apartmnt'), [self.in_title.id, self.in_description.id])
+
+    def test_no_match(self):
+        self.assertEqual(self._search('penthouse'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.unrelated.title = 'Penthouse'
+        self.unrelated.save()
+        self.assertEqual(self._search('penthouse'), [self.unrelated.id])
+        self.assertEqual(self._search('bungalow'), [])
+
+        self.unrelated.delete()
+        self.assertEqual(self._search('penthouse'), [])
+
+    def test_search_combines_with_filters_and_pagination(self):
+        response = self.client.get(SEARCH_URL, {'search': 'lagos', 'location': 'lekki', 'page_size': 1})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.in_location.id])
+
+        response = self.client.get(SEARCH_URL, {'search': 'lekki', 'page_size': 2})
+        ids = [item['id'] for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.in_title.id, self.in_location.id, self.in_description.id])
+
+    def test_filters_see_matches_beyond_the_best_ranked(self):
+        Property.objects.bulk_create(
+            Property(
+                owner=self.user, title=f'Lekki terrace {i}', description='Lekki, Lekki, Lekki.', property_type='HOUSE',
+                listing_type='SALE', price=250000, size=150, location='Lekki, Lagos',
+            )
+            for i in range(600)
+        )
+        shortlet = self._create('Studio', 'A short walk from Lekki.', 'Lagos')
+        Property.objects.filter(pk=shortlet.pk).update(listing_type='SHORTLET')
+        get_search_backend().rebuild()
+
+        response = self.client.get(SEARCH_URL, {'search': 'lekki', 'listing_type': 'SHORTLET'})
+
+        self.assertEqual([item['id'] for item in response.data['results']], [shortlet.id])
+
+    def test_ranks_stay_in_the_database(self):
+        Property.objects.bulk_create(
+            Property(
+                owner=self.user, title=f'Lekki terrace {i}', description='Close to Lekki.', property_type='HOUSE',
+                listing_type='SALE', price=250000, size=150, location='Lagos',
+            )
+            for i in range(50)
+        )
+        get_search_backend().rebuild()
+
+        queryset = get_search_backend().search(Property.objects.all(), 'lekki')
+        _, params = queryset.query.sql_with_params()
+
+        self.assertEqual(len(queryset), 53)
+        self.assertEqual(params, ('("lekki"*)',))
@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import json
+from unittest import mock
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.models import PaymentEvent, Property, SubscriptionPlan, Transaction, UserSubscription
+from properties.utils.paystack import PaystackService
+from properties.utils.settlement import settlement
+
+SECRET_KEY = 'sk_test_settlement'
+WEBHOOK_URL = '/api/properties/paystack/webhook/'
+VERIFY_URL = '/api/properties/properties/verify-payment/'
+
+
+@override_settings(
+    NOTIFICATION_FANOUT_ASYNC=False, PAYMENT_SETTLEMENT_ASYNC=False, PAYSTACK_SECRET_KEY=SECRET_KEY
+)
+class PaymentSettlementTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='buyer@example.com',
+            username='buyer',
+            full_name='Buyer',
+            phone_number='+2341234567890',
+            is_active=True,
+        )
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic',
+            plan_type='BASIC',
+            price=1000,
+            duration_days=30,
+            description='Basic plan',
+        )
+        self.payment = Transaction.objects.create(
+            user=self.user,
+            amount=1000,
+            transaction_type='SUBSCRIPTION',
+            reference='ref-1',
+            paystack_reference='ref-1',
+        )
+
+    def _charge(self, reference='ref-1', amount=100000, **data):
+        return {
+            'event': 'charge.success',
+            'data': {
+                'status': 'success',
+                'reference': reference,
+                'amount': amount,
+                'metadata': {'type': 'SUBSCRIPTION', 'plan_id': self.plan.id, 'user_id': self.user.id},
+                **data,
+            }
+        }
+
+    def _post(self, payload, secret_key=SECRET_KEY):
+        body = json.dumps(payload).encode()
+        signature = hmac.new(secret_key.encode(), body, hashlib.sha512).hexdigest()
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.generic(
+                'POST', WEBHOOK_URL, body, content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature
+            )
+
+    def test_webhook_settles_the_payment(self):
+        response = self._post(self._charge())
+
+        self.assertEqual(response.status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'SUCCESS')
+        self.assertEqual(self.payment.subscription.user, self.user)
+        self.assertEqual(PaymentEvent.objects.get().status, 'PROCESSED')
+
+    def test_forged_signature_is_rejected(self):
+        response = self._post(self._charge(), secret_key='sk_forged')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_redelivered_event_settles_once(self):
+        self._post(self._charge())
+        self._post(self._charge())
+
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+        self.assertEqual(UserSubscription.objects.filter(user=self.user).count(), 1)
+
+    def test_settling_again_does_nothing(self):
+        self._post(self._charge())
+
+        self.assertFalse(settlement.settle(self._charge()['data']))
+        self.assertEqual(UserSubscription.objects.filter(user=self.user).count(), 1)
+
+    def test_amount_mismatch_fails_the_payment(self):
+        self._post(self._charge(amount=100))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'FAILED')
+        self.assertFalse(UserSubscription.objects.exists())
+
+    def test_fractional_amount_settles(self):
+        Transaction.objects.filter(pk=self.payment.pk).update(amount='19.99')
+
+        self._post(self._charge(amount=1999))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'SUCCESS')
+
+    def test_kobo_amounts_are_rounded_not_truncated(self):
+        for amount, kobo in [('19.99', 1999), ('4.35', 435), ('1.15', 115), (1000, 100000)]:
+            with self.subTest(amount=amount):
+                self.assertEqual(PaystackService().convert_to_kobo(amount), kobo)
+
+    def test_boost_payment(self):
+        property = Property.objects.create(
+            owner=self.user,
+            title='Test Property',
+            description='A test property',
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location='123 Main St, Lagos',
+        )
+        Transaction.objects.create(
+            user=self.user, amount=1500, transaction_type='BOOST', reference='ref-boost', property=property
+        )
+
+        self._post(self._charge(
+            reference='ref-boost', amount=150000,
+            metadata={'type': 'BOOST', 'property_id': property.id, 'duration_days': 3}
+        ))
+
+        property.refresh_from_db()
+        self.assertTrue(property.is_boosted())
+
+    def test_event_for_unknown_transaction_is_kept_for_retry(self):
+        self._post(self._charge(reference='ref-2'))
+        event = PaymentEvent.objects.get()
+        self.assertEqual(event.status, 'FAILED')
+
+        Transaction.objects.create(
+            user=self.user, amount=1000, transaction_type='SUBSCRIPTION', reference='ref-2'
+        )
+        settlement.process(event.pk)
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('PROCESSED', 2))
+        self.assertEqual(Transaction.objects.get(reference='ref-2').status, 'SUCCESS')
+
+    def test_verify_payment_makes_no_gateway_call(self):
+        self.client.force_authenticate(self.user)
+
+        with mock.patch.object(PaystackService, '_request') as gateway:
+            pending = self.client.get(VERIFY_URL, {'reference': 'ref-1'})
+            self._post(self._charge())
+            verified = self.client.get(VERIFY_URL, {'reference': 'ref-1'})
+
+        gateway.assert_not_called()
+        self.assertEqual(pending.status_code, 202)
+        self.assertEqual(verified.status_code, 200)
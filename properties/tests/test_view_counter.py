@@ -0,0 +1,132 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from users.models import User
+from properties.models import Property, PropertyView
+from properties.utils.view_counter import ViewCounter
+
+
+def create_property(owner, **kwargs):
+    data = {
+        'title': 'Test Property',
+        'description': 'A test property',
+        'property_type': 'HOUSE',
+        'listing_type': 'SALE',
+        'price': 250000,
+        'size': 150,
+        'location': '123 Main St, Lagos',
+    }
+    data.update(kwargs)
+    return Property.objects.create(owner=owner, **data)
+
+
+@override_settings(PROPERTY_VIEW_COUNTER_ASYNC=True, PROPERTY_VIEW_FLUSH_INTERVAL=3600)
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='viewer@example.com',
+            username='viewer',
+            full_name='Viewer',
+            phone_number='+2341234567890',
+        )
+        self.property = create_property(self.user)
+        self.counter = ViewCounter()
+
+    def test_views_are_buffered_until_flush(self):
+        self.counter.record(self.property.id, self.user.id)
+        self.counter.record(self.property.id)
+
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.views, 0)
+        self.assertEqual(self.counter.pending(self.property.id), 2)
+        self.assertEqual(self.counter.pending_for_user(self.user.id, timezone.now() - timedelta(minutes=1)), 1)
+
+        self.counter.flush()
+
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.views, 2)
+        self.assertIsNotNone(self.property.last_viewed)
+        self.assertEqual(self.counter.pending(self.property.id), 0)
+        self.assertEqual(PropertyView.objects.filter(user=self.user, property=self.property).count(), 1)
+
+    def test_flush_adds_to_concurrent_writes(self):
+        self.counter.record(self.property.id)
+        Property.objects.filter(pk=self.property.pk).update(views=10)
+
+        self.counter.flush()
+
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.views, 11)
+
+    def test_views_of_deleted_rows_do_not_block_the_flush(self):
+        other = create_property(self.user, title='Deleted')
+        self.counter.record(other.id, self.user.id)
+        self.counter.record(self.property.id, self.user.id)
+        other.delete()
+
+        self.counter.flush()
+
+        self.assertEqual(PropertyView.objects.get().property, self.property)
+        self.assertEqual(self.counter.pending(self.property.id), 0)
+
+    @override_settings(PROPERTY_VIEW_FLUSH_RETRIES=1)
+    def test_failing_batch_is_dropped_after_retries(self):
+        self.counter.record(self.property.id, self.user.id)
+
+        with mock.patch.object(PropertyView.objects, 'bulk_create', side_effect=DatabaseError('boom')):
+            with self.assertLogs('properties.utils.view_counter', 'ERROR'):
+                self.counter.flush()
+                self.assertEqual(self.counter.pending(self.property.id), 1)
+                self.counter.flush()
+        self.assertEqual(self.counter.pending(self.property.id), 0)
+
+        self.counter.record(self.property.id, self.user.id)
+        self.counter.flush()
+        self.assertEqual(PropertyView.objects.count(), 1)
+
+    @override_settings(PROPERTY_VIEW_FLUSH_RETRIES=1)
+    def test_views_recorded_after_a_failing_batch_are_not_dropped_with_it(self):
+        bad = create_property(self.user, title='Bad')
+        bulk_create = PropertyView.objects.bulk_create
+
+        def fail_for_bad(views, **kwargs):
+            if any(view.property_id == bad.id for view in views):
+                raise DatabaseError('boom')
+            return bulk_create(views, **kwargs)
+
+        with mock.patch.object(PropertyView.objects, 'bulk_create', side_effect=fail_for_bad):
+            with self.assertLogs('properties.utils.view_counter', 'ERROR'):
+                self.counter.record(bad.id, self.user.id)
+                self.counter.flush()
+                self.counter.record(self.property.id, self.user.id)
+                self.assertEqual(self.counter.pending(bad.id) + self.counter.pending(self.property.id), 2)
+                self.counter.flush()
+
+        self.assertEqual(PropertyView.objects.get().property, self.property)
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.views, 1)
+        self.assertEqual(self.counter.pending(bad.id), 0)
+
+
+@override_settings(PROPERTY_VIEW_COUNTER_ASYNC=False)
+class PropertyRetrieveViewCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='viewer@example.com',
+            username='viewer',
+            full_name='Viewer',
+            phone_number='+2341234567890',
+        )
+        self.property = create_property(self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_retrieve_records_view(self):
+        response = self.client.get(f'/api/properties/properties/{self.property.id}/')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.views, 1)
+        self.assertEqual(PropertyView.objects.filter(user=self.user).count(), 1)
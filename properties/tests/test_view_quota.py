@@ -0,0 +1,106 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from django.utils import timezone
+from users.models import User
+from properties.models import Property, PropertyView, SubscriptionPlan, UserSubscription
+from properties.utils.quota import view_quota, FREE_TIER_MONTHLY_VIEWS
+
+
+@override_settings(PROPERTY_VIEW_COUNTER_ASYNC=False)
+class ViewQuotaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='viewer@example.com',
+            username='viewer',
+            full_name='Viewer',
+            phone_number='+2341234567890',
+        )
+        self.property = Property.objects.create(
+            owner=self.user,
+            title='Test Property',
+            description='A test property',
+            property_type='HOUSE',
+            listing_type='SALE',
+            price=250000,
+            size=150,
+            location='123 Main St, Lagos',
+        )
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic',
+            plan_type='BASIC',
+            price=1000,
+            duration_days=30,
+            description='Basic plan',
+            max_views=10,
+        )
+
+    def _subscribe(self):
+        return UserSubscription.objects.create(
+            user=self.user,
+            plan=self.plan,
+            end_date=timezone.now() + timedelta(days=30),
+        )
+
+    def test_free_tier_is_seeded_from_history(self):
+        for _ in range(FREE_TIER_MONTHLY_VIEWS - 1):
+            PropertyView.objects.create(user=self.user, property=self.property)
+
+        self.assertTrue(view_quota.consume(self.user, None))
+        self.assertFalse(view_quota.consume(self.user, None))
+
+    def test_consume_does_not_rescan_history(self):
+        view_quota.consume(self.user, None)
+
+        with self.assertNumQueries(0):
+            view_quota.consume(self.user, None)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_process_local_cache_counts_from_database(self):
+        for _ in range(FREE_TIER_MONTHLY_VIEWS - 1):
+            self.assertTrue(view_quota.consume(self.user, None))
+            PropertyView.objects.create(user=self.user, property=self.property)
+
+        # Another process has counted these views in its own cache
+        cache.set(view_quota._key(self.user.id, view_quota._period(None)[0]), 0)
+
+        self.assertTrue(view_quota.consume(self.user, None))
+        PropertyView.objects.create(user=self.user, property=self.property)
+        self.assertFalse(view_quota.consume(self.user, None))
+
+    def test_subscription_has_its_own_period(self):
+        for _ in range(FREE_TIER_MONTHLY_VIEWS):
+            self.assertTrue(view_quota.consume(self.user, None))
+        self.assertFalse(view_quota.consume(self.user, None))
+
+        self._subscribe()
+        subscription = view_quota.get_active_subscription(self.user)
+
+        self.assertTrue(view_quota.consume(self.user, subscription))
+
+    def test_unlimited_plan(self):
+        self.plan.max_views = None
+        self.plan.save()
+        subscription = self._subscribe()
+
+        for _ in range(FREE_TIER_MONTHLY_VIEWS * 2):
+            self.assertTrue(view_quota.consume(self.user, subscription))
+
+    def test_invalidate_reseeds_from_database(self):
+        view_quota.consume(self.user, None)
+        view_quota.invalidate(self.user)
+        for _ in range(FREE_TIER_MONTHLY_VIEWS):
+            PropertyView.objects.create(user=self.user, property=self.property)
+
+        self.assertFalse(view_quota.consume(self.user, None))
+
+    def test_retrieve_enforces_free_tier_limit(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/api/properties/properties/{self.property.id}/'
+
+        for _ in range(FREE_TIER_MONTHLY_VIEWS):
+            self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(client.get(url).status_code, 403)
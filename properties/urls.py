@@ -1,13 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PropertyViewSet
+from .views import PaystackWebhookView, PropertyViewSet, SavedSearchViewSet
 
 # Create a router instance
 router = DefaultRouter()
 router.register(r'properties', PropertyViewSet, basename='property')
+router.register(r'saved-searches', SavedSearchViewSet, basename='saved-search')
 
 # Define urlpatterns
 urlpatterns = [
     # Include all router-generated URLs
     path('', include(router.urls)),
+    path('paystack/webhook/', PaystackWebhookView.as_view(), name='paystack-webhook'),
 ]
\ No newline at end of file
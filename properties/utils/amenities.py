@@ -0,0 +1,91 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, Max, OuterRef
+
+from ..models import Amenity, Property, PropertyAmenity
+
+
+def normalize_amenity(name):
+    """
+    The canonical form of an amenity name: lower case, single spaces.
+    """
+    return ' '.join(name.lower().split())
+
+
+def get_amenities(names, create=False):
+    """
+    The dictionary entries for amenity names, in any spelling that
+    normalizes to them. Unknown names are skipped, or added when ``create``.
+    """
+    names = {normalize_amenity(name) for name in names} - {''}
+    amenities = list(Amenity.objects.filter(name__in=names))
+    if create:
+        amenities += [_create_amenity(name) for name in names - {amenity.name for amenity in amenities}]
+    return amenities
+
+
+def _create_amenity(name):
+    # New amenities take the next free bit while any remain
+    try:
+        with transaction.atomic():
+            last_bit = Amenity.objects.aggregate(last_bit=Max('bit'))['last_bit']
+            bit = 0 if last_bit is None else last_bit + 1
+            return Amenity.objects.create(name=name, bit=bit if bit < Amenity.MASK_BITS else None)
+    except IntegrityError:
+        # A concurrent request added the name, or took the bit; do without one
+        return Amenity.objects.get_or_create(name=name)[0]
+
+
+def amenity_mask(amenities):
+    """
+    The ``Property.amenity_mask`` bits of the amenities that have one.
+    """
+    mask = 0
+    for amenity in amenities:
+        if amenity.bit is not None:
+            mask |= 1 << amenity.bit
+    return mask
+
+
+def refresh_amenity_mask(property_id):
+    """
+    Recompute a property's mask from its amenity rows.
+    """
+    bits = PropertyAmenity.objects.filter(
+        property_id=property_id, amenity__bit__isnull=False
+    ).values_list('amenity__bit', flat=True)
+    Property.objects.filter(pk=property_id).update(amenity_mask=sum(1 << bit for bit in bits))
+
+
+def set_amenities(property, names):
+    """
+    Replace the amenities of a property, adding new names to the dictionary.
+    The mask on ``property`` is updated too, so a later save keeps it.
+    """
+    amenities = get_amenities(names, create=True)
+    property.amenities.exclude(amenity__in=amenities).delete()
+    existing = set(property.amenities.values_list('amenity_id', flat=True))
+    for amenity in amenities:
+        if amenity.id not in existing:
+            PropertyAmenity.objects.create(property=property, amenity=amenity)
+    property.amenity_mask = amenity_mask(amenities)
+
+
+def filter_by_amenities(queryset, names):
+    """
+    Narrow a property queryset to those with every amenity in ``names``.
+
+    Common amenities are tested together as one bitwise predicate on
+    ``amenity_mask``; only amenities without a bit need a subquery each.
+    """
+    names = {normalize_amenity(name) for name in names} - {''}
+    amenities = get_amenities(names)
+    if len(amenities) < len(names):
+        # Nothing has an amenity no property was ever given
+        return queryset.none()
+    mask = amenity_mask(amenities)
+    if mask:
+        queryset = queryset.alias(matched_amenities=F('amenity_mask').bitand(mask)).filter(matched_amenities=mask)
+    for amenity in amenities:
+        if amenity.bit is None:
+            queryset = queryset.filter(Exists(PropertyAmenity.objects.filter(property=OuterRef('pk'), amenity=amenity)))
+    return queryset
@@ -1,5 +1,5 @@
 import os
-import tempfile
+import logging
 from appwrite.client import Client
 from appwrite.services.storage import Storage
 from appwrite.input_file import InputFile
@@ -9,6 +9,8 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class AppwriteHelper:
     def __init__(self):
         self.client = Client()
@@ -16,28 +18,37 @@ class AppwriteHelper:
         self.client.set_project(os.getenv('APPWRITE_PROJECT_ID'))
         self.client.set_key(os.getenv('APPWRITE_API_KEY'))
         self.storage = Storage(self.client)
-        print(f"{os.getenv('APPWRITE_ENDPOINT')} {os.getenv('APPWRITE_BUCKET_ID')} {os.getenv('APPWRITE_API_KEY')} {os.getenv('APPWRITE_PROJECT_ID')}")
-    
+
     def upload_file(self, file, user_id):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.name)[1]) as temp_file:
-            for chunk in file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-        
-        try:
-            input_file = InputFile.from_path(temp_file_path)
-            result = self.storage.create_file(
-                bucket_id=os.getenv('APPWRITE_BUCKET_ID'),
-                file_id=ID.unique(),
-                file=input_file
-            )
-
-            print("File uploaded successfully:", result)
-            print(f"{os.getenv('APPWRITE_ENDPOINT')} {os.getenv('APPWRITE_BUCKET_ID')} {os.getenv('APPWRITE_API_KEY')} {os.getenv('APPWRITE_PROJECT_ID')}")
-            
-            file_url = f"{os.getenv('APPWRITE_ENDPOINT')}/storage/buckets/{os.getenv('APPWRITE_BUCKET_ID')}/files/{result['$id']}/view?project={os.getenv('APPWRITE_PROJECT_ID')}"
-            return file_url
-            
-        finally:
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
\ No newline at end of file
+        """
+        Upload a Django ``UploadedFile``. Files Django already spooled to disk
+        are read from there in chunks rather than copied to another temp file.
+        """
+        if hasattr(file, 'temporary_file_path'):
+            return self.upload_path(file.temporary_file_path(), file.name)
+        file.seek(0)
+        return self._upload(InputFile.from_bytes(file.read(), os.path.basename(file.name), file.content_type))
+
+    def upload_path(self, path, filename=None):
+        """
+        Upload a file on disk; the SDK streams anything larger than its chunk size.
+        """
+        input_file = InputFile.from_path(path)
+        if filename:
+            input_file.filename = os.path.basename(filename)
+        return self._upload(input_file)
+
+    def upload_bytes(self, data, filename, content_type=None):
+        return self._upload(InputFile.from_bytes(data, os.path.basename(filename), content_type))
+
+    def _upload(self, input_file):
+        result = self.storage.create_file(
+            bucket_id=os.getenv('APPWRITE_BUCKET_ID'),
+            file_id=ID.unique(),
+            file=input_file
+        )
+        logger.info(f"Uploaded {input_file.filename} to Appwrite as {result['$id']}")
+        return self.file_url(result['$id'])
+
+    def file_url(self, file_id):
+        return f"{os.getenv('APPWRITE_ENDPOINT')}/storage/buckets/{os.getenv('APPWRITE_BUCKET_ID')}/files/{file_id}/view?project={os.getenv('APPWRITE_PROJECT_ID')}"
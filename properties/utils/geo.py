@@ -0,0 +1,109 @@
+import math
+from typing import List, Tuple
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a coordinate as a geohash. Nearby points share long prefixes, so a
+    B-tree index on the geohash doubles as a grid index.
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, char, even = [], 0, 0, True
+    while len(geohash) < precision:
+        value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        char <<= 1
+        if value >= mid:
+            char |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            geohash.append(GEOHASH_ALPHABET[char])
+            bits, char = 0, 0
+    return ''.join(geohash)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Height and width in degrees of a geohash cell at the given precision.
+    """
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_cells(min_lat: float, min_lng: float, max_lat: float, max_lng: float, max_cells: int = 16) -> List[str]:
+    """
+    Geohash cells that together cover a bounding box, using the finest
+    precision that needs at most ``max_cells`` cells.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        columns = math.floor(max_lng / width) - math.floor(min_lng / width) + 1
+        if rows * columns <= max_cells or precision == 1:
+            break
+
+    cells = set()
+    for row in range(rows):
+        lat = min(max_lat, (math.floor(min_lat / height) + row + 0.5) * height)
+        for column in range(columns):
+            lng = min(max_lng, (math.floor(min_lng / width) + column + 0.5) * width)
+            cells.add(encode_geohash(max(-90.0, min(90.0, lat)), max(-180.0, min(180.0, lng)), precision))
+    return sorted(cells)
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, min_lng, max_lat, max_lng) of the box enclosing a circle.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    lng_delta = 180.0 if cos_lat < 1e-9 else min(180.0, lat_delta / cos_lat)
+    return (
+        max(-90.0, latitude - lat_delta),
+        max(-180.0, longitude - lng_delta),
+        min(90.0, latitude + lat_delta),
+        min(180.0, longitude + lng_delta),
+    )
+
+
+def geohash_filter(min_lat: float, min_lng: float, max_lat: float, max_lng: float, field: str = 'geohash') -> Q:
+    """
+    Index-friendly filter for rows inside a bounding box: a prefix range per
+    covering geohash cell, refined by the exact coordinate bounds.
+    """
+    cells = Q()
+    for cell in covering_cells(min_lat, min_lng, max_lat, max_lng):
+        # '{' sorts right after 'z', the last geohash character
+        cells |= Q(**{f'{field}__gte': cell, f'{field}__lt': cell + '{'})
+    return cells & Q(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+
+
+def distance_km(latitude: float, longitude: float):
+    """
+    Haversine distance in kilometres from a point to each row's coordinates,
+    as a database expression.
+    """
+    lat = Radians(Cast(F('latitude'), FloatField()))
+    lng = Radians(Cast(F('longitude'), FloatField()))
+    origin_lat = Value(math.radians(latitude), output_field=FloatField())
+    origin_lng = Value(math.radians(longitude), output_field=FloatField())
+    a = (
+        Power(Sin((lat - origin_lat) / 2), 2)
+        + Cos(origin_lat) * Cos(lat) * Power(Sin((lng - origin_lng) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
@@ -1,53 +1,216 @@
 import requests
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
 from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
 from typing import Optional, Dict, Any, Tuple
 import logging
 
+from ..models import GeocodedAddress
+
 logger = logging.getLogger(__name__)
 
+# Distinguishes "not cached" from a cached "address not found"
+MISSING = object()
+
+
+def normalize_address(address: str) -> str:
+    """
+    Cache key for an address: case, accents, spacing and punctuation around
+    the parts are ignored, so "Lekki Phase 1 , Lagos." and "lekki phase 1, lagos"
+    share an entry.
+    """
+    address = unicodedata.normalize('NFKD', address)
+    address = ''.join(char for char in address if not unicodedata.combining(char)).lower()
+    parts = [re.sub(r'\s+', ' ', part).strip(' .;') for part in address.split(',')]
+    return ', '.join(part for part in parts if part)[:255]
+
+
+class GeocodingCache:
+    """
+    Two-tier cache of geocoding results.
+
+    The first tier is an in-process LRU with a TTL, the second the
+    ``GeocodedAddress`` table shared by every worker. Concurrent lookups of
+    the same address are coalesced so the provider is called once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'GEOCODING_CACHE_SIZE', 1024)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'GEOCODING_CACHE_TTL', 60 * 60 * 24 * 30)
+
+    @property
+    def negative_ttl(self):
+        # Addresses the provider could not find are retried sooner
+        return getattr(settings, 'GEOCODING_NEGATIVE_CACHE_TTL', 60 * 60 * 24)
+
+    @property
+    def wait_timeout(self):
+        return getattr(settings, 'GEOCODING_TIMEOUT', 5) * 2
+
+    def get_or_fetch(self, address: str, fetch):
+        """
+        Cached result for an address, calling ``fetch(address)`` on a miss.
+
+        ``fetch`` returns the result, None when the address does not exist, or
+        raises when the provider failed; failures are not cached.
+        """
+        key = normalize_address(address)
+        if not key:
+            return None
+
+        result = self._get_memory(key)
+        if result is not MISSING:
+            return result
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = _Inflight()
+
+        if not leader:
+            if inflight.done.wait(self.wait_timeout):
+                return inflight.result
+            logger.warning(f"Timed out waiting for geocoding of {address}")
+            return None
+
+        try:
+            result = self._get_stored(key)
+            if result is MISSING:
+                result = fetch(address)
+                self._store(key, result)
+            self._set_memory(key, result)
+            inflight.result = result
+            return result
+        except Exception as e:
+            logger.error(f"Geocoding error for address {address}: {str(e)}")
+            return None
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _expiry(self, result):
+        return self.ttl if result is not None else self.negative_ttl
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            result, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return result
+
+    def _set_memory(self, key, result):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + self._expiry(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_stored(self, key):
+        try:
+            stored = GeocodedAddress.objects.filter(normalized_address=key).first()
+        except DatabaseError as e:
+            logger.warning(f"Geocoding cache table unavailable: {str(e)}")
+            return MISSING
+        if stored is None or stored.updated_at + timedelta(seconds=self._expiry(stored.result)) <= timezone.now():
+            return MISSING
+        return stored.result
+
+    def _store(self, key, result):
+        try:
+            GeocodedAddress.objects.update_or_create(
+                normalized_address=key,
+                defaults={'result': result, 'updated_at': timezone.now()}
+            )
+        except DatabaseError as e:
+            logger.warning(f"Could not store geocoding result for {key}: {str(e)}")
+
+
+class _Inflight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+geocoding_cache = GeocodingCache()
+
+
 class GeocodingService:
     def __init__(self):
         self.api_key = settings.GOOGLE_MAPS_API_KEY
         self.base_url = "https://maps.googleapis.com/maps/api/geocode/json"
+        self.timeout = getattr(settings, 'GEOCODING_TIMEOUT', 5)
 
     def get_location_details(self, address: str) -> Optional[Dict[str, Any]]:
         """
         Get full location details including coordinates from Google Geocoding API.
-        
+        Results are cached per normalized address.
+
         Args:
             address: The address to geocode
-            
+
         Returns:
             Dictionary containing location details or None if geocoding fails
         """
-        try:
-            params = {
-                'address': address,
-                'key': self.api_key
+        details = geocoding_cache.get_or_fetch(address, self._fetch_location_details)
+        return dict(details) if details else None
+
+    def _fetch_location_details(self, address: str) -> Optional[Dict[str, Any]]:
+        """
+        Query the provider. Returns None when the address has no results and
+        raises on errors, so that only definite answers are cached.
+        """
+        params = {
+            'address': address,
+            'key': self.api_key
+        }
+        response = requests.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+
+        data = response.json()
+
+        if data['status'] == 'OK' and data['results']:
+            result = data['results'][0]
+            location = result['geometry']['location']
+
+            return {
+                'latitude': location['lat'],
+                'longitude': location['lng'],
+                'formatted_address': result.get('formatted_address'),
+                'place_id': result.get('place_id'),
             }
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data['status'] == 'OK' and data['results']:
-                result = data['results'][0]
-                location = result['geometry']['location']
-                
-                return {
-                    'latitude': location['lat'],
-                    'longitude': location['lng'],
-                    'formatted_address': result.get('formatted_address'),
-                    'place_id': result.get('place_id'),
-                }
-            
-            logger.warning(f"Geocoding failed for address: {address}. Status: {data['status']}")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Geocoding error for address {address}: {str(e)}")
+
+        if data['status'] == 'ZERO_RESULTS':
+            logger.warning(f"Geocoding found no results for address: {address}")
             return None
 
+        raise ValueError(f"Geocoding failed with status {data['status']}")
+
     def get_coordinates(self, address: str) -> Optional[Tuple[float, float]]:
         """
         Simplified method to just get coordinates.
@@ -0,0 +1,131 @@
+import io
+import math
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+# Longest edge in pixels of each derivative
+VARIANT_SIZES = {
+    'thumbnail': 320,
+    'medium': 800,
+    'large': 1600,
+}
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE_SIZE = 32
+BASE83_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+@dataclass
+class ImageVariant:
+    size: str
+    format: str
+    content_type: str
+    width: int
+    height: int
+    data: bytes
+
+
+def load_image(source):
+    """
+    Open an image from a path or file object, upright and in RGB.
+    """
+    image = Image.open(source)
+    image.draft('RGB', (max(VARIANT_SIZES.values()),) * 2)
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def generate_variants(image):
+    """
+    Resized WebP and JPEG copies of an image for every size in
+    ``VARIANT_SIZES``. Images are never enlarged, so sizes above the original
+    resolution repeat it.
+    """
+    variants = []
+    for size, edge in VARIANT_SIZES.items():
+        resized = image
+        if max(image.size) > edge:
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+        for format_name, (pil_format, content_type, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            variants.append(ImageVariant(size, format_name, content_type, resized.width, resized.height, buffer.getvalue()))
+    return variants
+
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    """
+    Blurhash placeholder of an image (https://blurha.sh), computed on a small
+    sample since the hash only keeps a few low-frequency components.
+    """
+    x_components, y_components = components
+    sample = image.copy()
+    sample.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE), Image.BILINEAR)
+    width, height = sample.size
+    data = sample.tobytes()
+    pixels = [[_srgb_to_linear(channel) for channel in data[offset:offset + 3]] for offset in range(0, len(data), 3)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                basis_y = math.cos(math.pi * j * y / height)
+                for x in range(width):
+                    basis = basis_y * math.cos(math.pi * i * x / width)
+                    pixel = pixels[y * width + x]
+                    r += basis * pixel[0]
+                    g += basis * pixel[1]
+                    b += basis * pixel[2]
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _encode83(0, 1)
+
+    result += _encode83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4
+    )
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, int(math.floor(_sign_pow(value / maximum, 0.5) * 9 + 9.5))))
+            for value in factor
+        )
+        result += _encode83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def _srgb_to_linear(value):
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def _encode83(value, length):
+    return ''.join(BASE83_ALPHABET[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
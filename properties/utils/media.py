@@ -0,0 +1,173 @@
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from ..models import PropertyMedia
+from .images import blurhash, generate_variants, load_image
+from .response_cache import property_cache
+from .storage import get_media_storage
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+
+
+@dataclass
+class StagedFile:
+    """
+    An upload kept alive past the request: a path for files Django spooled
+    to disk, the bytes for the small ones it held in memory.
+    """
+    name: str
+    content_type: Optional[str] = None
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+
+    def discard(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class MediaPipeline:
+    """
+    Uploads property media off the request path.
+
+    ``ingest`` stages the uploaded files and creates ``PENDING`` media rows.
+    Once the transaction commits, a bounded pool of workers pushes the files
+    to the media storage concurrently, along with resized derivatives of
+    images, and flips each row to ``READY`` (or ``FAILED``) with its URLs.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self):
+        return getattr(settings, 'PROPERTY_MEDIA_UPLOAD_WORKERS', 4)
+
+    @property
+    def run_async(self):
+        return getattr(settings, 'PROPERTY_MEDIA_UPLOAD_ASYNC', True)
+
+    @property
+    def staging_dir(self):
+        return getattr(settings, 'PROPERTY_MEDIA_STAGING_DIR', None) or os.path.join(tempfile.gettempdir(), 'property-media')
+
+    def ingest(self, property, files):
+        """
+        Create a pending media row per uploaded file and queue the uploads.
+
+        Returns:
+            The created ``PropertyMedia`` rows
+        """
+        staged = [self.stage(file) for file in files]
+        media = PropertyMedia.objects.bulk_create([
+            PropertyMedia(
+                property=property,
+                media_type='VIDEO' if file.name.lower().endswith(VIDEO_EXTENSIONS) else 'IMAGE',
+                status='PENDING'
+            )
+            for file in staged
+        ])
+        jobs = list(zip([item.id for item in media], staged))
+        transaction.on_commit(lambda: self._submit(jobs))
+        return media
+
+    def stage(self, file):
+        """
+        Keep an upload readable after the request closes its files, without copying it.
+        """
+        name = os.path.basename(file.name)
+        content_type = getattr(file, 'content_type', None)
+        if not hasattr(file, 'temporary_file_path'):
+            file.seek(0)
+            return StagedFile(name=name, content_type=content_type, data=file.read())
+
+        os.makedirs(self.staging_dir, exist_ok=True)
+        path = os.path.join(self.staging_dir, f"{uuid.uuid4().hex}{os.path.splitext(name)[1].lower()}")
+        try:
+            # A hard link shares the spooled file's data; the request may delete its own name
+            os.link(file.temporary_file_path(), path)
+        except OSError:
+            shutil.copyfile(file.temporary_file_path(), path)
+        return StagedFile(name=name, content_type=content_type, path=path)
+
+    def _submit(self, jobs):
+        if not self.run_async:
+            storage = get_media_storage()
+            for media_id, staged in jobs:
+                self.upload(media_id, staged, storage)
+            return
+        executor = self._get_executor()
+        for media_id, staged in jobs:
+            executor.submit(self._run, media_id, staged)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='property-media')
+            return self._executor
+
+    def _run(self, media_id, staged):
+        close_old_connections()
+        try:
+            self.upload(media_id, staged, get_media_storage())
+        finally:
+            close_old_connections()
+
+    def upload(self, media_id, staged, storage):
+        """
+        Push one staged file and its derivatives to the storage and record the
+        outcome on its media row.
+        """
+        try:
+            file_url = storage.save(staged.name, path=staged.path, data=staged.data, content_type=staged.content_type)
+            derivatives = {}
+            if not staged.name.lower().endswith(VIDEO_EXTENSIONS):
+                derivatives = self.derive(staged, storage)
+        except Exception:
+            logger.exception(f"Upload of {staged.name} for media {media_id} failed")
+            self._finish(media_id, status='FAILED')
+            return
+        finally:
+            staged.discard()
+        self._finish(media_id, file_url=file_url, status='READY', **derivatives)
+
+    def _finish(self, media_id, **fields):
+        # Bulk updates skip the signals that refresh cached property responses
+        PropertyMedia.objects.filter(pk=media_id).update(**fields)
+        property_id = PropertyMedia.objects.filter(pk=media_id).values_list('property_id', flat=True).first()
+        if property_id is not None:
+            property_cache.invalidate(property_id)
+
+    def derive(self, staged, storage):
+        """
+        Generate and store the resized variants and blurhash of an image.
+        Failures are logged and leave the media with its original file only.
+        """
+        try:
+            image = load_image(staged.path or io.BytesIO(staged.data))
+            variants = {}
+            stem = os.path.splitext(staged.name)[0]
+            for variant in generate_variants(image):
+                url = storage.save(f"{stem}-{variant.size}.{variant.format}", data=variant.data, content_type=variant.content_type)
+                entry = variants.setdefault(variant.size, {'width': variant.width, 'height': variant.height})
+                entry[variant.format] = url
+            return {'variants': variants, 'blurhash': blurhash(image)}
+        except Exception:
+            logger.exception(f"Could not generate derivatives of {staged.name}")
+            return {}
+
+
+media_pipeline = MediaPipeline()
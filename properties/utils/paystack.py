@@ -1,21 +1,88 @@
+import logging
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+from urllib.parse import quote
+
 import requests
-import os
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def to_kobo(amount):
+    """
+    A Naira amount in kobo, rounded to the nearest kobo. Decimal maths, as
+    float(19.99) * 100 truncates to 1998.
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def build_session():
+    """
+    A ``requests.Session`` with a keep-alive connection pool of
+    ``PAYSTACK_POOL_SIZE`` and retries with jittered exponential backoff.
+
+    Failed connections never reached Paystack and are always retried. Read
+    timeouts and 5xx replies are only retried for lookups, as a retried
+    initialize would open a second transaction.
+    """
+    retries = getattr(settings, 'PAYSTACK_RETRIES', 2)
+    backoff = getattr(settings, 'PAYSTACK_RETRY_BACKOFF', 0.2)
+    retry = Retry(
+        total=retries,
+        allowed_methods=frozenset({'GET'}),
+        status_forcelist=(429, 500, 502, 503, 504),
+        backoff_factor=backoff,
+        backoff_jitter=backoff,
+        backoff_max=2,
+        # Retry-After could hold the worker far longer than the timeouts allow
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=getattr(settings, 'PAYSTACK_POOL_SIZE', 20), max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """
+    The session shared by every Paystack call in the process.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
 
 class PaystackService:
-    def __init__(self):
-        self.secret_key = os.getenv('PAYSTACK_SECRET_KEY')
+    def __init__(self, session=None):
+        self.secret_key = getattr(settings, 'PAYSTACK_SECRET_KEY', None)
         self.headers = {
             'Authorization': f'Bearer {self.secret_key}',
             'Content-Type': 'application/json'
         }
-        self.base_url = 'https://api.paystack.co'
+        self.base_url = getattr(settings, 'PAYSTACK_BASE_URL', 'https://api.paystack.co').rstrip('/')
+        self.timeout = (
+            getattr(settings, 'PAYSTACK_CONNECT_TIMEOUT', 3),
+            getattr(settings, 'PAYSTACK_READ_TIMEOUT', 10)
+        )
+        self.session = session or get_session()
 
     def convert_to_kobo(self, amount):
-        return int(float(amount) * 100)
+        return to_kobo(amount)
 
     def initialize_transaction(self, email, amount, callback_url, metadata=None):
-        url = f"{self.base_url}/transaction/initialize"
         data = {
             'email': email,
             'amount': self.convert_to_kobo(amount),
@@ -24,14 +91,49 @@ class PaystackService:
         if metadata:
             data['metadata'] = metadata
 
-        response = requests.post(url, headers=self.headers, json=data)
-        if response.status_code == 200:
-            return response.json()['data']
-        return None
+        return self._request('POST', '/transaction/initialize', json=data)
 
     def verify_transaction(self, reference):
-        url = f"{self.base_url}/transaction/verify/{reference}"
-        response = requests.get(url, headers=self.headers)
+        return self._request('GET', f"/transaction/verify/{quote(reference, safe='')}")
+
+    def _request(self, method, path, **kwargs):
+        """
+        The ``data`` of a Paystack reply, or None if the call failed.
+        """
+        try:
+            response = self.session.request(
+                method, f"{self.base_url}{path}", headers=self.headers, timeout=self.timeout, **kwargs
+            )
+        except requests.RequestException as e:
+            logger.error(f"Paystack {method} {path} failed: {str(e)}")
+            return None
         if response.status_code == 200:
             return response.json()['data']
-        return None
\ No newline at end of file
+        logger.warning(f"Paystack {method} {path} returned {response.status_code}")
+        return None
+
+
+class AsyncPaystackService:
+    """
+    Awaitable counterpart of ``PaystackService`` for ASGI code. Calls run the
+    pooled client in a worker thread, so they share its connections.
+    """
+
+    def __init__(self, service=None):
+        self.service = service or get_paystack_service()
+
+    async def initialize_transaction(self, email, amount, callback_url, metadata=None):
+        return await sync_to_async(self.service.initialize_transaction, thread_sensitive=False)(
+            email, amount, callback_url, metadata
+        )
+
+    async def verify_transaction(self, reference):
+        return await sync_to_async(self.service.verify_transaction, thread_sensitive=False)(reference)
+
+
+def get_paystack_service():
+    """
+    An instance of the service named by ``PAYSTACK_SERVICE``, or ``PaystackService``.
+    """
+    path = getattr(settings, 'PAYSTACK_SERVICE', None)
+    return (import_string(path) if path else PaystackService)()
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from config.cache import is_cache_shared
+
+from ..models import PropertyView, UserSubscription
+from .view_counter import view_counter
+
+FREE_TIER_MONTHLY_VIEWS = 5
+
+
+class ViewQuotaService:
+    """
+    Tracks how many property details each user has opened in the current
+    quota period.
+
+    Counters live in the cache under one key per user and period, are seeded
+    from ``PropertyView`` on a miss and are consumed with atomic increments,
+    so the limit check does not scan the user's view history. Without a
+    shared cache every process would count on its own, so views are then
+    counted from the database on each check.
+    """
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'VIEW_QUOTA_CACHE_TIMEOUT', 60 * 60 * 24)
+
+    def get_active_subscription(self, user):
+        """
+        Latest active, unexpired subscription of a user with its plan, or None.
+        """
+        if not user.is_authenticated:
+            return None
+        try:
+            return UserSubscription.objects.select_related('plan').filter(
+                user=user,
+                is_active=True,
+                end_date__gt=timezone.now()
+            ).latest('end_date')
+        except UserSubscription.DoesNotExist:
+            return None
+
+    def _period(self, subscription):
+        """
+        Returns the period key, the period start and the view limit (None for unlimited).
+        """
+        if subscription and subscription.is_valid():
+            return f"sub{subscription.id}", subscription.start_date, subscription.plan.max_views
+        start_of_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return f"free{start_of_month:%Y%m}", start_of_month, FREE_TIER_MONTHLY_VIEWS
+
+    def _key(self, user_id, period_key):
+        return f"view_quota:{user_id}:{period_key}"
+
+    def _used(self, user, period_start):
+        used = PropertyView.objects.filter(user=user, viewed_at__gte=period_start).count()
+        return used + view_counter.pending_for_user(user.id, period_start)
+
+    def _seed(self, user, key, period_start):
+        cache.add(key, self._used(user, period_start), self.timeout)
+
+    def consume(self, user, subscription):
+        """
+        Atomically take one view from the user's quota.
+
+        Returns:
+            True if the view is allowed, False if the quota is exhausted
+        """
+        period_key, period_start, limit = self._period(subscription)
+        if limit is None:
+            return True
+        if not is_cache_shared():
+            return self._used(user, period_start) < limit
+
+        key = self._key(user.id, period_key)
+        try:
+            used = cache.incr(key)
+        except ValueError:
+            self._seed(user, key, period_start)
+            used = cache.incr(key)
+
+        if used > limit:
+            cache.decr(key)
+            return False
+        return True
+
+    def invalidate(self, user):
+        """
+        Forget the cached counters of a user, e.g. after a new plan is activated.
+        """
+        subscription_ids = UserSubscription.objects.filter(user=user).values_list('id', flat=True)
+        free_period_key, _, _ = self._period(None)
+        cache.delete_many(
+            [self._key(user.id, free_period_key)]
+            + [self._key(user.id, f"sub{subscription_id}") for subscription_id in subscription_ids]
+        )
+
+
+view_quota = ViewQuotaService()
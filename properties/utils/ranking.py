@@ -0,0 +1,68 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+# Larger than the spread of unboosted scores, so every active boost ranks above them
+BOOST_OFFSET = 10 ** 6
+RANK_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def rank_score(created_at, views, owner_rating, boost_expiry, now=None):
+    """
+    Position of a property in the default feed; higher ranks first.
+
+    Recency counts as the listing time over ``PROPERTY_RANK_DECAY_SECONDS``
+    rather than as an age, so scores never go stale as time passes and only
+    need recomputing when views, the owner's rating or the boost change.
+    Every tenfold increase in views is worth ``PROPERTY_RANK_VIEW_WEIGHT``
+    decay periods of recency, and each star of the owner's rating
+    ``PROPERTY_RANK_RATING_WEIGHT``. An active boost adds ``BOOST_OFFSET``.
+    """
+    now = now or timezone.now()
+    score = (created_at - RANK_EPOCH).total_seconds() / getattr(settings, 'PROPERTY_RANK_DECAY_SECONDS', 60 * 60 * 12)
+    score += getattr(settings, 'PROPERTY_RANK_VIEW_WEIGHT', 1.0) * math.log10(1 + views)
+    score += getattr(settings, 'PROPERTY_RANK_RATING_WEIGHT', 0.25) * float(owner_rating or 0)
+    if boost_expiry and boost_expiry > now:
+        score += BOOST_OFFSET
+    return score
+
+
+def refresh_rank_scores(queryset, batch_size=1000):
+    """
+    Recompute the stored score of every property in a queryset.
+
+    Returns:
+        The number of properties rescored
+    """
+    model = queryset.model
+    now = timezone.now()
+    rows = queryset.order_by().values_list('id', 'created_at', 'views', 'owner__rating', 'boost_expiry')
+    batch, count = [], 0
+    for property_id, created_at, views, owner_rating, boost_expiry in rows.iterator(chunk_size=batch_size):
+        batch.append(model(id=property_id, rank_score=rank_score(created_at, views, owner_rating, boost_expiry, now)))
+        if len(batch) >= batch_size:
+            count += len(batch)
+            model.objects.bulk_update(batch, ['rank_score'])
+            batch = []
+    if batch:
+        count += len(batch)
+        model.objects.bulk_update(batch, ['rank_score'])
+    return count
+
+
+def expire_boosts(queryset, now=None):
+    """
+    Take the boost offset off the properties in a queryset whose boost has
+    run out. Boosted scores are the top of the rank index, so this touches
+    only them.
+
+    Returns:
+        The number of properties that lost their boost
+    """
+    now = now or timezone.now()
+    return queryset.filter(
+        Q(boost_expiry__lte=now) | Q(boost_expiry__isnull=True), rank_score__gte=BOOST_OFFSET
+    ).update(rank_score=F('rank_score') - BOOST_OFFSET)
@@ -0,0 +1,129 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+DELETED = 'deleted'
+GENERATION_KEY = 'property_response:list:generation'
+
+
+def _new_generation():
+    # Random rather than 0, so a generation lost to eviction cannot revive old pages
+    return uuid.uuid4().int % 10 ** 9
+
+
+class PropertyResponseCache:
+    """
+    Read-through cache of serialized ``PropertyViewSet`` responses.
+
+    ``PropertySerializer`` output depends on who is asking, so every entry is
+    keyed by the caller's visibility tier as well as the data it renders:
+
+    - details by property id, version and media size. The version is the
+      property's ``updated_at``, kept under its own key and replaced by the
+      signal handlers whenever the property or its media change, so a warm
+      detail hit needs no query at all.
+    - list pages by absolute URL and a list generation that every property
+      change bumps.
+
+    View counts are left out of invalidation, as they change on every read;
+    cached responses show them as of when they were rendered.
+
+    Callers read the version or generation before querying and store the
+    response under it, so a response built across an invalidation is never
+    served after it.
+    """
+
+    TIER_PUBLIC = 'public'
+    TIER_SUBSCRIBER = 'subscriber'
+    TIER_PREMIUM = 'premium'
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'PROPERTY_RESPONSE_CACHE', True)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'PROPERTY_RESPONSE_CACHE_TTL', 60 * 5)
+
+    @property
+    def list_ttl(self):
+        return getattr(settings, 'PROPERTY_LIST_CACHE_TTL', 30)
+
+    def tier(self, user, subscription):
+        """
+        Visibility tier of a caller, mirroring ``PropertySerializer.to_representation``.
+        """
+        # Anonymous and free-tier callers get the same limited fields
+        if not user.is_authenticated or not subscription or not subscription.is_valid():
+            return self.TIER_PUBLIC
+        return self.TIER_PREMIUM if subscription.plan.exclusive_access else self.TIER_SUBSCRIBER
+
+    def _version_key(self, property_id):
+        return f"property_response:{property_id}:version"
+
+    def _detail_key(self, property_id, version, tier, media_size):
+        return f"property_response:{property_id}:{version}:{tier}:{media_size}"
+
+    def _list_key(self, url, tier, generation):
+        digest = hashlib.md5(url.encode()).hexdigest()
+        return f"property_response:list:{generation}:{tier}:{digest}"
+
+    def get_detail(self, property_id, tier, media_size):
+        """
+        Returns:
+            The cached detail or None, and the version to store a fresh one under
+        """
+        if not self.enabled:
+            return None, None
+        version = cache.get(self._version_key(property_id))
+        if version is None or version == DELETED:
+            return None, version
+        return cache.get(self._detail_key(property_id, version, tier, media_size)), version
+
+    def set_detail(self, instance, version, tier, media_size, data):
+        if not self.enabled or version == DELETED:
+            return
+        if version is None:
+            version = instance.updated_at.isoformat()
+            # Lost to an invalidation that landed since the version was read
+            if not cache.add(self._version_key(instance.pk), version, self.ttl):
+                return
+        timeout = self.ttl
+        if instance.is_boosted():
+            # is_boosted flips when the boost runs out
+            timeout = min(timeout, max(1, int((instance.boost_expiry - timezone.now()).total_seconds())))
+        cache.set(self._detail_key(instance.pk, version, tier, media_size), data, timeout)
+
+    def list_generation(self):
+        return cache.get_or_set(GENERATION_KEY, _new_generation, None)
+
+    def get_list(self, url, tier, generation):
+        if not self.enabled:
+            return None
+        return cache.get(self._list_key(url, tier, generation))
+
+    def set_list(self, url, tier, generation, data):
+        """
+        Store a list page under the generation read before it was queried,
+        so a page computed across an invalidation is never served after it.
+        """
+        if self.enabled:
+            cache.set(self._list_key(url, tier, generation), data, self.list_ttl)
+
+    def invalidate(self, property_id, version=None):
+        """
+        Drop the cached responses showing a property. ``version`` is its new
+        ``updated_at``, or ``DELETED``; changes that leave ``updated_at`` alone,
+        such as new media, get a random version.
+        """
+        cache.set(self._version_key(property_id), version or uuid.uuid4().hex, self.ttl)
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, _new_generation(), None)
+
+
+property_cache = PropertyResponseCache()
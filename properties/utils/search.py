@@ -0,0 +1,218 @@
+import difflib
+import logging
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+MAX_TERMS = 8
+
+
+def tokenize(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+class PropertySearchBackend:
+    """
+    Full-text search over property title, description and location.
+
+    ``search`` narrows a queryset to the matching properties, annotated with a
+    ``search_rank`` (higher is better) and ordered by it. ``index`` and
+    ``remove`` keep the backend's index in step with ``Property`` saves.
+    """
+    fields = ('title', 'description', 'location')
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index(self, property):
+        pass
+
+    def remove(self, property_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class BasicSearchBackend(PropertySearchBackend):
+    """
+    Substring matching on every field, without an index. Used on databases
+    that have no full-text support and as the benchmark baseline.
+    """
+
+    def search(self, queryset, query):
+        for term in tokenize(query):
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class SQLiteSearchBackend(PropertySearchBackend):
+    """
+    SQLite FTS5 index with bm25 ranking and prefix matching. Terms with no
+    match are replaced by the closest spellings in the index vocabulary.
+    """
+    table = 'properties_property_fts'
+    vocabulary_table = 'properties_property_fts_vocab'
+    # bm25 column weights for title, description and location
+    weights = (10.0, 1.0, 5.0)
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+
+        try:
+            expression = self._expression([[term] for term in terms])
+            if not self._matches(expression):
+                expression = self._expression([self._spellings(term) for term in terms])
+                if not self._matches(expression):
+                    return queryset.none()
+        except DatabaseError as e:
+            logger.warning(f"Full-text search unavailable, falling back to substring search: {str(e)}")
+            return BasicSearchBackend().search(queryset, query)
+
+        # Joined against the index, so other filters and the paginator see every match and
+        # bm25 runs in the same statement; the index table drives the join through MATCH.
+        weights = ', '.join(str(weight) for weight in self.weights)
+        return queryset.extra(
+            tables=[self.table],
+            where=[f'{self.table} MATCH %s', f'{self.table}.rowid = "properties_property"."id"'],
+            params=[expression],
+        ).annotate(
+            search_rank=RawSQL(f'-bm25({self.table}, {weights})', (), output_field=FloatField())
+        ).order_by('-search_rank')
+
+    def _expression(self, alternatives):
+        """
+        An FTS5 query matching every term, each given as a list of acceptable
+        spellings that are matched as prefixes; None if a term has none.
+        """
+        if not all(alternatives):
+            return None
+        return ' AND '.join(
+            '(' + ' OR '.join(f'"{spelling}"*' for spelling in spellings) + ')'
+            for spellings in alternatives
+        )
+
+    def _matches(self, expression):
+        """
+        Whether any property matches an FTS5 query.
+        """
+        if expression is None:
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT 1 FROM {self.table} WHERE {self.table} MATCH %s LIMIT 1", [expression])
+            return cursor.fetchone() is not None
+
+    def _spellings(self, term):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT term FROM {self.vocabulary_table} WHERE term >= %s AND term < %s",
+                [term[0], term[0] + '\uffff']
+            )
+            vocabulary = [row[0] for row in cursor.fetchall()]
+        return difflib.get_close_matches(term, vocabulary, n=3, cutoff=0.75)
+
+    def index(self, property):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [property.id])
+                cursor.execute(
+                    f"INSERT INTO {self.table} (rowid, title, description, location) VALUES (%s, %s, %s, %s)",
+                    [property.id, property.title, property.description, property.location]
+                )
+        except DatabaseError as e:
+            logger.warning(f"Could not index property {property.id}: {str(e)}")
+
+    def remove(self, property_id):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [property_id])
+        except DatabaseError as e:
+            logger.warning(f"Could not remove property {property_id} from the search index: {str(e)}")
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description, location) "
+                f"SELECT id, title, description, location FROM properties_property"
+            )
+
+
+class PostgresSearchBackend(PropertySearchBackend):
+    """
+    Weighted ``tsvector`` column with a GIN index, ranked with ``ts_rank``
+    and matched with prefix queries. Falls back to ``pg_trgm`` word
+    similarity on the title and location when nothing matches.
+    """
+    config = 'english'
+    vector_sql = (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+    )
+    similarity_threshold = 0.4
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+
+        tsquery = ' & '.join(f"{term}:*" for term in terms)
+        matched = queryset.filter(
+            RawSQL("search_vector @@ to_tsquery(%s, %s)", (self.config, tsquery), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL("ts_rank(search_vector, to_tsquery(%s, %s))", (self.config, tsquery), output_field=FloatField())
+        ).order_by('-search_rank')
+        if matched[:1].exists():
+            return matched
+
+        return queryset.annotate(
+            search_rank=RawSQL(
+                "word_similarity(%s, coalesce(title, '') || ' ' || coalesce(location, ''))",
+                (' '.join(terms),),
+                output_field=FloatField()
+            )
+        ).filter(search_rank__gte=self.similarity_threshold).order_by('-search_rank')
+
+    def index(self, property):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE properties_property SET search_vector = {self.vector_sql} WHERE id = %s",
+                [property.id]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE properties_property SET search_vector = {self.vector_sql}")
+
+
+_backends = {}
+
+
+def get_search_backend():
+    """
+    The backend named by ``PROPERTY_SEARCH_BACKEND``, or the one matching the
+    default database.
+    """
+    path = getattr(settings, 'PROPERTY_SEARCH_BACKEND', None)
+    if path is None:
+        backend_class = {
+            'sqlite': SQLiteSearchBackend,
+            'postgresql': PostgresSearchBackend,
+        }.get(connection.vendor, BasicSearchBackend)
+    else:
+        backend_class = import_string(path)
+    if backend_class not in _backends:
+        _backends[backend_class] = backend_class()
+    return _backends[backend_class]
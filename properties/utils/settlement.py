@@ -0,0 +1,204 @@
+import hashlib
+import hmac
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.models import Notification
+from ..models import PaymentEvent, Property, PropertyView, SubscriptionPlan, Transaction, UserSubscription
+from .paystack import to_kobo
+from .quota import view_quota
+
+logger = logging.getLogger(__name__)
+
+SETTLED_EVENTS = ('charge.success',)
+
+
+def verify_signature(body, signature):
+    """
+    Whether ``signature`` is the HMAC-SHA512 of a webhook body under the
+    Paystack secret key, as sent in ``X-Paystack-Signature``.
+    """
+    secret_key = getattr(settings, 'PAYSTACK_SECRET_KEY', None)
+    if not secret_key or not signature:
+        return False
+    expected = hmac.new(secret_key.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class SettlementError(Exception):
+    pass
+
+
+class PaymentSettlement:
+    """
+    Settles payments from Paystack webhook events, off the request path.
+
+    The webhook stores each event as a ``PaymentEvent`` and acknowledges it;
+    once that commits, the event is handed to a background worker. Settling
+    locks the ``Transaction`` row and only acts on a pending one, so
+    redelivered events, concurrent workers and retries apply the
+    subscription, pay-per-view or boost exactly once. Events whose
+    settlement failed stay in the table for ``process_payment_events``.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def run_async(self):
+        return getattr(settings, 'PAYMENT_SETTLEMENT_ASYNC', True)
+
+    @property
+    def workers(self):
+        return getattr(settings, 'PAYMENT_SETTLEMENT_WORKERS', 2)
+
+    def receive(self, payload):
+        """
+        Store a webhook event and queue it for settlement.
+
+        Returns:
+            The stored event, or None if it is not one that settles payments
+        """
+        data = payload.get('data') or {}
+        reference = data.get('reference')
+        if payload.get('event') not in SETTLED_EVENTS or not reference:
+            return None
+
+        key = f"{payload['event']}:{reference}"
+        try:
+            with transaction.atomic():
+                event = PaymentEvent.objects.create(
+                    key=key, event=payload['event'], reference=reference, payload=payload
+                )
+        except IntegrityError:
+            # Paystack redelivers events it did not see acknowledged in time
+            event = PaymentEvent.objects.get(key=key)
+            if event.status == 'PROCESSED':
+                return event
+        transaction.on_commit(lambda: self._submit(event.pk))
+        return event
+
+    def _submit(self, event_id):
+        if not self.run_async:
+            self.process(event_id)
+            return
+        self._get_executor().submit(self._run, event_id)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='payment-settlement')
+            return self._executor
+
+    def _run(self, event_id):
+        close_old_connections()
+        try:
+            self.process(event_id)
+        except Exception:
+            logger.exception(f"Settlement of payment event {event_id} failed")
+        finally:
+            close_old_connections()
+
+    def process(self, event_id):
+        """
+        Settle a stored event, recording the outcome on it.
+        """
+        with transaction.atomic():
+            # Writing first takes the row lock, or SQLite's write lock, before anything is read
+            pending = PaymentEvent.objects.filter(pk=event_id).exclude(status='PROCESSED')
+            if not pending.update(attempts=F('attempts') + 1):
+                return
+            event = PaymentEvent.objects.select_for_update().get(pk=event_id)
+            try:
+                with transaction.atomic():
+                    self.settle(event.payload['data'])
+            except (SettlementError, Transaction.DoesNotExist) as e:
+                # The webhook can beat initiate-payment to storing the transaction
+                logger.warning(f"Payment event {event.key} not settled: {str(e)}")
+                event.status, event.error = 'FAILED', str(e)
+            except Exception as e:
+                logger.exception(f"Settlement of payment event {event.key} failed")
+                event.status, event.error = 'FAILED', repr(e)
+            else:
+                event.status, event.error, event.processed_at = 'PROCESSED', '', timezone.now()
+            event.save(update_fields=['status', 'error', 'processed_at'])
+
+    def settle(self, data):
+        """
+        Apply a confirmed Paystack charge to its transaction, unless it was
+        already settled.
+
+        Args:
+            data: The ``data`` of a charge event or of a verify reply
+
+        Returns:
+            True if this call settled the transaction
+        """
+        payment = Transaction.objects.select_for_update().select_related('user').get(reference=data['reference'])
+        if payment.status != 'PENDING':
+            return False
+
+        if data.get('status') != 'success' or int(data.get('amount') or 0) != to_kobo(payment.amount):
+            payment.status = 'FAILED'
+            payment.save(update_fields=['status'])
+            logger.warning(f"Payment {payment.reference} failed or does not match its amount")
+            return True
+
+        metadata = data.get('metadata') or {}
+        user = payment.user
+        payment.status = 'SUCCESS'
+
+        if payment.transaction_type == 'SUBSCRIPTION':
+            plan = SubscriptionPlan.objects.get(id=metadata['plan_id'])
+            start_date = timezone.now()
+            UserSubscription.objects.filter(user=user, is_active=True).update(is_active=False)
+            payment.subscription = UserSubscription.objects.create(
+                user=user,
+                plan=plan,
+                start_date=start_date,
+                end_date=start_date + timedelta(days=plan.duration_days),
+                paystack_reference=payment.reference,
+                is_active=True
+            )
+            transaction.on_commit(lambda: view_quota.invalidate(user))
+            Notification.objects.create(
+                recipient=user,
+                message=f"Your {plan.name} subscription is now active.",
+                notification_type="SUBSCRIPTION_ACTIVE"
+            )
+        elif payment.transaction_type == 'PAY_PER_VIEW':
+            property = Property.objects.get(id=metadata['property_id'])
+            payment.property = property
+            PropertyView.objects.create(user=user, property=property)
+            Notification.objects.create(
+                recipient=user,
+                message=f"You have unlocked details for '{property.title}'.",
+                notification_type="PAY_PER_VIEW"
+            )
+        elif payment.transaction_type == 'BOOST':
+            property = Property.objects.get(id=metadata['property_id'])
+            duration_days = metadata['duration_days']
+            property.boost_expiry = timezone.now() + timedelta(days=duration_days)
+            property.save()
+            payment.property = property
+            Notification.objects.create(
+                recipient=user,
+                message=f"Your listing '{property.title}' has been boosted for {duration_days} days.",
+                notification_type="BOOST_ACTIVE"
+            )
+        else:
+            raise SettlementError(f"Unknown transaction type {payment.transaction_type}")
+
+        payment.save()
+        return True
+
+
+settlement = PaymentSettlement()
@@ -0,0 +1,52 @@
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class MediaStorage:
+    """
+    Destination for uploaded property media. ``save`` receives a staged file,
+    either a path on local disk or the raw bytes, and returns its public URL.
+    """
+
+    def save(self, name, path=None, data=None, content_type=None):
+        raise NotImplementedError
+
+
+class AppwriteStorage(MediaStorage):
+    def __init__(self):
+        from .appwrite import AppwriteHelper
+        self.helper = AppwriteHelper()
+
+    def save(self, name, path=None, data=None, content_type=None):
+        if path is not None:
+            return self.helper.upload_path(path, name)
+        return self.helper.upload_bytes(data, name, content_type)
+
+
+class LocalFileStorage(MediaStorage):
+    """
+    Stores media under ``MEDIA_ROOT``, for development and offline tests.
+    """
+
+    def save(self, name, path=None, data=None, content_type=None):
+        relative_path = os.path.join('property_media', f"{uuid.uuid4().hex}{os.path.splitext(name)[1].lower()}")
+        destination = os.path.join(settings.MEDIA_ROOT, relative_path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if path is not None:
+            shutil.copyfile(path, destination)
+        else:
+            with open(destination, 'wb') as f:
+                f.write(data)
+        return f"{settings.MEDIA_URL.rstrip('/')}/{relative_path.replace(os.sep, '/')}"
+
+
+def get_media_storage():
+    """
+    The storage named by ``PROPERTY_MEDIA_STORAGE``, Appwrite by default.
+    """
+    path = getattr(settings, 'PROPERTY_MEDIA_STORAGE', 'properties.utils.storage.AppwriteStorage')
+    return import_string(path)()
@@ -0,0 +1,162 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from users.models import User
+
+from ..models import Property, PropertyView
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ViewBatch:
+    counts: dict = field(default_factory=lambda: defaultdict(int))
+    last_viewed: dict = field(default_factory=dict)
+    views: list = field(default_factory=list)
+    failures: int = 0
+
+
+class ViewCounter:
+    """
+    Write-behind buffer for property views.
+
+    Detail hits only touch process memory; a background flusher periodically
+    applies the accumulated increments with ``F()`` expressions and
+    bulk-inserts the buffered ``PropertyView`` rows. A batch that fails to
+    flush is kept apart from newer views for ``PROPERTY_VIEW_FLUSH_RETRIES``
+    more attempts, then dropped on its own, so one bad batch can neither
+    block nor take down later ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batch = ViewBatch()
+        self._failed = []
+        self._flusher = None
+        self._stopped = threading.Event()
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'PROPERTY_VIEW_FLUSH_INTERVAL', 5)
+
+    @property
+    def max_retries(self):
+        return getattr(settings, 'PROPERTY_VIEW_FLUSH_RETRIES', 3)
+
+    @property
+    def run_async(self):
+        return getattr(settings, 'PROPERTY_VIEW_COUNTER_ASYNC', True)
+
+    def record(self, property_id, user_id=None):
+        """
+        Count a view of a property, optionally logging it against a user.
+        """
+        now = timezone.now()
+        with self._lock:
+            self._batch.counts[property_id] += 1
+            self._batch.last_viewed[property_id] = now
+            if user_id is not None:
+                self._batch.views.append(PropertyView(user_id=user_id, property_id=property_id, viewed_at=now))
+
+        if self.run_async:
+            self._ensure_flusher()
+        else:
+            self.flush()
+
+    def pending(self, property_id):
+        """
+        Views of a property that have not been written to the database yet.
+        """
+        with self._lock:
+            return sum(batch.counts.get(property_id, 0) for batch in self._batches())
+
+    def pending_for_user(self, user_id, since):
+        """
+        Buffered views by a user at or after ``since``.
+        """
+        with self._lock:
+            return sum(
+                1 for batch in self._batches() for view in batch.views
+                if view.user_id == user_id and view.viewed_at >= since
+            )
+
+    def flush(self):
+        """
+        Write all buffered views to the database, retrying earlier failed
+        batches first.
+        """
+        with self._lock:
+            batches, self._failed = self._failed, []
+            if self._batch.counts:
+                batches.append(self._batch)
+                self._batch = ViewBatch()
+
+        failed = []
+        for batch in batches:
+            try:
+                self._write(batch)
+            except Exception:
+                batch.failures += 1
+                if batch.failures > self.max_retries:
+                    logger.exception(
+                        f"Failed to flush views for {len(batch.counts)} properties {batch.failures} times, dropping them"
+                    )
+                    continue
+                logger.exception(f"Failed to flush views for {len(batch.counts)} properties, keeping them buffered")
+                failed.append(batch)
+
+        if failed:
+            with self._lock:
+                self._failed[:0] = failed
+
+    def _batches(self):
+        return self._failed + [self._batch]
+
+    def _write(self, batch):
+        with transaction.atomic():
+            for property_id, count in batch.counts.items():
+                viewed_at = Value(batch.last_viewed[property_id])
+                Property.objects.filter(pk=property_id).update(
+                    views=F('views') + count,
+                    last_viewed=Greatest(Coalesce(F('last_viewed'), viewed_at), viewed_at)
+                )
+            PropertyView.objects.bulk_create(self._drop_orphans(batch.views), batch_size=500)
+
+    def _drop_orphans(self, views):
+        # Views of properties or by users deleted since they were buffered
+        property_ids = set(
+            Property.objects.filter(pk__in={view.property_id for view in views}).values_list('pk', flat=True)
+        )
+        user_ids = set(User.objects.filter(pk__in={view.user_id for view in views}).values_list('pk', flat=True))
+        return [view for view in views if view.property_id in property_ids and view.user_id in user_ids]
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name='property-view-flusher', daemon=True)
+                self._flusher.start()
+                atexit.register(self._shutdown)
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            close_old_connections()
+            self.flush()
+        close_old_connections()
+
+    def _shutdown(self):
+        self._stopped.set()
+        self.flush()
+
+
+view_counter = ViewCounter()
@@ -1,66 +1,70 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, AllowAny
+from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Property, PropertyView, SubscriptionPlan, UserSubscription, Transaction
+from .models import Property, PropertyAmenity, SavedSearch, SubscriptionPlan, Transaction
 from .serializers import (
     PropertySerializer, DashboardSerializer, SubscriptionPlanSerializer, 
-    UserSubscriptionSerializer, TransactionSerializer, InitiatePaymentSerializer
+    UserSubscriptionSerializer, TransactionSerializer, InitiatePaymentSerializer,
+    SavedSearchSerializer
 )
-from .filters import PropertyFilter
-from .utils.paystack import PaystackService
+from .filters import PropertyFilter, PropertySearchFilter
+from .pagination import KeysetPagination
+from .utils.paystack import get_paystack_service
+from .utils.quota import view_quota
+from .utils.response_cache import property_cache
+from .utils.settlement import settlement, verify_signature
+from .utils.view_counter import view_counter
 from notifications.models import Notification
 from drf_spectacular.utils import extend_schema
-from django.utils import timezone
-from django.db.models import Sum, Q
-from datetime import timedelta
+from django.db.models import Prefetch, Sum, Q
+import json
 
 class PropertyViewSet(viewsets.ModelViewSet):
-    queryset = Property.objects.all()
+    queryset = Property.objects.select_related('owner').prefetch_related(
+        Prefetch('amenities', queryset=PropertyAmenity.objects.select_related('amenity')), 'media'
+    )
     serializer_class = PropertySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, PropertySearchFilter, filters.OrderingFilter]
     filterset_class = PropertyFilter
-    search_fields = ['title', 'description', 'location']
     ordering_fields = ['price', 'created_at', 'boost_expiry']
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        # Boosted properties appear first
-        return queryset.order_by('-boost_expiry', '-created_at')
+        # Active boosts first, then by recency, views and owner rating; see utils.ranking
+        return queryset.order_by('-rank_score', 'id')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['user_subscription'] = self._get_user_subscription()
+        context['media_size'] = self._get_media_size()
         return context
 
+    def _get_media_size(self):
+        # Grids get thumbnails, the detail page large images
+        return {'list': 'thumbnail', 'retrieve': 'large'}.get(self.action, 'medium')
+
+    def _get_visibility_tier(self):
+        return property_cache.tier(self.request.user, self._get_user_subscription())
+
     def _get_user_subscription(self):
-        if not self.request.user.is_authenticated:
-            return None
-        try:
-            return UserSubscription.objects.filter(
-                user=self.request.user,
-                is_active=True,
-                end_date__gt=timezone.now()
-            ).latest('end_date')
-        except UserSubscription.DoesNotExist:
-            return None
+        # Resolved once per request; both the serializer context and the view limit need it
+        if not hasattr(self, '_user_subscription'):
+            self._user_subscription = view_quota.get_active_subscription(self.request.user)
+        return self._user_subscription
 
     def _check_view_limit(self, user):
+        """
+        Consume one view from the user's quota, returning False when it is exhausted.
+        """
         if not user.is_authenticated:
             return False
-        subscription = self._get_user_subscription()
-        if subscription and subscription.is_valid():
-            if subscription.plan.max_views is None:  # Unlimited views
-                return True
-            views = PropertyView.objects.filter(user=user, viewed_at__gte=subscription.start_date).count()
-            return views < subscription.plan.max_views
-        # Free tier: 5 views per month
-        start_of_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        views = PropertyView.objects.filter(user=user, viewed_at__gte=start_of_month).count()
-        return views < 5
+        return view_quota.consume(user, self._get_user_subscription())
 
     def perform_create(self, serializer):
         instance = serializer.save(owner=self.request.user)
@@ -70,8 +74,24 @@ class PropertyViewSet(viewsets.ModelViewSet):
             notification_type="PROPERTY_CREATED"
         )
 
+    def list(self, request, *args, **kwargs):
+        url, tier = request.build_absolute_uri(), self._get_visibility_tier()
+        generation = property_cache.list_generation()
+        data = property_cache.get_list(url, tier, generation)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        property_cache.set_list(url, tier, generation, response.data)
+        return response
+
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
+        tier, media_size = self._get_visibility_tier(), self._get_media_size()
+        data, version = None, None
+        # Query parameters reach the filter backends, which may hide the property
+        if not request.query_params:
+            data, version = property_cache.get_detail(self.kwargs[self.lookup_field], tier, media_size)
+        instance = self.get_object() if data is None else None
         can_view = self._check_view_limit(request.user)
         
         if not can_view and not request.user.is_authenticated:
@@ -81,14 +101,14 @@ class PropertyViewSet(viewsets.ModelViewSet):
                 "You have reached your view limit. Subscribe or use Pay-Per-View to unlock this property."
             )
         
-        instance.views += 1
-        instance.last_viewed = timezone.now()
-        instance.save()
-        if request.user.is_authenticated:
-            PropertyView.objects.create(user=request.user, property=instance)
+        property_id = instance.id if instance else int(self.kwargs[self.lookup_field])
+        view_counter.record(property_id, request.user.id if request.user.is_authenticated else None)
         
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        if data is None:
+            data = self.get_serializer(instance).data
+            if not request.query_params:
+                property_cache.set_detail(instance, version, tier, media_size, data)
+        return Response(data)
 
     @action(detail=False, methods=['get'], url_path='dashboard', url_name='dashboard')
     def dashboard(self, request):
@@ -102,18 +122,14 @@ class PropertyViewSet(viewsets.ModelViewSet):
             'rented_properties': Property.objects.filter(owner=user, is_rented=True).count(),
             'total_views': Property.objects.filter(owner=user).aggregate(Sum('views'))['views__sum'] or 0,
         }
-        recently_viewed = Property.objects.filter(Q(owner=user) & Q(last_viewed__isnull=False)).order_by('-last_viewed')[:5]
+        recently_viewed = self.queryset.filter(Q(owner=user) & Q(last_viewed__isnull=False)).order_by('-last_viewed')[:5]
         serializer = DashboardSerializer({'recently_viewed': recently_viewed, **stats}, context={'request': request})
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'], url_path='increment-view', url_name='increment-view')
     def increment_view(self, request, pk=None):
         property = self.get_object()
-        property.views += 1
-        property.last_viewed = timezone.now()
-        property.save()
-        if request.user.is_authenticated:
-            PropertyView.objects.create(user=request.user, property=property)
+        view_counter.record(property.id, request.user.id if request.user.is_authenticated else None)
         return Response({'status': 'View count updated'})
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], url_path='initiate-payment', url_name='initiate-payment')
@@ -122,7 +138,7 @@ class PropertyViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        paystack = PaystackService()
+        paystack = get_paystack_service()
         callback_url = request.build_absolute_uri('/api/properties/verify-payment/')
         user = request.user
         amount = None
@@ -175,67 +191,60 @@ class PropertyViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='verify-payment', url_name='verify-payment')
     def verify_payment(self, request):
+        """
+        Where Paystack sends the payer back. Payments are settled by the
+        webhook, so this only reports how far the transaction has got.
+        """
         reference = request.GET.get('reference')
         if not reference:
             return Response({'error': 'Reference required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        paystack = PaystackService()
-        verification = paystack.verify_transaction(reference)
-        if not verification or verification['status'] != 'success':
+
+        transaction = Transaction.objects.filter(reference=reference).first()
+        if transaction is None:
+            return Response({'error': 'Transaction not found'}, status=status.HTTP_404_NOT_FOUND)
+        if transaction.status == 'FAILED':
             return Response({'error': 'Payment verification failed'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        transaction = Transaction.objects.get(paystack_reference=reference)
-        if transaction.status == 'SUCCESS':
-            return Response({'message': 'Payment already verified'})
-        
-        metadata = verification.get('metadata', {})
-        transaction.status = 'SUCCESS'
-        
-        if metadata['type'] == 'SUBSCRIPTION':
-            plan = SubscriptionPlan.objects.get(id=metadata['plan_id'])
-            start_date = timezone.now()
-            end_date = start_date + timedelta(days=plan.duration_days)
-            UserSubscription.objects.filter(user=request.user, is_active=True).update(is_active=False)
-            subscription = UserSubscription.objects.create(
-                user=request.user,
-                plan=plan,
-                start_date=start_date,
-                end_date=end_date,
-                paystack_reference=reference,
-                is_active=True
-            )
-            transaction.subscription = subscription
-            Notification.objects.create(
-                recipient=request.user,
-                message=f"Your {plan.name} subscription is now active.",
-                notification_type="SUBSCRIPTION_ACTIVE"
+        if transaction.status == 'PENDING':
+            return Response(
+                {'status': 'PENDING', 'message': 'Payment is being confirmed'}, status=status.HTTP_202_ACCEPTED
             )
-        elif metadata['type'] == 'PAY_PER_VIEW':
-            property = Property.objects.get(id=metadata['property_id'])
-            transaction.property = property
-            PropertyView.objects.create(user=request.user, property=property)
-            Notification.objects.create(
-                recipient=request.user,
-                message=f"You have unlocked details for '{property.title}'.",
-                notification_type="PAY_PER_VIEW"
-            )
-        elif metadata['type'] == 'BOOST':
-            property = Property.objects.get(id=metadata['property_id'])
-            duration_days = metadata['duration_days']
-            property.boost_expiry = timezone.now() + timedelta(days=duration_days)
-            property.save()
-            transaction.property = property
-            Notification.objects.create(
-                recipient=request.user,
-                message=f"Your listing '{property.title}' has been boosted for {duration_days} days.",
-                notification_type="BOOST_ACTIVE"
-            )
-        
-        transaction.save()
-        return Response({'message': f'{metadata["type"]} payment verified successfully'})
+        return Response({'status': 'SUCCESS', 'message': f'{transaction.transaction_type} payment verified successfully'})
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated], url_path='subscriptions', url_name='subscriptions')
     def list_subscriptions(self, request):
         plans = SubscriptionPlan.objects.filter(is_active=True)
         serializer = SubscriptionPlanSerializer(plans, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+class PaystackWebhookView(APIView):
+    """
+    Receives Paystack events. The signature is checked and the event stored
+    and queued for settlement; nothing else happens before it is acknowledged.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        body = request.body
+        if not verify_signature(body, request.headers.get('X-Paystack-Signature')):
+            return Response({'error': 'Invalid signature'}, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return Response({'error': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
+        settlement.receive(payload)
+        return Response(status=status.HTTP_200_OK)
+
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    """
+    Saved searches of the current user. New and updated listings that match
+    one are announced to its owner.
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).order_by('-created_at')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
\ No newline at end of file
@@ -13,6 +13,8 @@ class AdminPropertySerializer(serializers.ModelSerializer):
     class Meta:
         model = Property
         fields = '__all__'
+        # Kept in step with the property's amenity rows
+        read_only_fields = ['amenity_mask']
 
 class AdminNotificationSerializer(serializers.ModelSerializer):
     class Meta:
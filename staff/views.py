@@ -18,7 +18,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing users (admin access).
     """
-    queryset = User.objects.all()
+    queryset = User.objects.prefetch_related('groups', 'user_permissions')
     serializer_class = AdminUserSerializer
     permission_classes = [IsAdminUser]
 
@@ -98,7 +98,7 @@ class AdminPropertyViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing properties (admin access).
     """
-    queryset = Property.objects.all()
+    queryset = Property.objects.select_related('owner').prefetch_related('owner__groups', 'owner__user_permissions')
     serializer_class = AdminPropertySerializer
     permission_classes = [IsAdminUser]
 
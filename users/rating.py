@@ -12,7 +12,7 @@ class RatingViewSet(viewsets.ModelViewSet):
     viewset for managing user ratings
     ViewSet for managing user ratings.
     """
-    queryset = Rating.objects.all()
+    queryset = Rating.objects.select_related('rater')
     serializer_class = RatingSerializer
     permission_classes = [permissions.IsAuthenticated]
  
@@ -20,7 +20,8 @@ class RatingViewSet(viewsets.ModelViewSet):
         """
         Get all ratings (you can add custom filtering here if needed).
         """
-        return Rating.objects.all()
+        # A fresh queryset each request; the class attribute's result cache would outlive it
+        return super().get_queryset()
 
     @extend_schema(
         summary="Create a new rating",
@@ -62,7 +63,7 @@ class RatingViewSet(viewsets.ModelViewSet):
         """
         Get ratings received by the current user and calculate statistics.
         """
-        ratings = Rating.objects.filter(rated_user=request.user)
+        ratings = self.queryset.filter(rated_user=request.user)
         serializer = self.get_serializer(ratings, many=True)
         
         # Calculate statistics
@@ -90,7 +91,7 @@ class RatingViewSet(viewsets.ModelViewSet):
         """
         Get ratings given by the current user.
         """
-        ratings = Rating.objects.filter(rater=request.user)
+        ratings = self.queryset.filter(rater=request.user)
         serializer = self.get_serializer(ratings, many=True)
         return Response(serializer.data)
 
@@ -1,3 +1,24 @@
-from django.test import TestCase
+from rest_framework.test import APITestCase
+from .models import Rating, User
 
-# Create your tests here.
+
+class RatingViewSetTests(APITestCase):
+    def setUp(self):
+        self.rater, self.rated = [
+            User.objects.create_user(
+                email=f'user{i}@example.com',
+                username=f'user{i}',
+                full_name=f'User {i}',
+                phone_number=f'+23412345678{i:02d}',
+                is_active=True,
+            )
+            for i in range(2)
+        ]
+        self.client.force_authenticate(self.rater)
+
+    def test_list_sees_ratings_created_after_an_earlier_request(self):
+        self.assertEqual(len(self.client.get('/api/users/ratings/').data), 0)
+
+        Rating.objects.create(rater=self.rater, rated_user=self.rated, score=4)
+
+        self.assertEqual(len(self.client.get('/api/users/ratings/').data), 1)